@@ -0,0 +1,107 @@
+from MonkeyMainFolder.Ledger.AggregateCube import DAY
+from MonkeyMainFolder.Ledger.Ledger import centsFromText, today
+from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import normalizeName
+
+# Length of each "For the next ..." choice, a budget rolls over to its next period when one ends
+WINDOW_DAYS = {"Week": 7, "Month": 30, "6 Months": 182, "Year": 365}
+
+
+class BudgetQuery:
+    """A budget line compiled: the categories it covers, its rolling window, limit and alert threshold."""
+
+    def __init__(self, names, windowDays, limit, threshold, start):
+        self.names = names  # normalized category names, a parent category brings its children
+        self.windowDays = windowDays
+        self.limit = limit  # cents
+        self.threshold = threshold  # percent of the limit the user wants to stay within
+        self.start = start  # day the first period starts
+        self.spent = 0
+        self.committed = 0
+
+    def window(self, day):
+        """[first, last) days of the period that holds day."""
+        first = self.start + max(day - self.start, 0) // self.windowDays * self.windowDays
+        return first, first + self.windowDays
+
+    def percent(self):
+        return self.spent * 100 / self.limit if self.limit else 0
+
+    def breached(self):
+        return self.spent * 100 > self.limit * self.threshold
+
+
+def compileBudget(timeFrame, amountText, category, threshold, categories, start=None):
+    """BudgetQuery for one input line, None when it has no category or amount yet.
+
+    categories is the expense CategoryManager.getCategories(), {parent: [children]}.
+    Raises ValueError for an amount that is not a number.
+    """
+    limit = centsFromText(amountText)
+    name = normalizeName(category)
+    if not name or limit <= 0:
+        return None
+    names = {name}
+    for parent, children in categories.items():
+        if normalizeName(parent) == name:
+            names.update(normalizeName(child) for child in children)
+    return BudgetQuery(names, WINDOW_DAYS[timeFrame], limit, threshold, today() if start is None else start)
+
+
+class BudgetEngine:
+    """Evaluates budgets against the expense sheet as it changes.
+
+    Spending comes from the expense AggregateCube's day buckets, and a budget is only re-evaluated when a
+    change touched one of its categories. Callbacks in listeners get (key, query) whenever a budget's
+    numbers change.
+    """
+
+    def __init__(self, cube):
+        self.cube = cube
+        self.queries = {}
+        self.covering = {}  # category id -> keys of the budgets that count it, filled in as ids show up
+        self.listeners = []
+        self.day = today()
+        cube.listeners.append(self.categoriesChanged)
+
+    def setQuery(self, key, query):
+        self.queries[key] = query
+        self.covering = {}
+        self._evaluate(key)
+
+    def removeQuery(self, key):
+        if self.queries.pop(key, None) is not None:
+            self.covering = {}
+
+    def checkDay(self):
+        """Roll budgets whose period ended over to the next one, call this from time to time."""
+        if today() != self.day:
+            self.day = today()
+            for key in list(self.queries):
+                self._evaluate(key)
+
+    def _covers(self, category_id):
+        keys = self.covering.get(category_id)
+        if keys is None:
+            name = normalizeName(self.cube.ledger.categories.text(category_id))
+            keys = [key for key, query in self.queries.items() if name in query.names]
+            self.covering[category_id] = keys
+        return keys
+
+    def _evaluate(self, key):
+        query = self.queries[key]
+        first, last = query.window(self.day)
+        category_ids = [category_id for category_id in self.cube.categories() if key in self._covers(category_id)]
+        query.spent = self.cube.total(DAY, category_ids, first, last - 1)
+        query.committed = self.cube.total(DAY, category_ids, first, last - 1, committed=True)
+        for callback in self.listeners:
+            callback(key, query)
+
+    def categoriesChanged(self, category_ids, first, last):
+        # A touched id may also have been renamed or reused by a newly opened file
+        for category_id in category_ids:
+            self.covering.pop(category_id, None)
+        for key in {key for category_id in category_ids for key in self._covers(category_id)}:
+            start, end = self.queries[key].window(self.day)
+            # Changes outside the budget's current period leave it as it is
+            if first is None or (first < end and last >= start):
+                self._evaluate(key)
@@ -1,7 +1,9 @@
 from random import random
 
 import matplotlib
-from PyQt6.QtWidgets import QPushButton, QSizePolicy
+import numpy as np
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QPushButton, QSizePolicy, QComboBox
 from PyQt6 import QtWidgets
 import seaborn as sns
 import pandas as pd
@@ -9,8 +11,16 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT as NavigationToolbar
 import matplotlib.dates as mdates
 
+from MonkeyMainFolder.Ledger.AggregateCube import DAY, WEEK, MONTH, EPOCH_DAY
+
 matplotlib.use('QtAgg')
 
+CHART_GRAINS = {"Daily": DAY, "Weekly": WEEK, "Monthly": MONTH}
+# Bar widths in days, a little narrower than the bucket
+BAR_DAYS = {DAY: 0.8, WEEK: 6, MONTH: 25}
+# Charts redraw this long after the last edit
+REDRAW_DELAY_MS = 300
+
 
 class MplCanvas(FigureCanvasQTAgg):
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -19,79 +29,51 @@ class MplCanvas(FigureCanvasQTAgg):
         super(MplCanvas, self).__init__(fig)
 
 
-class BudgetPanel(QtWidgets.QWidget):
-    def __init__(self):
-        def ordinal(n):
-            if 10 <= n % 100 <= 20:
-                suffix = 'th'
-            else:
-                suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
-            return f"{n}{suffix}"
+def ordinal(n):
+    if 10 <= n % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+
+def customDateFormat(x, _=None):
+    date = mdates.num2date(x).date()
+    return date.strftime(f'{ordinal(date.day)} %b')
 
+
+class BudgetPanel(QtWidgets.QWidget):
+    def __init__(self, cashflow=None):
         super().__init__()
+        # CashflowSeries over both sheets, the charts are drawn from it
+        self.cashflow = cashflow
+        self.stale = True  # drawn when the tab is shown
+
+        # Edits come in bursts, the charts are redrawn once they pause
+        self.redrawTimer = QTimer(self)
+        self.redrawTimer.setSingleShot(True)
+        self.redrawTimer.setInterval(REDRAW_DELAY_MS)
+        self.redrawTimer.timeout.connect(self.redraw)
 
-        # Placeholder widget for the Net Worth chart
-        netWorthChart = QtWidgets.QWidget()
-        netWorthChart.setStyleSheet("background-color: red;")  # Temp color to visualize space
-
-        # Expense data
-        data = {
-            'Date': [
-                "8/1/2023", "8/2/2023", "8/3/2023", "8/4/2023", "8/5/2023",
-                "8/6/2023", "8/7/2023", "8/8/2023", "8/9/2023", "8/10/2023",
-                "8/11/2023", "8/12/2023", "8/13/2023", "8/14/2023", "8/15/2023",
-                "8/16/2023", "8/17/2023", "8/18/2023", "8/19/2023", "8/20/2023",
-                "8/21/2023", "8/22/2023", "8/23/2023", "8/24/2023", "8/25/2023",
-                "8/26/2023", "8/27/2023", "8/28/2023", "8/29/2023", "8/30/2023",
-                "8/31/2023", "9/1/2023", "9/2/2023", "9/3/2023", "9/4/2023",
-                "9/5/2023", "9/6/2023", "9/7/2023", "9/8/2023", "9/9/2023",
-                "9/10/2023", "9/11/2023", "9/12/2023", "9/13/2023", "9/14/2023",
-                "9/15/2023", "9/16/2023", "9/17/2023", "9/18/2023", "9/19/2023",
-            ],
-            'Amount': [
-                3.14, 5.32, 10.12, 20.73, 41.85,
-                81.21, 150.56, 250.91, 400.27, 600.68,
-                800.00, 600.68, 400.27, 250.91, 150.56,
-                81.21, 41.85, 20.73, 10.12, 5.32,
-                3.14, 5.32, 10.12, 20.73, 41.85,
-                81.21, 150.56, 250.91, 400.27, 600.68,
-                800.00, 600.68, 400.27, 250.91, 150.56,
-                81.21, 41.85, 20.73, 10.12, 5.32,
-                81.21, 41.85, 20.73, 10.12, 5.32,
-                81.21, 41.85, 20.73, 10.12, 5.32
-
-            ]
-        }
-
-        # Randomly shuffle the 'Amount' values between the defined range
-        df = pd.DataFrame(data)
-        df['Date'] = pd.to_datetime(df['Date'])
-        df = df.sort_values(by='Date')
-
-        # Seaborn plot
-        sc = MplCanvas(self, width=5, height=4, dpi=100)
-        sns.lineplot(data=df, x="Date", y="Amount", ax=sc.axes, marker="o")
-
-        def customDateFormat(x, _=None):
-            date = mdates.num2date(x).date()
-            return date.strftime(f'{ordinal(date.day)} %b')
-
-        sc.axes.xaxis.set_major_formatter(customDateFormat)
-        sc.figure.autofmt_xdate()
-
-        # Navigation toolbar
-        toolbar = NavigationToolbar(sc, self)
+        self.grainDropDown = QComboBox()
+        self.grainDropDown.addItems(list(CHART_GRAINS))
+        self.grainDropDown.setCurrentText("Monthly")
+        self.grainDropDown.currentTextChanged.connect(self.redraw)
+
+        self.netWorthCanvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.cashflowCanvas = MplCanvas(self, width=5, height=4, dpi=100)
 
         # Organize chart layouts with equal stretch factors
         chartLayout = QtWidgets.QHBoxLayout()
-        chartLayout.addWidget(sc, 1)  # 50% width
-        chartLayout.addWidget(sc, 1)  # 50% width
+        chartLayout.addWidget(self.netWorthCanvas, 1)  # 50% width
+        chartLayout.addWidget(self.cashflowCanvas, 1)  # 50% width
 
         # Ensure charts and buttons each take up half the height of the panel
         chartLayout.setContentsMargins(0, 0, 0, 0)
         chartLayout.setSpacing(0)
 
         mainLayout = QtWidgets.QVBoxLayout()
+        mainLayout.addWidget(self.grainDropDown)
         mainLayout.addLayout(chartLayout)
 
         # Layout for the buttons with size policy adjustments
@@ -99,6 +81,7 @@ class BudgetPanel(QtWidgets.QWidget):
 
         conditionalStatementsBtn = QPushButton("Conditional Statements")
         conditionalStatementsBtn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.conditionalStatementsBtn = conditionalStatementsBtn  # MyWindow opens the budget lines with it
 
         budgetingGoalsBtn = QPushButton("Budgeting Goals")
         budgetingGoalsBtn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
@@ -114,3 +97,44 @@ class BudgetPanel(QtWidgets.QWidget):
         mainLayout.addLayout(buttonLayout)
 
         self.setLayout(mainLayout)
+
+        if self.cashflow is not None:
+            self.cashflow.listeners.append(self.cashflowChanged)
+
+    def cashflowChanged(self):
+        self.stale = True
+        if self.isVisible():
+            self.redrawTimer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.stale:
+            self.redraw()
+
+    def redraw(self):
+        self.stale = False
+        grain = CHART_GRAINS[self.grainDropDown.currentText()]
+        netWorthAxes = self.netWorthCanvas.axes
+        cashflowAxes = self.cashflowCanvas.axes
+        netWorthAxes.clear()
+        cashflowAxes.clear()
+        netWorthAxes.set_title("Net Worth")
+        cashflowAxes.set_title("Income - Expenses")
+
+        if self.cashflow is not None:
+            result = self.cashflow.series(grain)
+            if len(result.buckets):
+                dates = pd.to_datetime(result.starts - EPOCH_DAY, unit='D')
+                sns.lineplot(x=dates, y=result.netWorth / 100, ax=netWorthAxes, marker="o")
+                net = result.net / 100
+                cashflowAxes.bar(dates, net, width=BAR_DAYS[grain],
+                                 color=np.where(net >= 0, "tab:green", "tab:red"))
+                for axes in [netWorthAxes, cashflowAxes]:
+                    if grain in [DAY, WEEK]:
+                        axes.xaxis.set_major_formatter(customDateFormat)
+                    else:
+                        axes.xaxis.set_major_formatter(mdates.DateFormatter('%b %Y'))
+
+        for canvas in [self.netWorthCanvas, self.cashflowCanvas]:
+            canvas.figure.autofmt_xdate()
+            canvas.draw_idle()
@@ -0,0 +1,72 @@
+import numpy as np
+
+from MonkeyMainFolder.Ledger.AggregateCube import bucketsOf, bucketStarts
+
+
+class CashflowResult:
+    """Income, expenses, income minus expenses and the running net worth per bucket, all int64 cents."""
+
+    def __init__(self, buckets, starts, income, expenses, netWorth):
+        self.buckets = buckets
+        self.starts = starts  # first day number of each bucket
+        self.income = income
+        self.expenses = expenses
+        self.net = income - expenses
+        self.netWorth = netWorth
+
+
+class CashflowSeries:
+    """Cashflow and net worth over time from the income and expense AggregateCubes.
+
+    Results are cached per (grain, committed). A change only throws away the buckets from the first day
+    it touched on: the cached buckets before it are kept and the running net worth carries on from
+    the last one of them with a cumulative sum over the rest.
+    """
+
+    def __init__(self, incomeCube, expenseCube):
+        self.incomeCube = incomeCube
+        self.expenseCube = expenseCube
+        self.cache = {}  # (grain, committed) -> CashflowResult
+        self.stale = {}  # (grain, committed) -> first bucket to recompute
+        self.listeners = []
+        incomeCube.listeners.append(self.cubeChanged)
+        expenseCube.listeners.append(self.cubeChanged)
+
+    def cubeChanged(self, category_ids, first, last):
+        if first is None:
+            self.cache = {}
+            self.stale = {}
+        else:
+            for grain, committed in self.cache:
+                bucket = int(bucketsOf(grain, [first])[0])
+                self.stale[grain, committed] = min(self.stale.get((grain, committed), bucket), bucket)
+        for callback in self.listeners:
+            callback()
+
+    def series(self, grain, committed=False):
+        key = (grain, committed)
+        cached = self.cache.get(key)
+        if cached is not None and key not in self.stale:
+            return cached
+        start = self.stale.pop(key, None) if cached is not None else None
+
+        incomeBuckets, income = self.incomeCube.series(grain, first=start, committed=committed)
+        expenseBuckets, expenses = self.expenseCube.series(grain, first=start, committed=committed)
+        buckets = np.union1d(incomeBuckets, expenseBuckets)
+        incomeSums = np.zeros(len(buckets), dtype=np.int64)
+        expenseSums = np.zeros(len(buckets), dtype=np.int64)
+        incomeSums[np.searchsorted(buckets, incomeBuckets)] = income
+        expenseSums[np.searchsorted(buckets, expenseBuckets)] = expenses
+        netWorth = np.cumsum(incomeSums - expenseSums)
+
+        if start is not None:
+            kept = cached.buckets < start
+            if kept.any():
+                netWorth += cached.netWorth[kept][-1]
+            buckets = np.concatenate([cached.buckets[kept], buckets])
+            incomeSums = np.concatenate([cached.income[kept], incomeSums])
+            expenseSums = np.concatenate([cached.expenses[kept], expenseSums])
+            netWorth = np.concatenate([cached.netWorth[kept], netWorth])
+        result = CashflowResult(buckets, bucketStarts(grain, buckets), incomeSums, expenseSums, netWorth)
+        self.cache[key] = result
+        return result
@@ -1,12 +1,42 @@
 from random import randint
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QGuiApplication
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-                             QComboBox, QSpinBox, QSpacerItem, QSizePolicy, QProgressBar, QScrollArea)
+                             QComboBox, QSpinBox, QSpacerItem, QSizePolicy, QProgressBar, QScrollArea, QMessageBox)
 
+from MonkeyMainFolder.Budget.BudgetEngine import compileBudget
+from MonkeyMainFolder.Ledger.Ledger import textFromCents
 
-def createBudgetInputLine():
+# How often the budgets check whether a new day rolled their period over
+DAY_CHECK_MS = 60 * 1000
+
+
+class BudgetLine:
+    """The inputs and progress bar of one budget line, also the key its query is kept under in the engine."""
+
+    def __init__(self, timeFrameDropDown, amountInput, categoryDropDown, percentageInput, progressbar, color):
+        self.timeFrameDropDown = timeFrameDropDown
+        self.amountInput = amountInput
+        self.categoryDropDown = categoryDropDown
+        self.percentageInput = percentageInput
+        self.progressbar = progressbar
+        self.color = color
+
+    def compile(self, categories):
+        return compileBudget(self.timeFrameDropDown.currentText(), self.amountInput.text(),
+                             self.categoryDropDown.currentText(), self.percentageInput.value(), categories)
+
+    def showProgress(self, query):
+        self.progressbar.setValue(min(int(query.percent()), 100))
+        self.progressbar.setFormat(f"{textFromCents(query.spent)} of {textFromCents(query.limit)} (%p%)")
+        self.progressbar.setToolTip(f"{textFromCents(query.committed)} committed")
+        color = "red" if query.breached() else self.color
+        self.progressbar.setStyleSheet(f"QProgressBar::chunk {{ background-color: {color}; }}")
+
+
+def createBudgetInputLine(categories=None):
+    """Layout of one budget line and its BudgetLine, categories is {parent: [children]}."""
     # Container for budget and its progress ba
     containerLayout = QHBoxLayout()
 
@@ -24,12 +54,16 @@ def createBudgetInputLine():
 
     budgetLayout.addWidget(QLabel("for the category"))
     categoryDropDown = QComboBox()
+    for parent, children in (categories or {}).items():
+        categoryDropDown.addItem(parent)
+        categoryDropDown.addItems([f"  {child}" for child in children])
     budgetLayout.addWidget(categoryDropDown)
 
     budgetLayout.addWidget(QLabel("I want to stay within"))
     percentageInput = QSpinBox()
     percentageInput.setRange(0, 100)
     percentageInput.setSuffix('%')
+    percentageInput.setValue(100)
     budgetLayout.addWidget(percentageInput)
 
     # Spacer to push the progress bar to the right
@@ -41,7 +75,7 @@ def createBudgetInputLine():
 
     # Progress Bar to the right of the budget input fields
     progressbar = QProgressBar()
-    progressbar.setValue(50)  # Setting it to 50 for visualization
+    progressbar.setValue(0)
     progressbar.setContentsMargins(0, 0, 0, 0)
     progressbar.setMaximumWidth(500)  # Restricting the width of the progress bar
     randomcolor = f"rgb({randint(0, 255)}, {randint(0, 255)}, {randint(0, 255)})"
@@ -49,12 +83,17 @@ def createBudgetInputLine():
 
     containerLayout.addWidget(progressbar)
 
-    return containerLayout
+    return containerLayout, BudgetLine(timeFrameDropDown, amountInput, categoryDropDown, percentageInput,
+                                       progressbar, randomcolor)
 
 
 class ConditionalStatements(QWidget):
-    def __init__(self, categories=None):
+    def __init__(self, categories=None, engine=None):
         super().__init__()
+        # categories is the expense CategoryManager, engine the BudgetEngine watching the expense sheet
+        self.categories = categories
+        self.engine = engine
+        self.lines = []
 
         # Create a scroll area for the widget
         self.scrollArea = QScrollArea(self)
@@ -77,8 +116,9 @@ class ConditionalStatements(QWidget):
         self.budgetSetUpLayout = QVBoxLayout()  # This layout will contain all budget lines
 
         # Initial budget setup layout
-        budgetLayout = createBudgetInputLine()
+        budgetLayout, line = createBudgetInputLine(self.categoryTree())
         self.budgetSetUpLayout.addLayout(budgetLayout)
+        self.lines.append(line)
 
         # Button Panel
         buttonLayout = QHBoxLayout()
@@ -95,12 +135,42 @@ class ConditionalStatements(QWidget):
         self.setLayout(scrollLayout)
 
         # Connect the button's click event
+        self.submitButton.clicked.connect(self.setBudgets)
+
+        if self.engine is not None:
+            self.engine.listeners.append(self.budgetChanged)
+            self.dayTimer = QTimer(self)
+            self.dayTimer.timeout.connect(self.engine.checkDay)
+            self.dayTimer.start(DAY_CHECK_MS)
+
+    def categoryTree(self):
+        return self.categories.getCategories() if self.categories is not None else {}
 
     def addBudgetLine(self):
-        newBudgetLine = createBudgetInputLine()
+        newBudgetLine, line = createBudgetInputLine(self.categoryTree())
         self.budgetSetUpLayout.insertLayout(0, newBudgetLine)  # Inserts at the top
+        self.lines.append(line)
         self.update()
 
+    def setBudgets(self):
+        """Compile every line into a budget query, the engine keeps its bar up to date from then on."""
+        if self.engine is None:
+            return
+        for line in self.lines:
+            try:
+                query = line.compile(self.categoryTree())
+            except ValueError:
+                QMessageBox.warning(self, "Budget", f"'{line.amountInput.text()}' is not an amount.")
+                continue
+            if query is None:
+                self.engine.removeQuery(line)
+                line.progressbar.setValue(0)
+            else:
+                self.engine.setQuery(line, query)
+
+    def budgetChanged(self, line, query):
+        line.showProgress(query)
+
     def adjustForScreenSize(self):
         # Get screen size
         screen = QGuiApplication.screens()[0]  # [0] gives the primary screen
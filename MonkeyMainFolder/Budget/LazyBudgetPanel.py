@@ -0,0 +1,56 @@
+import importlib
+import threading
+
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+
+from MonkeyMainFolder.Settings.StartupTrace import startupTrace
+
+# BudgetPanel pulls in matplotlib and seaborn, nothing imports it until the charts are needed
+BUDGET_PANEL_MODULE = 'MonkeyMainFolder.Budget.BudgetPanel'
+
+
+def _importBudgetPanel():
+    try:
+        with startupTrace.phase("BudgetPanel prewarm"):
+            importlib.import_module(BUDGET_PANEL_MODULE)
+    except Exception as e:
+        print("Could not prewarm the Budget charts: ", e)
+
+
+def prewarmBudgetPanel():
+    """Import the charting stack on a background thread, so the first visit to the Budget tab only has to draw.
+    An import the GUI thread starts meanwhile waits for this one instead of running twice."""
+    thread = threading.Thread(target=_importBudgetPanel, name="budget-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+class LazyBudgetPanel(QWidget):
+    """Holds the Budget tab's place until it is first shown, then builds the real BudgetPanel inside it."""
+
+    panelCreated = pyqtSignal(object)
+
+    def __init__(self, cashflow=None, parent=None):
+        super().__init__(parent)
+        self.cashflow = cashflow
+        self.panel = None
+        self.loadingLabel = QLabel("Loading charts...")
+        self.loadingLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.loadingLabel)
+
+    def ensurePanel(self):
+        if self.panel is None:
+            with startupTrace.phase("BudgetPanel"):
+                module = importlib.import_module(BUDGET_PANEL_MODULE)
+                self.panel = module.BudgetPanel(self.cashflow)
+            self.layout().replaceWidget(self.loadingLabel, self.panel)
+            self.loadingLabel.deleteLater()
+            self.panelCreated.emit(self.panel)
+        return self.panel
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.ensurePanel()
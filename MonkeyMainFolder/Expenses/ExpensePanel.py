@@ -3,76 +3,28 @@ import os
 import random
 import shutil
 
+import numpy as np
 from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QStandardItemModel, QStandardItem, QDoubleValidator, QPalette, QColor, QIcon
-from PyQt6.QtWidgets import (QWidget, QTableWidget, QVBoxLayout, QHBoxLayout, QComboBox,
-                             QPushButton, QSizePolicy, QLabel, QItemDelegate, QLineEdit, QStyledItemDelegate, QDateEdit,
-                             QFileDialog, QTableWidgetItem, QHeaderView, QTableWidgetSelectionRange, QMessageBox)
-
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel, QFileDialog,
+                             QHeaderView, QMessageBox, QTableView, QAbstractItemView)
+
+from MonkeyMainFolder.Expenses.ExpenseTableModel import (ExpenseTableModel, TYPE_COLUMN, NAME_COLUMN, DUE_DATE_COLUMN,
+                                                          AUDIT_DATE_COLUMN, RECEIPT_COLUMN, TOTAL_COLUMN,
+                                                          COMMIT_COLUMN)
+from MonkeyMainFolder.FileIO.CategoryRules import RuleManager
+from MonkeyMainFolder.Ledger.AggregateCube import AggregateCube
+from MonkeyMainFolder.Ledger.CategoryModel import CategoryModel
+from MonkeyMainFolder.Ledger.Delegates import MoneyItemDelegate, DateDelegate, TypeDelegate, ButtonDelegate
+from MonkeyMainFolder.Ledger.FilterBar import FilterBar
+from MonkeyMainFolder.Ledger.Ledger import Ledger, EXPENSE_SCHEMA
+from MonkeyMainFolder.Ledger.LedgerFilterModel import LedgerFilterModel
+from MonkeyMainFolder.Ledger.RunningTotals import RunningTotals
+from MonkeyMainFolder.Ledger.SearchIndex import SearchIndex
 from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import CategoryManager
 from MonkeyMainFolder.Settings.Shortcuts import Shortcuts
 
-
-class MoneyItemDelegate(QStyledItemDelegate):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.validator = QDoubleValidator(0, 9999999999, 2, self)
-
-    def createEditor(self, parent, option, index):
-        editor = QLineEdit(parent)
-        editor.setValidator(self.validator)
-        return editor
-
-    def setEditorData(self, editor, index):
-        value = index.model().data(index, Qt.ItemDataRole.EditRole)
-        if value:
-            editor.setText(str(value))
-
-    def setModelData(self, editor, model, index):
-        value = editor.text().replace('$', '').strip()
-        model.setData(index, value, Qt.ItemDataRole.EditRole)
-
-    def paint(self, painter, option, index):
-        super().paint(painter, option, index)
-        painter.save()
-        rect = option.rect
-        painter.drawText(rect.left() + 5, rect.top(), rect.width(), rect.height(),
-                         Qt.AlignmentFlag.AlignVCenter, "$")
-        painter.restore()
-
-
-class CustomTableWidget(QTableWidget):
-    def __init__(self, rows, columns):
-        super().__init__(rows, columns)
-        self.non_editable_rows = set()
-
-    def flags(self, index):
-        if index.row() in self.non_editable_rows:
-            return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
-        return super().flags(index) | Qt.ItemFlag.ItemIsEditable
-
-    def disableRowEditing(self, row):
-        self.non_editable_rows.add(row)
-
-
-class DateDelegate(QItemDelegate):
-    def createEditor(self, parent, option, index):
-        editor = QDateEdit(parent)
-        editor.setCalendarPopup(True)
-        editor.setDisplayFormat("dd/MM/yyyy")
-
-        editor.setDate(QDate.currentDate())
-        return editor
-
-    def setEditorData(self, editor, index):
-        value = index.model().data(index, Qt.ItemDataRole.DisplayRole)
-        editor.setDate(QDate.fromString(value, "dd/MM/yyyy"))
-
-    def setModelData(self, editor, model, index):
-        model.setData(index, editor.date().toString("dd/MM/yyyy"), Qt.ItemDataRole.EditRole)
-
-    def updateEditorGeometry(self, editor, option, index):
-        editor.setGeometry(option.rect)
+# The delete warning names this many committed rows, the rest are counted
+MAX_LISTED_ROWS = 20
 
 
 class ExpensePanel(QWidget):
@@ -80,131 +32,105 @@ class ExpensePanel(QWidget):
     def __init__(self, parent=None, signal_broker=None):
         super(ExpensePanel, self).__init__(parent)
 
-        self.expenseTable = CustomTableWidget(1, 8)
+        self.ledger = Ledger(EXPENSE_SCHEMA)
+        self.totals = RunningTotals(self.ledger, 'total', 'type')
+        # Sums per day/week/month/year and category for budgets and charts
+        self.cube = AggregateCube(self.ledger, 'total', 'type', 'due')
+        self.searchIndex = SearchIndex(self.ledger, ['type', 'name', 'summary', 'receipt'])
+        self.expenseModel = ExpenseTableModel(self.ledger, self)
+        # The table shows the sheet through the filters, handlers map view rows back with sourceRow()
+        self.expenseFilter = LedgerFilterModel(self.expenseModel, 'due', 'total', 'type', parent=self)
+        self.expenseTable = QTableView()
+        self.expenseTable.setModel(self.expenseFilter)
         self.totalExpensesLabel = QLabel("Total: $0.00")
         self.committedTotalExpensesLabel = QLabel("Committed Total: $0.00")
 
         self.categoryManager = CategoryManager()
         self.categoryManager.cats_saved.connect(self.RefreshCats)  # Connect custom signal to refreshCats method
+        self.categoryManager.category_renamed.connect(self.categoryRenamed)
 
         self.categoryManager.initialize('C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings/JSONS/'
                                         'expensesEditor.json')
+        self.ruleManager = RuleManager()
+        self.ruleManager.initialize('C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings/JSONS/'
+                                    'categoryRules.json')
         self.signal_broker = signal_broker
         if self.signal_broker:
             self.signal_broker.global_cats_saved.connect(self.RefreshCats)
+            self.signal_broker.global_rules_saved.connect(self.ruleManager.loadRules)
         self.categoryManager.loadCats()
+        # Shared by every Type dropdown of this sheet, updated in place when the categories change
+        self.categoryModel = CategoryModel(self.categoryManager.getCategories(), self)
         self.setupUi()
 
     def RefreshCats(self):
         print("RefreshCats has been called")
 
-        # Step 1: Read the updated JSON and refresh CategoryManager
+        # Read the updated JSON and apply only the changed lines to the shared dropdown model
         self.categoryManager.loadCats()
+        if self.categoryModel.setCategories(self.categoryManager.getCategories()):
+            self.expenseTable.viewport().update()
 
-        # Step 2: Iterate over rows to get each dropdown
-        rowCount = self.expenseTable.rowCount()
-        for row in range(rowCount):
-            comboBox = self.expenseTable.cellWidget(row, 0)  # Assuming the dropdown is in column 0
-
-            # Step 3: Store the current selection
-            current_category = comboBox.currentText()
-
-            # Step 4: Clear the existing items in the dropdown
-            comboBox.clear()
-
-            # Step 4.1: Create a new model for the combo box to enforce hierarchy and selectable status
-            model = QStandardItemModel()
-
-            for category, subcategories in self.categoryManager.categories.items():
-                category_item = QStandardItem(category)
+    def categoryRules(self):
+        # Compiled once per change of the rules or categories, so its payee cache carries over between imports
+        return self.ruleManager.matcher(self.categoryManager.dropdownLookup())
 
-                if subcategories:  # If there are subcategories
-                    category_item.setSelectable(False)
-                    category_item.setEnabled(False)
-                else:  # If there are no subcategories
-                    category_item.setSelectable(True)
-                    category_item.setEnabled(True)
+    def categoryRenamed(self, category_id, old, new):
+        # Rows keep their category id, only the label changes
+        self.expenseModel.renameCategory(old, new)
 
-                model.appendRow(category_item)
-
-                for subcategory in subcategories:
-                    subcategory_item = QStandardItem(f"  {subcategory}")
-                    model.appendRow(subcategory_item)
+    def setupExpenseTable(self, table):
+        # Set Money Delegate for the 'Total' column
+        delegate = MoneyItemDelegate(table)
+        table.setItemDelegateForColumn(TOTAL_COLUMN, delegate)
 
-            # Step 4.2: Apply the new model to the combo box
-            comboBox.setModel(model)
+        typeDelegate = TypeDelegate(self, table)
+        table.setItemDelegateForColumn(TYPE_COLUMN, typeDelegate)
 
-            # Step 5: Restore the selection
-            index = comboBox.findText(current_category)
-            if index >= 0:
-                comboBox.setCurrentIndex(index)
+        date_delegate = DateDelegate(table)
+        table.setItemDelegateForColumn(DUE_DATE_COLUMN, date_delegate)  # For 'Due Date' column
+        table.setItemDelegateForColumn(AUDIT_DATE_COLUMN, date_delegate)  # For 'Audit Date' column
 
-    def setupExpenseTable(self, table):
-        table.setHorizontalHeaderLabels(
-            ['Type', 'Name', 'Summary', 'Due Date', 'Audit Date', 'Receipt', 'Total', 'Commit']
-        )
+        buttonDelegate = ButtonDelegate(table)
+        buttonDelegate.clicked.connect(self.buttonCellClicked)
+        table.setItemDelegateForColumn(RECEIPT_COLUMN, buttonDelegate)
+        table.setItemDelegateForColumn(COMMIT_COLUMN, buttonDelegate)
 
-        # Set Money Delegate for the 'Total' column
-        delegate = MoneyItemDelegate(table)
-        table.setItemDelegateForColumn(6, delegate)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked |
+                              QAbstractItemView.EditTrigger.SelectedClicked |
+                              QAbstractItemView.EditTrigger.AnyKeyPressed)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectItems)
+        table.verticalHeader().setDefaultSectionSize(table.verticalHeader().minimumSectionSize() + 10)
 
         # Set column widths for the Expense table
-        table.setColumnWidth(3, 120)
-        table.setColumnWidth(4, 120)
-        table.setColumnWidth(5, 100)  # Receipt column
-        table.setColumnWidth(6, 100)  # Total column
-        table.setColumnWidth(7, 100)  # Commit column
+        table.setColumnWidth(DUE_DATE_COLUMN, 120)
+        table.setColumnWidth(AUDIT_DATE_COLUMN, 120)
+        table.setColumnWidth(RECEIPT_COLUMN, 100)  # Receipt column
+        table.setColumnWidth(TOTAL_COLUMN, 100)  # Total column
+        table.setColumnWidth(COMMIT_COLUMN, 100)  # Commit column
 
         # Set other columns to stretch
         for index in [0, 1, 2]:
             table.horizontalHeader().setSectionResizeMode(index, QHeaderView.ResizeMode.Stretch)
 
-        # Setup individual cell items/widgets based on each row
-        for i in range(3):  # Assuming 3 rows for the sake of demonstration
-            for j in range(8):
-                if j == 0:  # If it's the 'Type' column
-                    table.setCellWidget(i, j, self.createTypeDropdown())
-
-                elif j == 3:  # If it's the 'Due Date' column
-                    date_editor = QDateEdit()
-                    date_editor.setDate(QDate.currentDate())
-                    date_editor.setDisplayFormat("dd/MM/yyyy")
-                    table.setCellWidget(i, j, date_editor)
-
-                elif j == 4:  # If it's the 'Audit Date' column
-                    date_editor = QDateEdit()
-                    date_editor.setDate(QDate.currentDate())
-                    date_editor.setDisplayFormat("dd/MM/yyyy")
-                    table.setCellWidget(i, j, date_editor)
-
-
-                elif j == 5:
-                    receiptButton = QPushButton("No")
-                    receiptButton.clicked.connect(lambda _, b=receiptButton: self.receiptButtonClicked(b))
-                    table.setCellWidget(i, j, receiptButton)
-
-                elif j == 6:  # If it's the 'Total' column
-                    item = QTableWidgetItem()
-                    item.setText("0.00")  # default value
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight)
-                    table.setItem(i, j, item)
-
-                elif j == 7:  # If it's the 'Commit' column
-                    commitButton = QPushButton("Commit")
-                    commitButton.clicked.connect(lambda _, b=commitButton: self.commitButtonClicked(b))
-                    table.setCellWidget(i, j, commitButton)
-
-                else:
-                    table.setItem(i, j, QTableWidgetItem(" "))
-        date_delegate = DateDelegate(table)
-        table.setItemDelegateForColumn(3, date_delegate)  # For 'Due Date' column
-        table.setItemDelegateForColumn(4, date_delegate)  # For 'Audit Date' column
-        self.expenseTable.model().dataChanged.connect(self.updateTotalLabels)
+        # Start the sheet with one empty row
+        self.expenseModel.appendRow()
+
+        table.horizontalHeader().setSortIndicatorShown(True)
+        table.horizontalHeader().sectionDoubleClicked.connect(self.headerDoubleClicked)
+
+        self.expenseModel.dataChanged.connect(self.updateTotalLabels)
+        self.expenseModel.rowsInserted.connect(self.updateTotalLabels)
+        self.expenseModel.rowsRemoved.connect(self.updateTotalLabels)
+        # Scattered deletes are announced as a layout change
+        self.expenseModel.layoutChanged.connect(self.updateTotalLabels)
+        self.expenseModel.modelReset.connect(self.updateTotalLabels)
 
     def setupUi(self):
         layout = QVBoxLayout()
 
         self.setupExpenseTable(self.expenseTable)
+        self.filterBar = FilterBar(self.expenseFilter, self.categoryModel, self)
 
         # Setup Bottom Panel with buttons
         buttonPanel = QWidget()
@@ -233,45 +159,15 @@ class ExpensePanel(QWidget):
 
         buttonPanel.setLayout(buttonLayout)
 
+        layout.addWidget(self.filterBar)
         layout.addWidget(self.expenseTable)
         layout.addWidget(buttonPanel)
 
         self.setLayout(layout)
 
     def commitAllButtonClicked(self):
-        # Iterate through all rows
-        for row in range(self.expenseTable.rowCount()):
-            commitButton = self.expenseTable.cellWidget(row, 7)  # Assuming Commit button is in column 7
-
-            # If the row is already committed (based on the commit button status), skip it
-            if not commitButton.isEnabled():
-                continue
-
-            # Retrieve the name item to check if it's filled (same as in the single commit method)
-            name_item = self.expenseTable.item(row, 1)  # Assuming the 2nd column is the name
-
-            # If the name field is empty, skip this row
-            if not name_item or not name_item.text().strip():
-                continue
-
-            # Commit the row
-            for col in range(self.expenseTable.columnCount()):
-                # Skip over the Receipt column
-                if col == 5:  # Assuming that column index 5 is for Receipts
-                    continue
-
-                item = self.expenseTable.item(row, col)
-                if item:
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-                widget = self.expenseTable.cellWidget(row, col)
-                if widget:
-                    widget.setEnabled(False)
-
-            # Update the commit button status for the row
-            commitButton.setEnabled(False)
-            commitButton.setStyleSheet("background-color: green;")
-            commitButton.setText("Committed")
+        # Every row the filters show, rows without a name are skipped (same as the single commit)
+        self.expenseModel.commitRows(self.expenseFilter.rows)
 
         # Update totals after committing all eligible rows
         self.updateTotalLabels()
@@ -282,98 +178,54 @@ class ExpensePanel(QWidget):
         self.committedTotalExpensesLabel.setText(f"Committed Total: ${committed_total:.2f}")
 
     def computeTotals(self):
-        total = 0.0
-        committed_total = 0.0
-        for row in range(self.expenseTable.rowCount()):
-            commitButton = self.expenseTable.cellWidget(row, 7)
-
-            # Check if the commitButton exists
-            if not commitButton:
-                print(f"Missing commitButton in row {row}. Skipping this row.")
-                continue
-
-            # Check if the button is enabled
-            if not commitButton.isEnabled():
-                committed_value = self.expenseTable.item(row, 6).text().replace('$', '')
-                committed_total += float(committed_value)
-
-            value = self.expenseTable.item(row, 6).text().replace('$', '')
-            total += float(value)
-
-        return total, committed_total
+        # The running totals are updated by delta on every ledger change, reading them is O(1)
+        return self.totals.total / 100, self.totals.committedTotal / 100
 
     def addExpenseRow(self):
-        rowPosition = self.expenseTable.rowCount()
-        self.expenseTable.insertRow(rowPosition)
-
-        # Set default items/widgets for the new row
-        self.expenseTable.setCellWidget(rowPosition, 0, self.createTypeDropdown())
-
-        for col in [1, 2]:
-            self.expenseTable.setItem(rowPosition, col, QTableWidgetItem(" "))
-
-        # For 'Due Date' and 'Audit Date' columns
-        for col in [3, 4]:
-            date_editor = QDateEdit()
-            date_editor.setDate(QDate.currentDate())
-            date_editor.setDisplayFormat("dd/MM/yyyy")
-            self.expenseTable.setCellWidget(rowPosition, col, date_editor)
-
-        receiptButton = QPushButton("no")
-        receiptButton.clicked.connect(lambda _, b=receiptButton: self.receiptButtonClicked(b))
-        self.expenseTable.setCellWidget(rowPosition, 5, receiptButton)
-
-        # Set the default value for the 'Total' column
-        item = QTableWidgetItem("0.00")
-        item.setTextAlignment(Qt.AlignmentFlag.AlignRight)
-        self.expenseTable.setItem(rowPosition, 6, item)
-
-        commitButton = QPushButton("Commit")
-        commitButton.clicked.connect(lambda _, b=commitButton: self.commitButtonClicked(b))
-        self.expenseTable.setCellWidget(rowPosition, 7, commitButton)
-
+        # Set default values for the new row, editors are created when a cell is edited
+        self.expenseModel.appendRow()
 
     def deleteExpenseRow(self):
-        selectedRows = self.expenseTable.selectionModel().selectedRows()
-        committed_rows = []
-        uncommitted_rows = []
+        with self.expenseModel.undoMacro("Delete Expenses"):
+            self.deleteSelectedRows()
 
-        if not selectedRows:  # If no row is selected, remove the last row
-            last_row = self.expenseTable.rowCount() - 1
-            if last_row >= 0:  # Check if the table is not empty
+    def deleteSelectedRows(self):
+        rows = self.expenseFilter.selectedSourceRows(self.expenseTable.selectionModel().selection(), wholeRows=True)
+
+        if not len(rows):  # If no row is selected, remove the last row the filter shows
+            last_row = int(self.expenseFilter.rows[-1]) if len(self.expenseFilter.rows) else -1
+            if last_row >= 0:  # Check if any row is shown
                 if self.isRowCommitted(last_row):  # Use the function to check
-                    if not self.showDeleteCommittedRowDialog([last_row]):
+                    if self.showDeleteCommittedRowDialog([last_row]) != "OK":
                         return
-                self.expenseTable.removeRow(last_row)
+                self.expenseModel.removeRow(last_row)
         else:
-            selectedRows = sorted(selectedRows, key=lambda x: x.row(), reverse=True)
+            self.deleteRows(rows)
 
-            for index in selectedRows:
-                row_number = index.row()
+        self.updateTotalLabels()
 
-                if self.isRowCommitted(row_number):
-                    committed_rows.append(row_number)
-                else:
-                    uncommitted_rows.append(row_number)
+    def deleteRows(self, rows):
+        """Remove ledger rows in one batch, committed ones only once the user confirms (Delete and Cut)."""
+        committed = self.ledger.committedMask()[rows]
 
-            if committed_rows:  # If there are any committed rows
-                response = self.showDeleteCommittedRowDialog(committed_rows, bool(uncommitted_rows))
-                if response == "Cancel":
-                    return
-                elif response == "DeleteUncommitted":
-                    for row in uncommitted_rows:
-                        self.expenseTable.removeRow(row)
-                    return
+        if committed.any():  # If there are any committed rows
+            response = self.showDeleteCommittedRowDialog(np.sort(rows[committed]).tolist(),
+                                                         not committed.all())
+            if response == "Cancel":
+                return
+            elif response == "DeleteUncommitted":
+                rows = rows[~committed]
 
-            # If we reached this point, delete all selected rows
-            for index in selectedRows:
-                self.expenseTable.removeRow(index.row())
-
-        self.updateTotalLabels()
+        # The whole selection goes in one batch, the totals only subtract the removed rows.
+        # A selection of scattered rows is dropped first, remapping its ranges costs more than the delete
+        self.expenseTable.clearSelection()
+        self.expenseModel.removeRowList(rows)
 
     def showDeleteCommittedRowDialog(self, committed_rows, has_uncommitted=False):
         plural = "s" if len(committed_rows) > 1 else ""
-        rows_str = ", ".join(map(str, committed_rows))
+        rows_str = ", ".join(map(str, committed_rows[:MAX_LISTED_ROWS]))
+        if len(committed_rows) > MAX_LISTED_ROWS:
+            rows_str += f" and {len(committed_rows) - MAX_LISTED_ROWS} more"
 
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Icon.Warning)
@@ -396,16 +248,19 @@ class ExpensePanel(QWidget):
             return "DeleteUncommitted"
 
     def isRowCommitted(self, row):
-        commitButton = self.expenseTable.cellWidget(row, 7)  # Assuming the button is in column 7
-        if isinstance(commitButton, QPushButton):
-            return commitButton.text() == "Committed"
-        return False
-
-
-
-    def receiptButtonClicked(self, button):
-        if hasattr(button, "receipt_path"):  # Check if the button has a stored path
-            os.startfile(button.receipt_path)  # Open the receipt using the default viewer
+        return self.expenseModel.isCommitted(row)
+
+    def buttonCellClicked(self, index):
+        row = self.expenseFilter.sourceRow(index.row())
+        if index.column() == RECEIPT_COLUMN:
+            self.receiptButtonClicked(row)
+        elif index.column() == COMMIT_COLUMN:
+            self.commitButtonClicked(row)
+
+    def receiptButtonClicked(self, row):
+        receipt_path = self.expenseModel.value(row, 'receipt')
+        if receipt_path:  # Check if the row has a stored path
+            os.startfile(receipt_path)  # Open the receipt using the default viewer
             return
 
         options = QFileDialog.Option.ReadOnly
@@ -418,167 +273,76 @@ class ExpensePanel(QWidget):
             destinationPath = os.path.join(destinationFolder, os.path.basename(filePath))
             shutil.copy2(filePath, destinationPath)
 
-            # Change the button's appearance and store the receipt's path in the button
-            button.setText("Yes")
-            button.setStyleSheet("background-color: green")
-            button.receipt_path = destinationPath  # Store the path as an attribute of the button
-
-    def commitButtonClicked(self, button):
-        row = self.expenseTable.indexAt(button.pos()).row()
-        name_item = self.expenseTable.item(row, 1)  # Assuming the 2nd column is the name
+            # Store the receipt's path in the row, the Receipt cell turns green
+            self.expenseModel.setReceipt(row, destinationPath)
 
-        if not name_item or not name_item.text().strip():
-            # highlight the name cell with a red background if the name is empty
-            self.expenseTable.setCurrentCell(row, 1)
+    def commitButtonClicked(self, row):
+        if self.expenseModel.isCommitted(row):
             return
 
-        # If name is provided, proceed with committing
-        for col in range(self.expenseTable.columnCount()):
-            # Skip over the Receipt column
-            if col == 5:  # Assuming that column index 5 is for Receipts
-                continue
-
-            item = self.expenseTable.item(row, col)
-            if item:
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            widget = self.expenseTable.cellWidget(row, col)
-            if widget:
-                widget.setEnabled(False)
+        if not self.expenseModel.value(row, 'name').strip():
+            # select the name cell if the name is empty
+            nameIndex = self.expenseModel.index(row, NAME_COLUMN)
+            self.expenseTable.setCurrentIndex(self.expenseFilter.mapFromSource(nameIndex))
+            return
 
-        button.setEnabled(False)
-        button.setStyleSheet("background-color: green;")
-        button.setText("Committed")
+        # A click on a row of a larger selection commits the whole selection as one batch
+        selected = self.expenseFilter.selectedSourceRows(self.expenseTable.selectionModel().selection())
+        if row in selected and len(selected) > 1:
+            self.expenseModel.commitRows(selected)
+        else:
+            self.expenseModel.commitRow(row)
 
         # Update totals after committing
         self.updateTotalLabels()
 
-    def createTypeDropdown(self):
-        comboBox = QComboBox()
-        model = QStandardItemModel()
-
-        # Replace the hard-coded categories with those read from CategoryManager
-        categories = self.categoryManager.categories
-
-        for category, subcategories in categories.items():
-            category_item = QStandardItem(category)
-
-            if subcategories:  # If there are subcategories
-                category_item.setSelectable(False)
-                category_item.setEnabled(False)
-            else:  # If there are no subcategories
-                category_item.setSelectable(True)
-                category_item.setEnabled(True)
-
-            model.appendRow(category_item)
-
-            for subcategory in subcategories:
-                subcategory_item = QStandardItem(f"  {subcategory}")
-                model.appendRow(subcategory_item)
-
+    def createTypeDropdown(self, parent=None):
+        comboBox = QComboBox(parent)
         comboBox.setMaxVisibleItems(30)
-        comboBox.setModel(model)
-
+        comboBox.setModel(self.categoryModel)
         return comboBox
 
     def getTypes(self):
         return ['Type1', 'Type2', 'Type3', 'Type4']  # Example types
 
     def RowCreator(self, num_rows):
-        # print("Starting RowCreator...")  # Start of function
-
         types = self.getTypes()
 
+        rows = []
         for _ in range(num_rows):
-            # print("Inserting new row...")  # Before inserting a new row
-            rowPosition = self.expenseTable.rowCount()
-            self.expenseTable.insertRow(rowPosition)
-
-            # Select random type and set it
-            # print("Setting type...")  # Before setting type
+            # Select random type and set the name to the type selected
             selected_type = random.choice(types)
-            type_dropdown = self.createTypeDropdown()
-            type_dropdown.setCurrentText(selected_type)
-            self.expenseTable.setCellWidget(rowPosition, 0, type_dropdown)
-
-            # Set name to the type selected
-            # print("Setting name...")  # Before setting name
-            name_item = QTableWidgetItem(selected_type)
-            self.expenseTable.setItem(rowPosition, 1, name_item)
 
             # Assign a random total value between $0 and $1000 for example
-            # print("Setting total...")  # Before setting total
-            total_value = f"${random.uniform(0, 1000):.2f}"
-            total_item = QTableWidgetItem(total_value)
-            total_item.setTextAlignment(Qt.AlignmentFlag.AlignRight)
-            self.expenseTable.setItem(rowPosition, 6, total_item)
-
-            # Add the 'Commit' button
-            # print("Adding commit button...")  # Before adding commit button
-            commitButton = QPushButton("Commit")
-            commitButton.clicked.connect(lambda _, b=commitButton: self.commitButtonClicked(b))
-            self.expenseTable.setCellWidget(rowPosition, 7, commitButton)
+            rows.append({'type': selected_type, 'name': selected_type, 'total': random.randint(0, 100000)})
 
-        # print("Finished RowCreator")  # End of function
+        self.expenseModel.appendRows(rows)
 
     def testbuttonClicked(self):
         print("Testing Button adding Rando Shit to it. ")
 
     def headerDoubleClicked(self, logicalIndex):
-
-        if logicalIndex == 0:  # If the 'Type' header is double-clicked
-
-            # 1. Convert QComboBox to QTableWidgetItem
-            numRows = self.expenseTable.rowCount()
-            for row in range(numRows):
-                widget = self.expenseTable.cellWidget(row, logicalIndex)
-                if isinstance(widget, QComboBox):
-                    itemText = widget.currentText()
-                    self.expenseTable.setItem(row, logicalIndex, QTableWidgetItem(itemText))
-
-            # 2. Sort the column
-            self.expenseTable.sortItems(logicalIndex, Qt.SortOrder.AscendingOrder)
-
-            # 3. Convert QTableWidgetItem back to QComboBox
-            for row in range(numRows):
-                item = self.expenseTable.item(row, logicalIndex)
-                if item:
-                    comboBox = self.createTypeDropdown()
-                    comboBox.setCurrentText(item.text())
-                    self.expenseTable.setCellWidget(row, logicalIndex, comboBox)
-
-        elif logicalIndex == 3:  # If the 'Due Date' header is double-clicked
-            self.expenseTable.sortItems(logicalIndex, Qt.SortOrder.AscendingOrder)
+        # Sorting permutes the ledger rows by typed keys, the view only repaints
+        order = self.expenseModel.sortByColumn(logicalIndex)
+        self.expenseTable.horizontalHeader().setSortIndicator(logicalIndex, order)
 
     def getCommittedExpenseData(self):
         data = {}
-        for row in range(self.expenseTable.rowCount()):
-            commitButton = self.expenseTable.cellWidget(row, 7)  # Assuming Commit button is in column 7
-            if not commitButton.isEnabled():  # Check if the expense is committed
-                type_widget = self.expenseTable.cellWidget(row, 0)  # Assuming Type dropdown is in column 0
-                expense_type = type_widget.currentText()
-                amount_item = self.expenseTable.item(row, 6)  # Assuming Total is in column 6
-                amount = float(amount_item.text().replace("$", "").strip())
-                if expense_type in data:
-                    data[expense_type] += amount
-                else:
-                    data[expense_type] = amount
+        for category, cents in self.totals.categoryCommitted.items():
+            if cents:
+                text = self.ledger.categories.text(category)
+                data[text] = data.get(text, 0) + cents / 100
         return data
 
     def getExpensesForType(self, expense_type):
         expenses = []
-        for row in range(self.expenseTable.rowCount()):
-            commitButton = self.expenseTable.cellWidget(row, 7)  # Assuming Commit button is in column 7
-            if not commitButton.isEnabled():  # Check if the expense is committed
-                type_widget = self.expenseTable.cellWidget(row, 0)  # Assuming Type dropdown is in column 0
-                if type_widget.currentText() == expense_type:
-                    expense_name = self.expenseTable.item(row, 1).text()  # Assuming Name is in column 1
-                    expense_date = self.expenseTable.item(row, 3).text()  # Assuming Due Date is in column 3
-                    amount_item = self.expenseTable.item(row, 6).text()  # Assuming Total is in column 6
+        for row in range(self.expenseModel.rowCount()):
+            if self.expenseModel.isCommitted(row):  # Check if the expense is committed
+                if self.expenseModel.value(row, 'type') == expense_type:
                     expenses.append({
-                        "Name": expense_name,
-                        "Date": expense_date,
-                        "Amount": float(amount_item.replace("$", "").strip())
+                        "Name": self.expenseModel.value(row, 'name'),
+                        "Date": QDate.fromJulianDay(self.expenseModel.value(row, 'due')).toString("dd/MM/yyyy"),
+                        "Amount": self.expenseModel.value(row, 'total') / 100
                     })
 
         # Write expenses to a file
@@ -586,23 +350,15 @@ class ExpensePanel(QWidget):
             json.dump(expenses, f)
 
     def select_all_rows(self):
-        row_count = self.expenseTable.rowCount()
-        if row_count > 0:
-            selection_range = QTableWidgetSelectionRange(0, 0, row_count - 1, self.expenseTable.columnCount() - 1)
-            self.expenseTable.setRangeSelected(selection_range, True)
+        self.expenseTable.selectAll()
 
     def getDetailedExpensesForType(self, expense_type):
         detailed_expenses = []
-        for row in range(self.expenseTable.rowCount()):
-            type_widget = self.expenseTable.cellWidget(row, 0)  # Assuming Type dropdown is in column 0
-            if type_widget.currentText() == expense_type:
-                name_item = self.expenseTable.item(row, 1)  # Assuming Name is in column 1
-                date_item = self.expenseTable.item(row, 3)  # Assuming Date is in column 3
-                amount_item = self.expenseTable.item(row, 6)  # Assuming Total is in column 6
-
+        for row in range(self.expenseModel.rowCount()):
+            if self.expenseModel.value(row, 'type') == expense_type:
                 detailed_expenses.append({
-                    "Name": name_item.text(),
-                    "Date": date_item.text(),
-                    "Amount": float(amount_item.text().replace("$", "").strip())
+                    "Name": self.expenseModel.value(row, 'name'),
+                    "Date": QDate.fromJulianDay(self.expenseModel.value(row, 'due')).toString("dd/MM/yyyy"),
+                    "Amount": self.expenseModel.value(row, 'total') / 100
                 })
         return detailed_expenses
@@ -0,0 +1,25 @@
+from MonkeyMainFolder.Ledger.LedgerTableModel import LedgerTableModel
+
+# Constants for Column Indices
+TYPE_COLUMN = 0
+NAME_COLUMN = 1
+SUMMARY_COLUMN = 2
+DUE_DATE_COLUMN = 3
+AUDIT_DATE_COLUMN = 4
+RECEIPT_COLUMN = 5
+TOTAL_COLUMN = 6
+COMMIT_COLUMN = 7
+
+HEADERS = ['Type', 'Name', 'Summary', 'Due Date', 'Audit Date', 'Receipt', 'Total', 'Commit']
+
+# Ledger key shown in each column, see EXPENSE_SCHEMA
+COLUMN_KEYS = ['type', 'name', 'summary', 'due', 'audit', 'receipt', 'total', 'committed']
+
+
+class ExpenseTableModel(LedgerTableModel):
+    """Expense sheet on top of an EXPENSE_SCHEMA ledger."""
+    HEADERS = HEADERS
+    COLUMN_KEYS = COLUMN_KEYS
+
+    def setReceipt(self, row, path):
+        self.setValue(row, 'receipt', path)
@@ -0,0 +1,317 @@
+import csv
+import difflib
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from MonkeyMainFolder.FileIO.SheetLoader import centsColumn, dayColumn, internColumn, normalizedColumn, textColumn
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+STATEMENT_FILE_FILTER = "Bank Statements (*.csv *.ofx *.qfx *.qif);;All Files (*)"
+
+# Columns of a read statement: day number, cents (money in is positive), payee, memo, account,
+# and the statement's own category for the row if it has one
+STATEMENT_COLUMNS = ['day', 'cents', 'name', 'memo', 'account', 'category']
+
+# CSV statements are read this many rows at a time
+CSV_CHUNK_ROWS = 50000
+# Lines searched for the CSV header row, banks put account details above it
+HEADER_SEARCH_LINES = 30
+# A payee at least this close to a category name gets that category
+FUZZY_CUTOFF = 0.85
+
+# Casefolded CSV header -> statement field
+CSV_HEADERS = {
+    "date": 'date', "transaction date": 'date', "posted date": 'date', "posting date": 'date',
+    "value date": 'date', "booking date": 'date',
+    "description": 'name', "transaction description": 'name', "payee": 'name', "merchant": 'name',
+    "name": 'name', "details": 'name',
+    "memo": 'memo', "notes": 'memo', "reference": 'memo',
+    "amount": 'amount', "transaction amount": 'amount',
+    "debit": 'debit', "withdrawal": 'debit', "withdrawals": 'debit', "money out": 'debit', "paid out": 'debit',
+    "credit": 'credit', "deposit": 'credit', "deposits": 'credit', "money in": 'credit', "paid in": 'credit',
+    "account": 'account', "account name": 'account', "account number": 'account',
+    "category": 'category',
+}
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+
+
+def statementFrame(days, cents, names, memos, accounts, categories):
+    return pd.DataFrame({
+        'day': days,
+        'cents': cents,
+        'name': textColumn(names).values,
+        'memo': textColumn(memos).values,
+        'account': textColumn(accounts).values,
+        'category': textColumn(categories).values,
+    }, columns=STATEMENT_COLUMNS)
+
+
+def emptyStatement():
+    return statementFrame(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64),
+                          *[pd.Series([], dtype=object)] * 4)
+
+
+def emptyColumn(frame):
+    return pd.Series("", index=frame.index, dtype=object)
+
+
+def readCsvStatement(path, problems):
+    """Read a CSV statement in chunks, the header row names the columns (Date, Description, Amount or
+    Debit/Credit, ...). Dates are read day first like the sheets show them, ISO dates work either way."""
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as file:
+        for number, row in enumerate(csv.reader(file)):
+            fields = [CSV_HEADERS.get(cell.strip().casefold()) for cell in row]
+            if 'date' in fields and {'amount', 'debit', 'credit'} & set(fields):
+                header = number
+                break
+            if number >= HEADER_SEARCH_LINES:
+                raise ValueError(f"{os.path.basename(path)} has no Date and Amount columns")
+        else:
+            raise ValueError(f"{os.path.basename(path)} has no Date and Amount columns")
+
+    positions = {}
+    for position, field in enumerate(fields):
+        positions.setdefault(field, position)
+    frames = []
+    account = os.path.splitext(os.path.basename(path))[0]
+    for chunk in pd.read_csv(path, skiprows=header, header=None, dtype=str, keep_default_na=False,
+                             encoding='utf-8-sig', chunksize=CSV_CHUNK_ROWS):
+        if not frames:
+            chunk = chunk.iloc[1:]
+
+        def column(field):
+            return chunk[positions[field]] if field in positions else emptyColumn(chunk)
+
+        if 'amount' in positions:
+            cents = centsColumn(column('amount'), problems, "amount")
+        else:
+            # Split columns, some banks write money out as negative numbers and some as positive
+            cents = (np.abs(centsColumn(column('credit'), problems, "credit"))
+                     - np.abs(centsColumn(column('debit'), problems, "debit")))
+        accounts = column('account') if 'account' in positions else pd.Series(account, index=chunk.index)
+        frames.append(statementFrame(dayColumn(column('date'), problems, "date", dayfirst=True), cents,
+                                     column('name'), column('memo'), accounts, column('category')))
+    return pd.concat(frames, ignore_index=True) if frames else emptyStatement()
+
+
+def readOfxStatement(path, problems):
+    """Read an OFX/QFX statement line by line, both the SGML (1.x) and the XML (2.x) flavours."""
+    transactions = []
+    account = ""
+    current = None
+    with open(path, encoding='utf-8', errors='replace') as file:
+        for line in file:
+            for closing, tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if closing and current is not None:
+                        transactions.append(current)
+                        current = None
+                    elif not closing:
+                        current = {'ACCOUNT': account}
+                elif closing:
+                    continue
+                elif tag == 'ACCTID':
+                    account = value.strip()
+                elif current is not None:
+                    current[tag] = value.strip()
+
+    frame = pd.DataFrame(transactions, columns=['ACCOUNT', 'DTPOSTED', 'TRNAMT', 'NAME', 'PAYEE', 'MEMO'])
+    frame = frame.fillna("")
+    # DTPOSTED is YYYYMMDD followed by an optional time and time zone
+    posted = frame['DTPOSTED'].str[:8]
+    dates = posted.str[:4] + "-" + posted.str[4:6] + "-" + posted.str[6:8]
+    names = frame['NAME'].where(frame['NAME'] != "", frame['PAYEE'])
+    return statementFrame(dayColumn(dates, problems, "date"), centsColumn(frame['TRNAMT'], problems, "amount"),
+                          names, frame['MEMO'], frame['ACCOUNT'], emptyColumn(frame))
+
+
+def readQifStatement(path, problems):
+    """Read a QIF statement line by line: D date, T amount, P payee, M memo, L category, ^ ends a record.
+
+    QIF dates are month first as Quicken writes them (1/ 5'24 is January 5th).
+    """
+    transactions = []
+    account = os.path.splitext(os.path.basename(path))[0]
+    current = {}
+    inAccount = False
+    with open(path, encoding='utf-8', errors='replace') as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            code, value = line[0], line[1:].strip()
+            if code == '!':
+                inAccount = value.casefold() == 'account'
+            elif code == '^':
+                if inAccount:
+                    inAccount = False
+                elif current:
+                    current['account'] = account
+                    transactions.append(current)
+                current = {}
+            elif inAccount:
+                if code == 'N':
+                    account = value
+            else:
+                current[code] = value
+
+    frame = pd.DataFrame(transactions, columns=['account', 'D', 'T', 'U', 'P', 'M', 'L']).fillna("")
+    # Two digit years are 19xx after a slash and 20xx after an apostrophe, written out as ISO dates
+    parts = frame['D'].str.replace(" ", "").str.extract(r"^(\d+)/(\d+)(['/])(\d+)$").fillna("")
+    years = parts[3].where(parts[3].str.len() > 2, np.where(parts[2] == "'", "20", "19") + parts[3].str.zfill(2))
+    dates = years + "-" + parts[0].str.zfill(2) + "-" + parts[1].str.zfill(2)
+    amounts = frame['T'].where(frame['T'] != "", frame['U'])
+    return statementFrame(dayColumn(dates, problems, "date"), centsColumn(amounts, problems, "amount"),
+                          frame['P'], frame['M'], frame['account'], frame['L'])
+
+
+def readStatement(path):
+    """Read one bank statement into a statement frame, returns (frame, problems)."""
+    start = time.perf_counter()
+    problems = []
+    extension = os.path.splitext(path)[1].lower()
+    if extension in [".ofx", ".qfx"]:
+        frame = readOfxStatement(path, problems)
+    elif extension == ".qif":
+        frame = readQifStatement(path, problems)
+    else:
+        frame = readCsvStatement(path, problems)
+    recordTiming("import.statement", len(frame), time.perf_counter() - start)
+    name = os.path.basename(path)
+    return frame, [f"{name}: {problem}" for problem in problems]
+
+
+def nameHashes(texts):
+    """Hash of each payee with case and spacing ignored."""
+    return pd.util.hash_array(normalizedColumn(pd.Series(texts, dtype=object)).fillna("").values)
+
+
+def transactionKeys(days, cents, hashes):
+    """One 64 bit key per (date, amount, payee), the key duplicates are found by."""
+    frame = pd.DataFrame({'day': np.asarray(days, dtype=np.int64), 'cents': np.asarray(cents, dtype=np.int64),
+                          'name': hashes})
+    return pd.util.hash_pandas_object(frame, index=False).values
+
+
+def ledgerKeys(ledger, dayKey, amountKey):
+    # Payees are hashed once per distinct string, rows pick theirs up by id
+    hashes = nameHashes(ledger.strings.strings)
+    return transactionKeys(ledger.column(dayKey), ledger.column(amountKey), hashes[ledger.column('name')])
+
+
+def newTransactions(keys, existing):
+    """Mask of the keys to import. A key the sheet has k times skips its first k occurrences, so two equal
+    purchases on one day are both kept while a statement imported twice adds nothing."""
+    uniques, counts = np.unique(existing, return_counts=True)
+    positions = np.minimum(np.searchsorted(uniques, keys), max(len(uniques) - 1, 0))
+    seen = np.where(uniques[positions] == keys, counts[positions], 0) if len(uniques) else np.zeros(len(keys))
+    occurrence = pd.Series(keys).groupby(keys).cumcount().values
+    return occurrence >= seen
+
+
+class StatementCategorizer:
+    """Picks an expense category for imported payees.
+
+    In order: the statement's own category when it names one of ours, the user's category rules, the
+    category last used for the same payee in the sheet, a payee named like a category or with a category
+    name as one of its words, then the closest category name.
+    Each distinct payee is looked up once and remembered.
+    """
+
+    def __init__(self, categories, ledger, rules=None):
+        # categories is CategoryManager.dropdownLookup(), normalized name -> dropdown text
+        self.categories = categories
+        self.rules = rules
+        self.names = list(categories)
+        self.known = self._history(ledger)
+
+    def _history(self, ledger):
+        texts = pd.Series(ledger.categories.strings, dtype=object)
+        matched = normalizedColumn(texts).map(self.categories).fillna("").values
+        types = matched[ledger.column('type')]
+        payees = normalizedColumn(pd.Series(ledger.strings.strings, dtype=object)).values[ledger.column('name')]
+        used = types != ""
+        # Later rows win, the last category given to a payee is the one it keeps
+        history = pd.Series(types[used], index=payees[used])
+        return history[~history.index.duplicated(keep='last')].to_dict()
+
+    def lookup(self, payee):
+        if payee not in self.known:
+            self.known[payee] = self._match(payee)
+        return self.known[payee]
+
+    def _match(self, payee):
+        category = self.categories.get(payee)
+        if category is None:
+            # "Shell Gas" goes to Gas
+            category = next((self.categories[word] for word in payee.split() if word in self.categories), None)
+        if category is None:
+            close = difflib.get_close_matches(payee, self.names, n=1, cutoff=FUZZY_CUTOFF)
+            category = self.categories[close[0]] if close else ""
+        return category
+
+    def categorize(self, names, hints, amounts):
+        """Dropdown text for every row, "" where nothing fits. amounts are positive cents."""
+        codes, payees = pd.factorize(normalizedColumn(pd.Series(names, dtype=object)))
+        found = np.array([self.lookup(payee) for payee in payees] + [""], dtype=object)[codes]
+        if self.rules is not None:
+            ruled = self.rules.categorize(names, amounts)
+            found = np.where(pd.isna(ruled), found, ruled)
+        hinted = normalizedColumn(pd.Series(hints, dtype=object)).map(self.categories).values
+        return np.where(pd.isna(hinted), found, hinted)
+
+
+def importStatements(statements, sheets, categorizer):
+    """Turn read statements into encoded rows for the sheets: money out becomes expenses, money in income.
+
+    Rows already in a sheet (same date, amount and payee) are skipped, statements that overlap each other
+    are checked against the ones before them. Strings are interned into the sheet ledgers, so this runs on
+    the GUI thread. Returns ({sheet name: (columns, count)}, skipped).
+    """
+    start = time.perf_counter()
+    amountKeys = {'expenses': ('due', 'total'), 'income': ('received', 'amount')}
+    existing = {name: ledgerKeys(sheets[name], *keys) for name, keys in amountKeys.items()}
+    parts = {name: [] for name in amountKeys}
+    skipped = 0
+
+    for frame in statements:
+        for name, rows in [('expenses', frame[frame['cents'] < 0]), ('income', frame[frame['cents'] > 0])]:
+            rows = rows.assign(cents=np.abs(rows['cents'].values))
+            keys = transactionKeys(rows['day'].values, rows['cents'].values, nameHashes(rows['name'].values))
+            fresh = newTransactions(keys, existing[name])
+            skipped += int((~fresh).sum())
+            existing[name] = np.concatenate([existing[name], keys[fresh]])
+            parts[name].append(rows[fresh])
+
+    result = {}
+    for name, frames in parts.items():
+        rows = pd.concat(frames, ignore_index=True) if frames else emptyStatement()
+        ledger = sheets[name]
+        count = len(rows)
+        if name == 'expenses':
+            types = categorizer.categorize(rows['name'], rows['category'], rows['cents'].values)
+            columns = {
+                'type': internColumn(ledger.categories, types),
+                'name': internColumn(ledger.strings, rows['name']),
+                # The account tells cards apart when the bank gives no memo
+                'summary': internColumn(ledger.strings, rows['memo'].where(rows['memo'] != "", rows['account'])),
+                'due': rows['day'].values.astype(np.int32),
+                'total': rows['cents'].values.astype(np.int64),
+            }
+        else:
+            columns = {
+                'name': internColumn(ledger.strings, rows['name']),
+                'received': rows['day'].values.astype(np.int32),
+                'amount': rows['cents'].values.astype(np.int64),
+            }
+        columns['flags'] = np.zeros(count, dtype=np.uint8)
+        result[name] = (columns, count)
+    total = sum(count for _, count in result.values())
+    recordTiming("import.match", total + skipped, time.perf_counter() - start)
+    return result, skipped
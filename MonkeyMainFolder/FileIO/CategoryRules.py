@@ -0,0 +1,185 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from MonkeyMainFolder.FileIO.SheetLoader import normalizedColumn
+from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import normalizeName
+
+# How a rule looks at the name of a row
+CONTAINS = "Contains"
+PAYEE = "Payee"  # the whole name, case and spacing ignored
+REGEX = "Regex"
+ANY_NAME = "Any name"  # only the amount range decides
+MATCH_KINDS = [CONTAINS, PAYEE, REGEX, ANY_NAME]
+
+
+def lookahead(pattern, number):
+    """One rule's alternative in the combined matcher, group r<number> tells which rule matched."""
+    return f"(?=.*?(?P<r{number}>{pattern}))"
+
+
+class CategoryRule:
+    """name (contains / is / matches) and an optional amount range -> category, amounts in cents."""
+
+    def __init__(self, category, match=CONTAINS, text="", low=None, high=None):
+        self.category = category
+        self.match = match
+        self.text = text
+        self.low = low
+        self.high = high
+
+    @staticmethod
+    def fromJson(data):
+        return CategoryRule(data.get('category', ""), data.get('match', CONTAINS), data.get('text', ""),
+                            data.get('low'), data.get('high'))
+
+    def toJson(self):
+        return {'category': self.category, 'match': self.match, 'text': self.text, 'low': self.low, 'high': self.high}
+
+    def hasAmount(self):
+        return self.low is not None or self.high is not None
+
+    def namePattern(self):
+        """Regex source over normalized names, None when the name doesn't matter. Raises re.error."""
+        if self.match == ANY_NAME:
+            return None
+        if self.match == REGEX:
+            # Checked inside the lookahead it runs in, so inline global flags and numbered backreferences fail here
+            re.compile(lookahead(self.text, 0))
+            return self.text
+        text = re.escape(normalizeName(self.text))
+        return text if self.match == CONTAINS else f"^{text}$"
+
+    def amountMask(self, amounts):
+        mask = np.ones(len(amounts), dtype=bool)
+        if self.low is not None:
+            mask &= amounts >= self.low
+        if self.high is not None:
+            mask &= amounts <= self.high
+        return mask
+
+
+class RuleMatcher:
+    """Every rule of a RuleManager compiled into one matcher, the first matching rule wins.
+
+    The name patterns become lookahead alternatives of one regex tried in rule order at the start of
+    the name, so the alternative that matches is the first matching rule and each distinct name costs one
+    search, remembered for the next batch. Amount ranges are checked per row with numpy.
+    """
+
+    def __init__(self, rules, categories):
+        # categories is CategoryManager.dropdownLookup(), rules naming a category that is gone are left out
+        self.rules = [rule for rule in rules if normalizeName(rule.category) in categories]
+        self.texts = np.array([categories[normalizeName(rule.category)] for rule in self.rules] + [None],
+                              dtype=object)
+        self.patterns = {}
+        alternatives = []
+        for number, rule in enumerate(self.rules):
+            try:
+                pattern = rule.namePattern()
+            except re.error:
+                continue
+            if pattern is not None:
+                self.patterns[number] = re.compile(pattern, re.IGNORECASE)
+                alternatives.append(lookahead(pattern, number))
+        try:
+            self.combined = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        except re.error:
+            # Rules that compile alone can still clash together (a user group named like r1), try them one by one
+            self.combined = None
+        self.amountOnly = [number for number, rule in enumerate(self.rules) if rule.match == ANY_NAME]
+        self.first = {}  # normalized name -> first rule whose name pattern matches it, -1 for none
+        self.matching = {}  # normalized name -> every rule whose name pattern matches it
+
+    def firstRule(self, name):
+        number = self.first.get(name)
+        if number is None:
+            if self.combined is not None:
+                found = self.combined.match(name)
+                number = int(found.lastgroup[1:]) if found is not None else -1
+            else:
+                number = next((number for number, pattern in self.patterns.items() if pattern.search(name)), -1)
+            self.first[name] = number
+        return number
+
+    def matchingRules(self, name):
+        numbers = self.matching.get(name)
+        if numbers is None:
+            numbers = [number for number, pattern in self.patterns.items() if pattern.search(name)]
+            self.matching[name] = numbers
+        return numbers
+
+    def categorize(self, names, amounts):
+        """Category dropdown text of every row, None where no rule matches."""
+        amounts = np.asarray(amounts, dtype=np.int64)
+        # Names repeat, each distinct one is normalized and looked up once
+        codes, distinct = pd.factorize(pd.Series(names, dtype=object))
+        distinct = normalizedColumn(pd.Series(distinct, dtype=object)).values
+        best = np.array([self.firstRule(name) for name in distinct] + [-1], dtype=np.int64)[codes]
+
+        # A name rule with an amount range only holds for some rows of a name, the rows outside it try the
+        # next rule matching their name, one vectorized step per rule tried
+        bounded = np.array([rule.hasAmount() for rule in self.rules] + [False])
+        pending = np.flatnonzero(bounded[best])
+        if len(pending):
+            involved, positions = np.unique(codes[pending], return_inverse=True)
+            lists = [self.matchingRules(distinct[code]) for code in involved.tolist()]
+            candidates = np.full((len(lists), max(map(len, lists)) + 1), -1, dtype=np.int64)
+            for position, numbers in enumerate(lists):
+                candidates[position, :len(numbers)] = numbers
+            rank = np.zeros(len(pending), dtype=np.int64)
+            while len(pending):
+                numbers = best[pending]
+                ok = numbers < 0
+                for number in np.unique(numbers[~ok]).tolist():
+                    chosen = numbers == number
+                    ok[chosen] = self.rules[number].amountMask(amounts[pending[chosen]])
+                pending, positions, rank = pending[~ok], positions[~ok], rank[~ok] + 1
+                best[pending] = candidates[positions, rank]
+
+        best[best < 0] = len(self.rules)
+        for number in self.amountOnly:
+            best[(number < best) & self.rules[number].amountMask(amounts)] = number
+        return self.texts[best]
+
+
+class RuleManager:
+    """The user's categorization rules, kept in a JSON file in priority order."""
+
+    def __init__(self):
+        self.filepath = None
+        self.rules = []
+        self._matcher = None
+
+    def initialize(self, filepath):
+        self.filepath = filepath
+        if os.path.exists(self.filepath):
+            self.loadRules()
+
+    def loadRules(self):
+        try:
+            with open(self.filepath, 'r') as f:
+                self.setRules([CategoryRule.fromJson(data) for data in json.load(f)])
+        except Exception as e:
+            print("Could not load the category rules: ", e)
+
+    def saveRules(self):
+        try:
+            with open(self.filepath, 'w') as f:
+                json.dump([rule.toJson() for rule in self.rules], f, indent=4)
+        except Exception as e:
+            print("An error occurred while saving: ", e)
+
+    def setRules(self, rules):
+        self.rules = list(rules)
+        self._matcher = None
+
+    def matcher(self, categories):
+        """Compiled matcher for the current rules and categories, kept (with its cache) until either changes."""
+        if self._matcher is None or self._matcher.categories != categories:
+            self._matcher = RuleMatcher(self.rules, categories)
+            self._matcher.categories = dict(categories)
+        return self._matcher
@@ -0,0 +1,125 @@
+import threading
+
+from PyQt6.QtCore import QRunnable, QThreadPool
+
+from MonkeyMainFolder.FileIO.BankImport import readStatement
+from MonkeyMainFolder.FileIO.SheetLoader import loadSheets
+from MonkeyMainFolder.FileIO.SheetWriter import saveSheets
+
+_filePool = None
+
+
+def filePool():
+    """One file job at a time, queued jobs run in the order they were started (e.g. save before open)."""
+    global _filePool
+    if _filePool is None:
+        _filePool = QThreadPool()
+        _filePool.setMaxThreadCount(1)
+    return _filePool
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def waitForFileJobs():
+    if _filePool is not None:
+        _filePool.waitForDone()
+
+
+class FileJob(QRunnable):
+    """Runs work(job) on the file thread pool and reports back through the SignalBroker.
+
+    work gets the job itself so it can call reportProgress, which also stops the job once cancel() was called.
+    """
+
+    def __init__(self, broker, description, work):
+        super().__init__()
+        # Python keeps the job alive, Qt must not delete it under the menu functions
+        self.setAutoDelete(False)
+        self.broker = broker
+        self.description = description
+        self.work = work
+        self.cancelEvent = threading.Event()
+
+    def start(self):
+        filePool().start(self)
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+    def isCancelled(self):
+        return self.cancelEvent.is_set()
+
+    def checkCancelled(self):
+        if self.cancelEvent.is_set():
+            raise JobCancelled()
+
+    def reportProgress(self, done, total):
+        self.checkCancelled()
+        self._emit(self.broker.file_job_progress, done, total)
+
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(self, *args)
+        except RuntimeError:
+            # The window and its broker were closed while the job was running
+            pass
+
+    def run(self):
+        try:
+            result = self.work(self)
+            self.checkCancelled()
+        except JobCancelled:
+            self._emit(self.broker.file_job_cancelled)
+        except Exception as e:
+            self._emit(self.broker.file_job_failed, str(e))
+        else:
+            self._emit(self.broker.file_job_finished, result)
+
+
+def saveJob(broker, ledgers, filePath):
+    """Save a snapshot of {sheet name: ledger}, edits made while the job runs are not part of this save."""
+    snapshots = {name: ledger.snapshot() for name, ledger in ledgers.items()}
+
+    def work(job):
+        return saveSheets(snapshots, filePath, progress=job.reportProgress)
+
+    return FileJob(broker, f"Saving {filePath}", work)
+
+
+def loadJob(broker, filePath, categories, rules=None):
+    """Read every sheet of a file into detached ledgers, the GUI thread swaps them in when done.
+
+    categories is CategoryManager.dropdownLookup(), rules the RuleMatcher for untyped expenses.
+    The result is ({sheet name: Ledger}, non_matching, problems).
+    """
+    categories = dict(categories)
+
+    def work(job):
+        job.reportProgress(0, 3)
+        result = loadSheets(filePath, categories, progress=job.reportProgress, rules=rules)
+        job.reportProgress(3, 3)
+        return result
+
+    return FileJob(broker, f"Opening {filePath}", work)
+
+
+def importJob(broker, filePaths):
+    """Read bank statements on the file thread, the GUI thread matches them against the sheets.
+
+    The result is ([statement frame], problems).
+    """
+    filePaths = list(filePaths)
+
+    def work(job):
+        statements, problems = [], []
+        for done, filePath in enumerate(filePaths):
+            job.reportProgress(done, len(filePaths))
+            frame, fileProblems = readStatement(filePath)
+            statements.append(frame)
+            problems.extend(fileProblems)
+        job.reportProgress(len(filePaths), len(filePaths))
+        return statements, problems
+
+    return FileJob(broker, f"Importing {len(filePaths)} statements", work)
@@ -0,0 +1,293 @@
+import contextlib
+import json
+import os
+import re
+
+from PyQt6.QtCore import QTimer
+
+from MonkeyMainFolder.FileIO.FileJobs import FileJob
+from MonkeyMainFolder.FileIO.MonkeyFormat import readMonkey, writeMonkey
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener
+from MonkeyMainFolder.Settings import ROOT_PATH
+
+AUTOSAVE_PATH = ROOT_PATH / "autosave"
+
+# A new base snapshot is written after this many journal records
+COMPACT_EVERY = 2000
+# Batches bigger than this (file loads, sorting a big sheet) are not journaled row by row,
+# the journal ends with a gap record and a new base snapshot is taken instead
+MAX_RECORD_ROWS = 20000
+
+BASE_PATTERN = re.compile(r"base\.(\d+)\.monkey$")
+JOURNAL_PATTERN = re.compile(r"journal\.(\d+)\.jsonl$")
+
+
+def basePath(generation):
+    return AUTOSAVE_PATH / f"base.{generation}.monkey"
+
+
+def journalPath(generation):
+    return AUTOSAVE_PATH / f"journal.{generation}.jsonl"
+
+
+def _generations(pattern):
+    if not AUTOSAVE_PATH.exists():
+        return []
+    found = [pattern.match(name) for name in os.listdir(AUTOSAVE_PATH)]
+    return sorted(int(match.group(1)) for match in found if match)
+
+
+def _readRecords(generation):
+    records = []
+    try:
+        with open(journalPath(generation), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid write, everything before it is good
+                    break
+    except OSError:
+        pass
+    return records
+
+
+def applyRecord(sheets, record):
+    ledger = sheets[record["sheet"]]
+    op = record["op"]
+    if op == "append":
+        ledger.appendRows(record["rows"])
+    elif op == "set":
+        ledger.set(record["row"], record["key"], record["value"])
+    elif op == "setMany":
+        ledger.setValues(record["rows"], record["key"], record["values"])
+    elif op == "commit":
+        ledger.setCommitted(record["rows"], record["committed"])
+    elif op == "remove":
+        ledger.removeRows(record["rows"])
+    elif op == "permute":
+        ledger.permute(record["order"])
+    elif op == "rename":
+        ledger.renameCategory(record["old"], record["new"])
+    elif op == "clear":
+        ledger.clear()
+
+
+def findRecovery(schemas):
+    """Rebuild the sheets of a session that ended without saving.
+
+    Returns (sheets, filePath) or None when the last session left nothing unsaved behind.
+    The newest complete base is loaded and every journal from its generation on is replayed,
+    stopping at the first gap since nothing after it can be applied safely.
+    """
+    bases = _generations(BASE_PATTERN)
+    if not bases:
+        return None
+    generation = bases[-1]
+
+    replay = []
+    unsaved = False
+    filePath = None
+    for journal in [g for g in _generations(JOURNAL_PATTERN) if g >= generation]:
+        records = _readRecords(journal)
+        if records and records[0]["op"] == "session":
+            filePath = records[0]["file"]
+            unsaved = unsaved or not records[0]["saved"]
+            records = records[1:]
+        gap = next((i for i, record in enumerate(records) if record["op"] == "gap"), None)
+        if gap is not None:
+            replay.extend(records[:gap])
+            unsaved = True
+            break
+        replay.extend(records)
+
+    if not replay and not unsaved:
+        return None
+
+    sheets = readMonkey(str(basePath(generation)), schemas)
+    for record in replay:
+        applyRecord(sheets, record)
+    return sheets, filePath
+
+
+class Journal(LedgerListener):
+    """Write-ahead journal of every change to the open sheets, so an unsaved session survives a crash.
+
+    Each change is appended to autosave/journal.<generation>.jsonl as it happens, committing rows also
+    fsyncs it. Every COMPACT_EVERY records the sheets are snapshotted into autosave/base.<generation>.monkey
+    on the file worker thread and a new journal generation starts, so autosaving costs O(changes).
+    """
+
+    def __init__(self, broker, ledgers, onChange=None):
+        self.broker = broker
+        self.ledgers = dict(ledgers)
+        self.sheetNames = {id(ledger): name for name, ledger in self.ledgers.items()}
+        self.onChange = onChange
+        self.generation = max(_generations(BASE_PATTERN) + _generations(JOURNAL_PATTERN) + [0])
+        self.file = None
+        self.filePath = None
+        self.records = 0
+        self.compactJob = None
+        self.compactPending = False
+        self.pausedDepth = 0
+        self.skipped = False
+        for ledger in self.ledgers.values():
+            ledger.addListener(self)
+
+    def close(self):
+        self.compactPending = False
+        for ledger in self.ledgers.values():
+            ledger.removeListener(self)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Changes inside the block are not journaled one by one (swapping in an opened file), one gap record
+        stands for all of them. markSaved afterwards takes the new base."""
+        self.pausedDepth += 1
+        try:
+            yield
+        finally:
+            self.pausedDepth -= 1
+            if not self.pausedDepth and self.skipped:
+                self.skipped = False
+                self._write({"op": "gap"})
+
+    # Writing
+
+    def _skipping(self):
+        if self.pausedDepth:
+            self.skipped = True
+        return self.file is None or self.pausedDepth > 0
+
+    def _write(self, record, sync=False):
+        if self._skipping():
+            return
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+        self.records += 1
+        if self.onChange is not None and record["op"] not in ["session", "gap"]:
+            self.onChange()
+        if self.records >= COMPACT_EVERY:
+            # Some hooks run before the ledger changes (rowsRemoving), snapshot once the change is in
+            self._compactLater()
+
+    def _change(self, ledger, record, sync=False):
+        record["sheet"] = self.sheetNames[id(ledger)]
+        self._write(record, sync)
+
+    def _gap(self):
+        # The journal can't describe this change cheaply, snapshot everything instead
+        if self._skipping():
+            return
+        self._write({"op": "gap"})
+        self.compact()
+
+    def _compactLater(self):
+        if not self.compactPending:
+            self.compactPending = True
+            QTimer.singleShot(0, self._pendingCompact)
+
+    def _pendingCompact(self):
+        if self.compactPending and self.file is not None:
+            self.compact()
+
+    def compact(self, saved=False):
+        """Start a new generation: snapshot the sheets now, write the base in the background."""
+        self.compactPending = False
+        self.generation += 1
+        generation = self.generation
+        snapshots = {name: ledger.snapshot() for name, ledger in self.ledgers.items()}
+
+        if self.file is not None:
+            os.fsync(self.file.fileno())
+            self.file.close()
+        AUTOSAVE_PATH.mkdir(exist_ok=True)
+        self.file = open(journalPath(generation), 'w', encoding='utf-8')
+        self.records = 0
+        self._write({"op": "session", "file": self.filePath, "saved": saved})
+
+        def work(job):
+            writeMonkey(str(basePath(generation)), snapshots, timed=False)
+            # Older generations are only needed until this base is safely on disk
+            for old in _generations(BASE_PATTERN) + _generations(JOURNAL_PATTERN):
+                if old < generation:
+                    for path in [basePath(old), journalPath(old)]:
+                        if path.exists():
+                            os.remove(path)
+            return generation
+
+        self.compactJob = FileJob(self.broker, "Autosaving", work)
+        self.compactJob.start()
+
+    def markSaved(self, filePath, saved=True):
+        """The sheets now match filePath on disk, nothing before this point needs recovering.
+
+        saved is False when the sheets were edited again while the save was running.
+        """
+        self.filePath = filePath
+        self.compact(saved=saved)
+
+    def discard(self):
+        """Forget the session, used when the user starts over without saving."""
+        self.filePath = None
+        self.compact(saved=True)
+
+    # LedgerListener hooks
+
+    def rowsAppended(self, ledger, first, count):
+        if self._skipping():
+            return
+        if count > MAX_RECORD_ROWS:
+            self._gap()
+            return
+        rows = [ledger.rowValues(row) for row in range(first, first + count)]
+        self._change(ledger, {"op": "append", "rows": rows})
+
+    def valueChanged(self, ledger, row, key, old, new):
+        self._change(ledger, {"op": "set", "row": row, "key": key, "value": ledger.get(row, key)})
+
+    def valuesChanged(self, ledger, rows, key, old, new):
+        if self._skipping():
+            return
+        if len(rows) > MAX_RECORD_ROWS:
+            self._gap()
+            return
+        values = [ledger.get(row, key) for row in rows.tolist()]
+        self._change(ledger, {"op": "setMany", "rows": rows.tolist(), "key": key, "values": values})
+
+    def committedChanged(self, ledger, rows, committed):
+        if self._skipping():
+            return
+        if len(rows) > MAX_RECORD_ROWS:
+            self._gap()
+            return
+        self._change(ledger, {"op": "commit", "rows": rows.tolist(), "committed": committed}, sync=True)
+
+    def rowsRemoving(self, ledger, rows):
+        if self._skipping():
+            return
+        if len(rows) > MAX_RECORD_ROWS:
+            # The rows are still there, snapshot once they are gone
+            self._write({"op": "gap"})
+            self._compactLater()
+            return
+        self._change(ledger, {"op": "remove", "rows": rows.tolist()})
+
+    def rowsPermuted(self, ledger, order):
+        if self._skipping():
+            return
+        if len(order) > MAX_RECORD_ROWS:
+            self._gap()
+            return
+        self._change(ledger, {"op": "permute", "order": order.tolist()})
+
+    def categoryRenamed(self, ledger, category_id, old, new):
+        self._change(ledger, {"op": "rename", "old": old, "new": new})
+
+    def cleared(self, ledger):
+        self._change(ledger, {"op": "clear"})
@@ -0,0 +1,198 @@
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import Ledger, StringTable, KIND_DTYPES, EXPENSE_SCHEMA, INCOME_SCHEMA
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+# .monkey layout, every block starts on an 8 byte boundary:
+#   MAGIC | uint32 header length | JSON header | blocks...
+# The JSON header lists each sheet with its schema, row count and the (offset, length) of its blocks:
+# one fixed width block per column, the flags block, and an offsets + utf-8 data block per string table.
+MAGIC = b"MONKEY\x00\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+# Sheet name inside a .monkey file -> the schema its ledger uses
+SHEET_SCHEMAS = {
+    'expenses': EXPENSE_SCHEMA,
+    'income': INCOME_SCHEMA,
+}
+
+
+class MappedStringTable(StringTable):
+    """String table read straight from a .monkey file, strings are decoded only when they are asked for.
+
+    The id -> string list and the string -> id hash are built the first time something needs all of them
+    (interning a new string, sorting by text, saving).
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self._strings = None
+        self._ids = None
+
+    def __len__(self):
+        if self._strings is not None:
+            return len(self._strings)
+        return len(self.offsets) - 1
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            bounds = self.offsets.tolist()
+            self._strings = [self.blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+        return self._strings
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {text: string_id for string_id, text in enumerate(self.strings)}
+        return self._ids
+
+    def copy(self):
+        if self._strings is None:
+            # The encoded block is immutable, copies can share it
+            return MappedStringTable(self.offsets, self.blob)
+        return super().copy()
+
+    def text(self, string_id):
+        if self._strings is not None:
+            return self._strings[string_id]
+        return self.blob[self.offsets[string_id]:self.offsets[string_id + 1]].decode('utf-8')
+
+
+def encodeStringTable(table):
+    if isinstance(table, MappedStringTable) and table._strings is None:
+        # Nothing was added since it was read, the encoded block can be written back as is
+        return table.offsets, table.blob
+    encoded = [text.encode('utf-8') for text in table.strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _blocksForLedger(ledger):
+    """(name, bytes-like) for every block of one sheet, in file order."""
+    blocks = []
+    for key in ledger.keys + ['flags']:
+        column = ledger.column(key)
+        blocks.append((key, np.ascontiguousarray(column, dtype=column.dtype.newbyteorder('<'))))
+    for name, table in [('strings', ledger.strings), ('categories', ledger.categories)]:
+        offsets, blob = encodeStringTable(table)
+        blocks.append((f"{name}.offsets", offsets.astype('<u8', copy=False)))
+        blocks.append((f"{name}.data", blob))
+    return blocks
+
+
+def writeMonkey(filePath, sheets, progress=None, timed=True):
+    """Write {sheet name: ledger} to a .monkey file, atomically like every other save.
+    timed=False keeps background snapshots (autosave) out of the perf log."""
+    start = time.perf_counter()
+    header = {"version": FORMAT_VERSION, "sheets": {}}
+    layout = []
+    for sheetName, ledger in sheets.items():
+        blocks = _blocksForLedger(ledger)
+        header["sheets"][sheetName] = {
+            "rows": len(ledger),
+            "schema": [[key, kind] for key, kind in ledger.schema],
+            "blocks": {},
+        }
+        layout.append((sheetName, blocks))
+
+    def assignOffsets(position):
+        for sheetName, blocks in layout:
+            for name, data in blocks:
+                position += -position % ALIGNMENT
+                length = data.nbytes if isinstance(data, np.ndarray) else len(data)
+                header["sheets"][sheetName]["blocks"][name] = [position, length]
+                position += length
+
+    # Block offsets depend on the header size and the header holds the offsets, grow it until both agree
+    headerSize = 0
+    while True:
+        assignOffsets(len(MAGIC) + 4 + headerSize)
+        encodedHeader = json.dumps(header).encode('utf-8')
+        if len(encodedHeader) <= headerSize:
+            break
+        headerSize = len(encodedHeader) + 64
+        headerSize += -headerSize % ALIGNMENT
+    encodedHeader = encodedHeader.ljust(headerSize, b" ")
+
+    totalRows = sum(len(ledger) for ledger in sheets.values())
+    writtenRows = 0
+    tempPath = filePath + ".tmp"
+    try:
+        with open(tempPath, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', headerSize))
+            f.write(encodedHeader)
+            for sheetName, blocks in layout:
+                sheetStart = time.perf_counter()
+                for name, data in blocks:
+                    offset = header["sheets"][sheetName]["blocks"][name][0]
+                    f.write(b"\x00" * (offset - f.tell()))
+                    f.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+                writtenRows += len(sheets[sheetName])
+                if timed:
+                    recordTiming(f"save.monkey.{sheetName}", len(sheets[sheetName]), time.perf_counter() - sheetStart)
+                if progress is not None:
+                    progress(writtenRows, totalRows)
+        os.replace(tempPath, filePath)
+    finally:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+    if timed:
+        recordTiming("save.monkey", totalRows, time.perf_counter() - start)
+    return totalRows
+
+
+def readMonkey(filePath, schemas):
+    """Open a .monkey file and return {sheet name: Ledger} for the sheets named in schemas.
+
+    The file is memory mapped, column blocks are copied out with one memcpy each and string tables
+    stay encoded until used, so no per row parsing happens however large the sheet is.
+    Sheets missing from the file come back empty.
+    """
+    sheets = {}
+    with open(filePath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{os.path.basename(filePath)} is not a .monkey file")
+        headerSize, = struct.unpack_from('<I', mapped, len(MAGIC))
+        headerStart = len(MAGIC) + 4
+        header = json.loads(bytes(mapped[headerStart:headerStart + headerSize]).decode('utf-8'))
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{os.path.basename(filePath)} was written by a newer version of TheMonkeyTracker")
+
+        def array(blocks, name, dtype):
+            offset, length = blocks[name]
+            return np.frombuffer(mapped, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                                 offset=offset).copy()
+
+        def stringTable(blocks, name):
+            offset, length = blocks[f"{name}.data"]
+            return MappedStringTable(array(blocks, f"{name}.offsets", '<u8'), mapped[offset:offset + length])
+
+        for sheetName, schema in schemas.items():
+            start = time.perf_counter()
+            sheet = header["sheets"].get(sheetName)
+            ledger = Ledger(schema, max(sheet["rows"] if sheet else 0, 1))
+            if sheet is not None:
+                if [tuple(column) for column in sheet["schema"]] != list(schema):
+                    raise ValueError(f"The {sheetName} sheet in {os.path.basename(filePath)} has unknown columns")
+                blocks = sheet["blocks"]
+                columns = {key: array(blocks, key, np.dtype(KIND_DTYPES[kind]).newbyteorder('<'))
+                           for key, kind in schema}
+                columns['flags'] = array(blocks, 'flags', np.uint8)
+                ledger.strings = stringTable(blocks, 'strings')
+                ledger.categories = stringTable(blocks, 'categories')
+                ledger.appendColumns(columns, sheet["rows"])
+            sheets[sheetName] = ledger
+            recordTiming(f"import.monkey.{sheetName}", len(ledger), time.perf_counter() - start)
+    return sheets
@@ -0,0 +1,111 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from MonkeyMainFolder.FileIO.SheetLoader import UNIX_EPOCH_DAY, expenseColumnsFromFrame, incomeColumnsFromFrame
+from MonkeyMainFolder.FileIO.SheetWriter import EXPORT_COLUMNS
+from MonkeyMainFolder.Ledger.Ledger import CATEGORY, DATE, MONEY, TEXT, textFromCents
+
+# Header cells other programs use (bank exports, other trackers) -> ledger key, besides our own headers
+HEADER_ALIASES = {
+    'expenses': {
+        "type": 'type', "category": 'type',
+        "description": 'name', "payee": 'name', "merchant": 'name',
+        "memo": 'summary', "notes": 'summary', "note": 'summary',
+        "date": 'due', "transaction date": 'due', "posted date": 'due', "posting date": 'due',
+        "amount": 'total', "debit": 'total',
+    },
+    'income': {
+        "type": 'method', "category": 'method',
+        "source": 'name', "name": 'name', "description": 'name', "payer": 'name',
+        "date": 'received', "received": 'received', "transaction date": 'received',
+        "credit": 'amount', "total": 'amount',
+    },
+}
+
+# Tabs and line breaks inside a copied cell would start a new cell or row
+CELL_BREAKS = str.maketrans("\t\r\n", "   ")
+
+
+def headerKeys(sheetName):
+    """Casefolded header text -> ledger key for one sheet."""
+    keys = {header.casefold(): key for header, key in EXPORT_COLUMNS[sheetName]}
+    keys.update(HEADER_ALIASES[sheetName])
+    return keys
+
+
+def clipboardRows(text):
+    """Split clipboard text into rows of cells in one pass.
+
+    Spreadsheets put tab separated rows on the clipboard, text with no tab on its first line is read
+    as CSV. Quoted cells may hold the delimiter or line breaks, empty lines are dropped.
+    """
+    firstLine = text.lstrip("\r\n").split("\n", 1)[0]
+    delimiter = "\t" if "\t" in firstLine or "," not in firstLine else ","
+    return [row for row in csv.reader(io.StringIO(text), delimiter=delimiter) if any(row)]
+
+
+def clipboardFrame(rows, sheetName):
+    """Line the pasted cells up in file column order.
+
+    A first row made of known headers maps the columns by name (unknown ones are dropped),
+    otherwise the cells are read by position like a sheet file.
+    """
+    keys = headerKeys(sheetName)
+    order = [key for _, key in EXPORT_COLUMNS[sheetName]]
+    frame = pd.DataFrame(rows, dtype=object)
+
+    header = [cell.strip().casefold() for cell in rows[0]]
+    named = [cell for cell in header if cell]
+    if named and sum(cell in keys for cell in named) * 2 >= len(named):
+        frame = frame.iloc[1:]
+        positions = {}
+        for position, cell in enumerate(header):
+            positions.setdefault(keys.get(cell), position)
+        return pd.DataFrame({key: frame[positions[key]] if key in positions else None for key in order},
+                            index=frame.index, columns=order)
+    return frame
+
+
+def pasteColumns(text, sheetName, ledger, categories, rules=None):
+    """Encode pasted spreadsheet rows for one sheet, interning their strings into ledger.
+
+    categories is CategoryManager.dropdownLookup() and rules a RuleMatcher, used for expense types like
+    they are when a file is opened.
+    Pasted rows always arrive uncommitted. Returns (columns, count, non_matching, problems).
+    """
+    rows = clipboardRows(text)
+    if not rows:
+        return {}, 0, [], []
+    frame = clipboardFrame(rows, sheetName)
+    if sheetName == 'expenses':
+        columns, count, non_matching, problems = expenseColumnsFromFrame(frame, ledger, categories, dayfirst=True,
+                                                                          rules=rules)
+    else:
+        columns, count, problems = incomeColumnsFromFrame(frame, ledger, dayfirst=True)
+        non_matching = []
+    columns['flags'] = np.zeros(count, dtype=np.uint8)
+    return columns, count, non_matching, problems
+
+
+def copyText(ledger, rows, keys):
+    """Tab separated text of some rows and columns, readable by spreadsheets and by pasteColumns."""
+    cells = []
+    for key in keys:
+        if key == 'committed':
+            cells.append(np.where(ledger.committedMask()[rows], "Committed", "Commit").tolist())
+            continue
+        values = ledger.column(key)[rows]
+        kind = ledger.kinds[key]
+        if kind in [TEXT, CATEGORY]:
+            table = ledger.categories if kind == CATEGORY else ledger.strings
+            cells.append([table.text(string_id) for string_id in values.tolist()])
+        elif kind == DATE:
+            cells.append((values.astype(np.int64) - UNIX_EPOCH_DAY).astype('datetime64[D]').astype(str).tolist())
+        elif kind == MONEY:
+            cells.append([textFromCents(cents) for cents in values.tolist()])
+        else:
+            cells.append([str(value) for value in values.tolist()])
+    return "".join("\t".join(cell.translate(CELL_BREAKS) for cell in row) + "\n" for row in zip(*cells))
@@ -0,0 +1,194 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from MonkeyMainFolder.FileIO.MonkeyFormat import SHEET_SCHEMAS, readMonkey
+from MonkeyMainFolder.Ledger.Ledger import COMMITTED, Ledger, today
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+# Day number of 1970-01-01, numpy datetime64[D] values count days from there
+UNIX_EPOCH_DAY = 2440588
+
+# Sheet name -> worksheet title in .xlsx files
+SHEET_TITLES = {
+    'expenses': "Expenses",
+    'income': "Income",
+}
+
+
+def csvSheetPath(filePath, sheetName):
+    """CSV holds one sheet per file, expenses keep the chosen name and the others sit next to it."""
+    if sheetName == 'expenses':
+        return filePath
+    root, extension = os.path.splitext(filePath)
+    return f"{root}.{sheetName}{extension}"
+
+
+def readFrames(filePath):
+    """Read every sheet of a .csv or .xlsx file into {sheet name: DataFrame}, missing sheets are left out.
+
+    The CSV files of a save are read in parallel (the C parser releases the GIL), an .xlsx workbook
+    is parsed in one pass since openpyxl can't share a workbook between threads.
+    """
+    start = time.perf_counter()
+    if filePath.lower().endswith(".csv"):
+        paths = {name: csvSheetPath(filePath, name) for name in SHEET_TITLES}
+        paths = {name: path for name, path in paths.items() if name == 'expenses' or os.path.exists(path)}
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            futures = {name: pool.submit(pd.read_csv, path) for name, path in paths.items()}
+            frames = {name: future.result() for name, future in futures.items()}
+        label = "import.read_csv"
+    else:
+        workbook = pd.read_excel(filePath, engine='openpyxl', sheet_name=None)
+        frames = {name: workbook[title] for name, title in SHEET_TITLES.items() if title in workbook}
+        if 'expenses' not in frames and workbook:
+            # Sheets saved before income was included have the expenses on their only worksheet
+            frames['expenses'] = next(iter(workbook.values()))
+        label = "import.read_excel"
+    recordTiming(label, sum(len(df) for df in frames.values()), time.perf_counter() - start)
+    return frames
+
+
+def internColumn(table, texts):
+    """Intern a column of strings, every distinct value is hashed once instead of once per row."""
+    codes, uniques = pd.factorize(texts)
+    ids = np.fromiter((table.intern(text) for text in uniques), dtype=np.int32, count=len(uniques))
+    return ids[codes]
+
+
+def textColumn(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def dayColumn(series, problems, label, dayfirst=False):
+    written = textColumn(series).ne("")
+    if dayfirst:
+        # ISO dates first, with dayfirst pandas reads 2024-02-03 as the 2nd of March
+        dates = pd.to_datetime(series, errors='coerce', format='ISO8601')
+        rest = dates.isna() & written
+        if rest.any():
+            dates[rest] = pd.to_datetime(series[rest], errors='coerce', dayfirst=True)
+    else:
+        dates = pd.to_datetime(series, errors='coerce')
+    invalid = dates.isna() & written
+    if invalid.any():
+        # The format is guessed from the first date, give the rows written some other way a second look
+        dates[invalid] = pd.to_datetime(series[invalid], errors='coerce', dayfirst=dayfirst, format='mixed')
+        invalid = dates.isna() & written
+    if invalid.any():
+        problems.append(f"{int(invalid.sum())} rows had an invalid {label}, they were set to today")
+    days = dates.values.astype('datetime64[D]').astype(np.int64) + UNIX_EPOCH_DAY
+    return np.where(dates.isna().values, today(), days).astype(np.int32)
+
+
+def centsColumn(series, problems, label):
+    if pd.api.types.is_numeric_dtype(series):
+        amounts = series.astype(float)
+    else:
+        cleaned = textColumn(series).str.replace(r'[$,]', '', regex=True)
+        amounts = pd.to_numeric(cleaned, errors='coerce')
+        invalid = amounts.isna() & cleaned.ne("")
+        if invalid.any():
+            problems.append(f"{int(invalid.sum())} rows had an invalid {label}, they were set to 0.00")
+    return np.rint(amounts.fillna(0).values * 100).astype(np.int64)
+
+
+def normalizedColumn(series):
+    # Same key as CategoryManager's normalizeName: single spaces, no case
+    return series.str.split().str.join(" ").str.casefold()
+
+
+def expenseColumnsFromFrame(df, ledger, categories, dayfirst=False, rules=None):
+    """Convert an expense sheet DataFrame into encoded ledger columns, one vectorized pass per column.
+
+    categories is CategoryManager.dropdownLookup(), each distinct type is matched with one hash lookup.
+    rules (a RuleMatcher) fills in the type of uncommitted rows whose type is empty or unknown.
+    dayfirst reads text dates the way the sheets show them (dd/MM/yyyy).
+    Returns (columns, count, non_matching, problems), non_matching lists the unknown Transaction Types.
+    """
+    problems = []
+    count = len(df)
+    # Sheets are read by position: Type, Name, Summary, Due Date, Audit Date, Receipt, Total, Commit
+    df = df.reindex(columns=list(df.columns[:8]) + [None] * (8 - len(df.columns[:8])))
+
+    types = textColumn(df.iloc[:, 0])
+    names = textColumn(df.iloc[:, 1])
+    totals = centsColumn(df.iloc[:, 6], problems, "Total")
+    commits = textColumn(df.iloc[:, 7])
+    matched = normalizedColumn(types).map(categories).astype(object)
+    if rules is not None:
+        missing = (matched.isna() & commits.ne("Committed")).values
+        if missing.any():
+            matched[missing] = rules.categorize(names.values[missing], totals[missing])
+    unmatched = matched.isna() & types.ne("")
+    non_matching = list(pd.unique(types[unmatched]))
+
+    receipts = textColumn(df.iloc[:, 5])
+
+    columns = {
+        'type': internColumn(ledger.categories, matched.fillna(types)),
+        'name': internColumn(ledger.strings, names),
+        'summary': internColumn(ledger.strings, textColumn(df.iloc[:, 2])),
+        'due': dayColumn(df.iloc[:, 3], problems, "Due Date", dayfirst),
+        'audit': dayColumn(df.iloc[:, 4], problems, "Audit Date", dayfirst),
+        'receipt': internColumn(ledger.strings, receipts),
+        'total': totals,
+        'flags': np.where(commits.eq("Committed").values, COMMITTED, 0).astype(np.uint8),
+    }
+    return columns, count, non_matching, problems
+
+
+def incomeColumnsFromFrame(df, ledger, dayfirst=False):
+    """Convert an income sheet DataFrame into encoded ledger columns: Method, Source Name, Date Received,
+    Amount, Commit. Returns (columns, count, problems)."""
+    problems = []
+    count = len(df)
+    df = df.reindex(columns=list(df.columns[:5]) + [None] * (5 - len(df.columns[:5])))
+
+    commits = textColumn(df.iloc[:, 4])
+    columns = {
+        # Methods keep their dropdown indentation ("  Cash"), so they are not stripped
+        'method': internColumn(ledger.categories, df.iloc[:, 0].fillna("").astype(str)),
+        'name': internColumn(ledger.strings, textColumn(df.iloc[:, 1])),
+        'received': dayColumn(df.iloc[:, 2], problems, "Date Received", dayfirst),
+        'amount': centsColumn(df.iloc[:, 3], problems, "Amount"),
+        'flags': np.where(commits.eq("Committed").values, COMMITTED, 0).astype(np.uint8),
+    }
+    return columns, count, problems
+
+
+def loadSheets(filePath, categories, progress=None, rules=None):
+    """Load every sheet of a file into detached ledgers, rules (a RuleMatcher) types the expenses left untyped.
+
+    Returns ({sheet name: Ledger}, non_matching, problems), non_matching lists unknown expense types.
+    Each sheet's conversion time is logged on its own.
+    """
+    if filePath.lower().endswith(".monkey"):
+        # Native files hold encoded columns already, there is nothing to convert or match
+        return readMonkey(filePath, SHEET_SCHEMAS), [], []
+
+    frames = readFrames(filePath)
+    if progress is not None:
+        progress(1, 3)
+
+    sheets = {}
+    non_matching, problems = [], []
+    for name, schema in SHEET_SCHEMAS.items():
+        start = time.perf_counter()
+        df = frames.get(name)
+        ledger = Ledger(schema, max(len(df) if df is not None else 0, 1))
+        if df is not None:
+            if name == 'expenses':
+                columns, count, non_matching, sheetProblems = expenseColumnsFromFrame(df, ledger, categories, rules=rules)
+            else:
+                columns, count, sheetProblems = incomeColumnsFromFrame(df, ledger)
+            problems.extend(f"{SHEET_TITLES[name]}: {problem}" for problem in sheetProblems)
+            ledger.appendColumns(columns, count)
+        sheets[name] = ledger
+        recordTiming(f"import.{name}", len(ledger), time.perf_counter() - start)
+    if progress is not None:
+        progress(2, 3)
+    return sheets, non_matching, problems
@@ -0,0 +1,157 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from openpyxl import Workbook
+
+from MonkeyMainFolder.FileIO.MonkeyFormat import writeMonkey
+from MonkeyMainFolder.FileIO.SheetLoader import SHEET_TITLES, UNIX_EPOCH_DAY, csvSheetPath
+from MonkeyMainFolder.Ledger.Ledger import CATEGORY, DATE, MONEY, TEXT
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+# Rows are decoded and written this many at a time, memory stays flat whatever the sheet size
+CHUNK_SIZE = 5000
+
+# (sheet header, ledger key) in file order, 'committed' is the Commit column
+EXPENSE_EXPORT_COLUMNS = [
+    ("Transaction Type", 'type'),
+    ("Name", 'name'),
+    ("Summary", 'summary'),
+    ("Due Date", 'due'),
+    ("Audit Date", 'audit'),
+    ("Receipt", 'receipt'),
+    ("Total", 'total'),
+    ("Commit", 'committed'),
+]
+
+INCOME_EXPORT_COLUMNS = [
+    ("Method", 'method'),
+    ("Source Name", 'name'),
+    ("Date Received", 'received'),
+    ("Amount", 'amount'),
+    ("Commit", 'committed'),
+]
+
+EXPORT_COLUMNS = {
+    'expenses': EXPENSE_EXPORT_COLUMNS,
+    'income': INCOME_EXPORT_COLUMNS,
+}
+
+
+def decodeChunk(ledger, key, rows):
+    """Decode one slice of a ledger column into plain Python values for a writer."""
+    if key == 'committed':
+        committed = ledger.committedMask()[rows]
+        return np.where(committed, "Committed", "Commit").tolist()
+
+    values = ledger.column(key)[rows]
+    kind = ledger.kinds[key]
+    if kind in [TEXT, CATEGORY]:
+        table = ledger.categories if kind == CATEGORY else ledger.strings
+        return [table.text(string_id) or None for string_id in values.tolist()]
+    if kind == DATE:
+        return (values.astype(np.int64) - UNIX_EPOCH_DAY).astype('datetime64[D]').astype(str).tolist()
+    if kind == MONEY:
+        return (values / 100).tolist()
+    return values.tolist()
+
+
+def iterRowChunks(ledger, columns, chunkSize=CHUNK_SIZE):
+    """Yield the ledger as lists of row tuples, never more than chunkSize rows decoded at once."""
+    for first in range(0, len(ledger), chunkSize):
+        rows = slice(first, min(first + chunkSize, len(ledger)))
+        yield list(zip(*[decodeChunk(ledger, key, rows) for _, key in columns]))
+
+
+class SheetProgress:
+    """Adds up the rows written by every sheet and passes the running total to progress(done, total)."""
+
+    def __init__(self, sheets, progress):
+        self.total = sum(len(ledger) for ledger in sheets.values())
+        self.written = dict.fromkeys(sheets, 0)
+        self.progress = progress
+
+    def chunks(self, name, chunks):
+        for chunk in chunks:
+            yield chunk
+            self.written[name] += len(chunk)
+            if self.progress is not None:
+                self.progress(sum(self.written.values()), self.total)
+
+
+def headerFor(name):
+    return [header for header, _ in EXPORT_COLUMNS[name]]
+
+
+def writeXlsx(filePath, sheets, progress):
+    # Write-only workbooks stream rows to disk instead of keeping every cell object around.
+    # openpyxl can't fill one workbook from several threads, so the sheets go one after the other.
+    workbook = Workbook(write_only=True)
+    for name, ledger in sheets.items():
+        start = time.perf_counter()
+        worksheet = workbook.create_sheet(SHEET_TITLES[name])
+        worksheet.append(headerFor(name))
+        for chunk in progress.chunks(name, iterRowChunks(ledger, EXPORT_COLUMNS[name])):
+            for row in chunk:
+                worksheet.append(row)
+        recordTiming(f"save.xlsx.{name}", len(ledger), time.perf_counter() - start)
+    workbook.save(filePath)
+
+
+def writeCsv(filePath, name, ledger, progress):
+    start = time.perf_counter()
+    with open(filePath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headerFor(name))
+        for chunk in progress.chunks(name, iterRowChunks(ledger, EXPORT_COLUMNS[name])):
+            writer.writerows(chunk)
+    recordTiming(f"save.csv.{name}", len(ledger), time.perf_counter() - start)
+
+
+def replaceAtomically(paths, write):
+    """Call write(temp paths) and only then rename each temp file over its target.
+
+    A failed or cancelled save leaves every previous file untouched.
+    """
+    tempPaths = {name: path + ".tmp" for name, path in paths.items()}
+    try:
+        write(tempPaths)
+        for name, path in paths.items():
+            os.replace(tempPaths[name], path)
+    finally:
+        for tempPath in tempPaths.values():
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+
+def saveSheets(sheets, filePath, progress=None):
+    """Save {sheet name: ledger} in one pass, the format is picked by extension.
+
+    .monkey and .xlsx hold every sheet in one file, .csv writes one file per sheet in parallel
+    (see csvSheetPath). progress(done, total) may raise to cancel the save.
+    """
+    start = time.perf_counter()
+    extension = os.path.splitext(filePath)[1].lower()
+    rows = sum(len(ledger) for ledger in sheets.values())
+
+    if extension == ".monkey":
+        return writeMonkey(filePath, sheets, progress=progress)
+
+    sheetProgress = SheetProgress(sheets, progress)
+    if extension == ".csv":
+        def write(tempPaths):
+            with ThreadPoolExecutor(max_workers=len(sheets)) as pool:
+                futures = [pool.submit(writeCsv, tempPaths[name], name, ledger, sheetProgress)
+                           for name, ledger in sheets.items()]
+                for future in futures:
+                    future.result()
+
+        replaceAtomically({name: csvSheetPath(filePath, name) for name in sheets}, write)
+    else:
+        replaceAtomically({'workbook': filePath},
+                          lambda tempPaths: writeXlsx(tempPaths['workbook'], sheets, sheetProgress))
+
+    recordTiming(f"save{extension or '.xlsx'}", rows, time.perf_counter() - start)
+    return rows
@@ -0,0 +1,19 @@
+from MonkeyMainFolder.Ledger.LedgerTableModel import LedgerTableModel
+
+# Constants for Column Indices
+METHOD_COLUMN = 0
+SOURCE_NAME_COLUMN = 1
+DATE_RECEIVED_COLUMN = 2
+AMOUNT_COLUMN = 3
+COMMIT_COLUMN = 4
+
+HEADERS = ['Method', 'Source Name', 'Date Received', 'Amount', 'Commit']
+
+# Ledger key shown in each column, see INCOME_SCHEMA
+COLUMN_KEYS = ['method', 'name', 'received', 'amount', 'committed']
+
+
+class IncomeTableModel(LedgerTableModel):
+    """Income sheet on top of an INCOME_SCHEMA ledger."""
+    HEADERS = HEADERS
+    COLUMN_KEYS = COLUMN_KEYS
@@ -0,0 +1,163 @@
+import datetime
+
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener, dayFromDate
+
+# Bucket sizes the cube keeps sums for
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+YEAR = 'year'
+GRAINS = [DAY, WEEK, MONTH, YEAR]
+
+# Buckets are stored next to the category id in one int64 key, biased so months before 1970 stay positive
+BUCKET_BIAS = 1 << 31
+
+# numpy's datetime64 counts days from 1970-01-01, ledger day numbers from the Julian epoch
+EPOCH_DAY = dayFromDate(datetime.date(1970, 1, 1))
+
+
+def bucketsOf(grain, days):
+    """Bucket number of each day: the day itself, Monday weeks (Julian day 0 was a Monday), or the months
+    or years since 1970."""
+    days = np.asarray(days, dtype=np.int64)
+    if grain == DAY:
+        return days
+    if grain == WEEK:
+        return days // 7
+    unit = 'M' if grain == MONTH else 'Y'
+    return (days - EPOCH_DAY).astype('datetime64[D]').astype(f'datetime64[{unit}]').astype(np.int64)
+
+
+def bucketStarts(grain, buckets):
+    """First day number of each bucket."""
+    buckets = np.asarray(buckets, dtype=np.int64)
+    if grain == DAY:
+        return buckets
+    if grain == WEEK:
+        return buckets * 7
+    unit = 'M' if grain == MONTH else 'Y'
+    return buckets.astype(f'datetime64[{unit}]').astype('datetime64[D]').astype(np.int64) + EPOCH_DAY
+
+
+class AggregateCube(LedgerListener):
+    """Money of a ledger summed per bucket (day, week, month, year) x category x committed, kept by deltas.
+
+    Each change adds or takes away only the rows it touched, so "spend by category per month" reads
+    a few buckets instead of the rows. Callbacks in listeners get (category ids, first day, last day)
+    of each change, the days are None when any day may have changed.
+    """
+
+    def __init__(self, ledger, amountKey, categoryKey, dayKey):
+        self.ledger = ledger
+        self.amountKey = amountKey
+        self.categoryKey = categoryKey
+        self.dayKey = dayKey
+        self.listeners = []
+        self.rebuild()
+        ledger.addListener(self)
+
+    def rebuild(self):
+        self.sums = {grain: {} for grain in GRAINS}  # grain -> category id -> {bucket: [total, committed]}
+        self._addRows(np.arange(len(self.ledger)), 1)
+
+    # Queries
+
+    def categories(self):
+        return list(self.sums[DAY])
+
+    def buckets(self, grain, category_id, first=None, last=None, committed=False):
+        """{bucket: cents} of one category, buckets within [first, last], None leaves that side open."""
+        column = 1 if committed else 0
+        return {bucket: sums[column] for bucket, sums in self.sums[grain].get(category_id, {}).items()
+                if (first is None or bucket >= first) and (last is None or bucket <= last)}
+
+    def total(self, grain, category_ids, first=None, last=None, committed=False):
+        """Cents of some categories within buckets [first, last]."""
+        return sum(sum(self.buckets(grain, category_id, first, last, committed).values())
+                   for category_id in category_ids)
+
+    def series(self, grain, category_ids=None, first=None, last=None, committed=False):
+        """(buckets, cents) arrays over some categories (all when None), sorted by bucket, empty buckets left out."""
+        merged = {}
+        for category_id in self.categories() if category_ids is None else category_ids:
+            for bucket, cents in self.buckets(grain, category_id, first, last, committed).items():
+                merged[bucket] = merged.get(bucket, 0) + cents
+        buckets = np.array(sorted(merged), dtype=np.int64)
+        return buckets, np.array([merged[bucket] for bucket in buckets.tolist()], dtype=np.int64)
+
+    def byCategory(self, grain, first=None, last=None, committed=False):
+        """{category id: cents} within buckets [first, last]."""
+        return {category_id: self.total(grain, [category_id], first, last, committed)
+                for category_id in self.categories()}
+
+    # Updates
+
+    def _apply(self, rows, totals, committed, categories=None, days=None):
+        """Add signed per row amounts to every grain, categories and days default to the rows' own.
+        Returns (category ids, first day, last day) touched, None for no rows."""
+        if not len(rows):
+            return None
+        categories = self.ledger.column(self.categoryKey)[rows] if categories is None else categories
+        days = self.ledger.column(self.dayKey)[rows] if days is None else days
+        categories = categories.astype(np.int64)
+        for grain in GRAINS:
+            # One sum per (category, bucket) pair, bincount is exact for cents far beyond any sheet
+            pairs, inverse = np.unique(categories << 32 | bucketsOf(grain, days) + BUCKET_BIAS, return_inverse=True)
+            sums = self.sums[grain]
+            for pair, total, done in zip(pairs.tolist(), np.bincount(inverse, weights=totals).tolist(),
+                                         np.bincount(inverse, weights=committed).tolist()):
+                bucket = sums.setdefault(pair >> 32, {}).setdefault((pair & 0xFFFFFFFF) - BUCKET_BIAS, [0, 0])
+                bucket[0] += int(total)
+                bucket[1] += int(done)
+        return set(np.unique(categories).tolist()), int(days.min()), int(days.max())
+
+    def _addRows(self, rows, sign):
+        amounts = sign * self.ledger.column(self.amountKey)[rows]
+        return self._apply(rows, amounts, np.where(self.ledger.committedMask()[rows], amounts, 0))
+
+    def _changed(self, *changes):
+        changes = [change for change in changes if change is not None]
+        if not changes:
+            return
+        touched = set().union(*(category_ids for category_ids, _, _ in changes))
+        first = min(first for _, first, _ in changes)
+        last = max(last for _, _, last in changes)
+        for callback in self.listeners:
+            callback(touched, first, last)
+
+    # LedgerListener hooks
+
+    def rowsAppended(self, ledger, first, count):
+        self._changed(self._addRows(np.arange(first, first + count), 1))
+
+    def valueChanged(self, ledger, row, key, old, new):
+        self.valuesChanged(ledger, np.array([row]), key, np.array([old]), np.array([new]))
+
+    def valuesChanged(self, ledger, rows, key, old, new):
+        if key not in [self.amountKey, self.categoryKey, self.dayKey]:
+            return
+        # Take the rows out as they were and put them back as they are
+        amounts = old.astype(np.int64) if key == self.amountKey else ledger.column(self.amountKey)[rows]
+        committed = np.where(ledger.committedMask()[rows], amounts, 0)
+        touched = self._apply(rows, -amounts, -committed, categories=old if key == self.categoryKey else None,
+                              days=old if key == self.dayKey else None)
+        self._changed(touched, self._addRows(rows, 1))
+
+    def committedChanged(self, ledger, rows, committed):
+        amounts = ledger.column(self.amountKey)[rows]
+        self._changed(self._apply(rows, np.zeros(len(rows)), amounts if committed else -amounts))
+
+    def rowsRemoving(self, ledger, rows):
+        self._changed(self._addRows(rows, -1))
+
+    def categoryRenamed(self, ledger, category_id, old, new):
+        for callback in self.listeners:
+            callback({category_id}, None, None)
+
+    def cleared(self, ledger):
+        touched = set(self.sums[DAY])
+        self.sums = {grain: {} for grain in GRAINS}
+        for callback in self.listeners:
+            callback(touched, None, None)
@@ -0,0 +1,56 @@
+from difflib import SequenceMatcher
+
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+
+
+def dropdownEntries(categories):
+    """(text, selectable) for every line of a Type dropdown, each category followed by its indented subcategories.
+
+    A category with subcategories is only a heading, a category without any can be picked itself.
+    """
+    entries = []
+    for category, subcategories in categories.items():
+        entries.append((category, not subcategories))
+        entries.extend((f"  {subcategory}", True) for subcategory in subcategories)
+    return entries
+
+
+class CategoryModel(QStandardItemModel):
+    """The one dropdown model of a sheet, every Type editor shows it instead of building its own.
+
+    setCategories only inserts and removes the lines that changed, version goes up on every change
+    so anything caching category text can tell it is stale.
+    """
+
+    def __init__(self, categories=None, parent=None):
+        super().__init__(parent)
+        self.version = 0
+        self.entries = []
+        self.setCategories(categories or {})
+
+    @staticmethod
+    def _item(text, selectable):
+        item = QStandardItem(text)
+        item.setSelectable(selectable)
+        item.setEnabled(selectable)
+        return item
+
+    def setCategories(self, categories):
+        entries = dropdownEntries(categories)
+        if entries == self.entries:
+            return False
+
+        matcher = SequenceMatcher(a=self.entries, b=entries, autojunk=False)
+        # Back to front so the row numbers of the earlier opcodes stay valid
+        for tag, first, last, newFirst, newLast in reversed(matcher.get_opcodes()):
+            if tag == 'equal':
+                continue
+            if tag in ['replace', 'delete']:
+                self.removeRows(first, last - first)
+            if tag in ['replace', 'insert']:
+                for offset, (text, selectable) in enumerate(entries[newFirst:newLast]):
+                    self.insertRow(first + offset, self._item(text, selectable))
+
+        self.entries = entries
+        self.version += 1
+        return True
@@ -0,0 +1,109 @@
+from PyQt6.QtCore import Qt, QDate, QEvent, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QDoubleValidator
+from PyQt6.QtWidgets import (QItemDelegate, QLineEdit, QStyledItemDelegate, QDateEdit, QStyleOptionButton, QStyle,
+                             QApplication)
+
+
+class MoneyItemDelegate(QStyledItemDelegate):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.validator = QDoubleValidator(0, 9999999999, 2, self)
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setValidator(self.validator)
+        return editor
+
+    def setEditorData(self, editor, index):
+        value = index.model().data(index, Qt.ItemDataRole.EditRole)
+        if value:
+            editor.setText(str(value))
+
+    def setModelData(self, editor, model, index):
+        value = editor.text().replace('$', '').strip()
+        model.setData(index, value, Qt.ItemDataRole.EditRole)
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        painter.save()
+        rect = option.rect
+        painter.drawText(rect.left() + 5, rect.top(), rect.width(), rect.height(),
+                         Qt.AlignmentFlag.AlignVCenter, "$")
+        painter.restore()
+
+
+class DateDelegate(QItemDelegate):
+    def createEditor(self, parent, option, index):
+        editor = QDateEdit(parent)
+        editor.setCalendarPopup(True)
+        editor.setDisplayFormat("dd/MM/yyyy")
+
+        editor.setDate(QDate.currentDate())
+        return editor
+
+    def setEditorData(self, editor, index):
+        value = index.model().data(index, Qt.ItemDataRole.EditRole)
+        if isinstance(value, QDate):
+            editor.setDate(value)
+        else:
+            editor.setDate(QDate.fromString(value, "dd/MM/yyyy"))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.date(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+class TypeDelegate(QStyledItemDelegate):
+    # The dropdown is only built for the cell being edited instead of living in every row
+    def __init__(self, panel, parent=None):
+        super().__init__(parent)
+        self.panel = panel
+
+    def createEditor(self, parent, option, index):
+        editor = self.panel.createTypeDropdown(parent)
+        editor.activated.connect(lambda _, e=editor: self.commitData.emit(e))
+        return editor
+
+    def setEditorData(self, editor, index):
+        value = index.model().data(index, Qt.ItemDataRole.EditRole)
+        position = editor.findText(value)
+        if position >= 0:
+            editor.setCurrentIndex(position)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    # Paints a push button for the Receipt and Commit columns without creating one per row
+    clicked = pyqtSignal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        background = index.data(Qt.ItemDataRole.BackgroundRole)
+
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(1, 1, -1, -1)
+        button.text = index.data(Qt.ItemDataRole.DisplayRole)
+        button.state = QStyle.StateFlag.State_Raised
+        if background is None:
+            button.state |= QStyle.StateFlag.State_Enabled
+        else:
+            painter.fillRect(button.rect, background)
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        if background is None:
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+        else:
+            style.drawControl(QStyle.ControlElement.CE_PushButtonLabel, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            if option.rect.contains(event.position().toPoint()):
+                self.clicked.emit(QModelIndex(index))
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,127 @@
+from PyQt6.QtCore import QDate, QTimer
+from PyQt6.QtGui import QDoubleValidator
+from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QCheckBox, QDateEdit, QToolButton, QMenu, QLineEdit, QPushButton,
+                             QLabel)
+
+from MonkeyMainFolder.Ledger.Ledger import centsFromText
+from MonkeyMainFolder.Ledger.LedgerFilterModel import LedgerFilter
+
+# Typing in the filter boxes refilters once the user pauses for this long
+FILTER_DELAY_MS = 150
+
+
+class FilterBar(QWidget):
+    """Date range, category, over/under amount and name filters for one sheet.
+
+    The categories offered are the lines of the sheet's CategoryModel, read each time the menu opens.
+    """
+
+    def __init__(self, filterModel, categoryModel, parent=None):
+        super().__init__(parent)
+        self.filterModel = filterModel
+        self.categoryModel = categoryModel
+        self.checkedCategories = set()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(FILTER_DELAY_MS)
+        self.timer.timeout.connect(self.applyFilter)
+
+        self.dateCheck = QCheckBox("Dates")
+        self.fromDate = self._dateEdit(QDate.currentDate().addMonths(-1))
+        self.toDate = self._dateEdit(QDate.currentDate())
+
+        self.categoryButton = QToolButton()
+        self.categoryButton.setText("Categories")
+        self.categoryButton.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
+        self.categoryMenu = QMenu(self.categoryButton)
+        self.categoryMenu.aboutToShow.connect(self.fillCategoryMenu)
+        self.categoryButton.setMenu(self.categoryMenu)
+
+        validator = QDoubleValidator(0, 9999999999, 2, self)
+        self.overEdit = QLineEdit()
+        self.overEdit.setPlaceholderText("Over")
+        self.underEdit = QLineEdit()
+        self.underEdit.setPlaceholderText("Under")
+        self.nameEdit = QLineEdit()
+        self.nameEdit.setPlaceholderText("Name contains")
+        for edit in [self.overEdit, self.underEdit]:
+            edit.setValidator(validator)
+            edit.setMaximumWidth(90)
+        for edit in [self.overEdit, self.underEdit, self.nameEdit]:
+            edit.textChanged.connect(self.timer.start)
+
+        self.dateCheck.toggled.connect(self.timer.start)
+        clearButton = QPushButton("Clear Filters")
+        clearButton.clicked.connect(self.clearFilters)
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.dateCheck)
+        layout.addWidget(self.fromDate)
+        layout.addWidget(QLabel("to"))
+        layout.addWidget(self.toDate)
+        layout.addWidget(self.categoryButton)
+        layout.addWidget(self.overEdit)
+        layout.addWidget(self.underEdit)
+        layout.addWidget(self.nameEdit)
+        layout.addWidget(clearButton)
+        layout.addStretch()
+        self.setLayout(layout)
+
+    def _dateEdit(self, date):
+        edit = QDateEdit(date)
+        edit.setCalendarPopup(True)
+        edit.setDisplayFormat("dd/MM/yyyy")
+        edit.dateChanged.connect(lambda _: self.dateCheck.isChecked() and self.timer.start())
+        return edit
+
+    def fillCategoryMenu(self):
+        self.categoryMenu.clear()
+        for text, selectable in [("", True)] + self.categoryModel.entries:
+            action = self.categoryMenu.addAction(text or "(No category)")
+            action.setCheckable(True)
+            action.setEnabled(selectable)
+            action.setChecked(text in self.checkedCategories)
+            action.toggled.connect(lambda checked, text=text: self.categoryToggled(text, checked))
+
+    def categoryToggled(self, text, checked):
+        if checked:
+            self.checkedCategories.add(text)
+        else:
+            self.checkedCategories.discard(text)
+        count = len(self.checkedCategories)
+        self.categoryButton.setText(f"Categories ({count})" if count else "Categories")
+        self.timer.start()
+
+    def currentFilter(self):
+        dates = None
+        if self.dateCheck.isChecked():
+            dates = (self.fromDate.date().toJulianDay(), self.toDate.date().toJulianDay())
+        amounts = None
+        if self.overEdit.text().strip() or self.underEdit.text().strip():
+            amounts = (centsFromText(self.overEdit.text()) if self.overEdit.text().strip() else None,
+                       centsFromText(self.underEdit.text()) if self.underEdit.text().strip() else None)
+        categories = set(self.checkedCategories) if self.checkedCategories else None
+        return LedgerFilter(dates, categories, amounts, self.nameEdit.text().strip())
+
+    def applyFilter(self):
+        self.timer.stop()
+        try:
+            self.filterModel.setFilter(self.currentFilter())
+        except ValueError:
+            # Half typed amount such as "." or "1e", wait for the next keystroke
+            pass
+
+    def clearFilters(self):
+        for widget in [self.dateCheck, self.overEdit, self.underEdit, self.nameEdit]:
+            widget.blockSignals(True)
+        self.dateCheck.setChecked(False)
+        self.overEdit.clear()
+        self.underEdit.clear()
+        self.nameEdit.clear()
+        for widget in [self.dateCheck, self.overEdit, self.underEdit, self.nameEdit]:
+            widget.blockSignals(False)
+        self.checkedCategories.clear()
+        self.categoryButton.setText("Categories")
+        self.applyFilter()
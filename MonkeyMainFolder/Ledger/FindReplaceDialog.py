@@ -0,0 +1,174 @@
+import re
+import time
+
+import numpy as np
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QDialog, QGridLayout, QLabel, QLineEdit, QPushButton, QCheckBox, QHBoxLayout
+
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+# Typing in the Find box searches again once the user pauses for this long
+SEARCH_DELAY_MS = 150
+
+
+class SearchSheet:
+    """One sheet the dialog searches: its model, the filter proxy and table showing it, and its SearchIndex."""
+
+    def __init__(self, title, model, filterModel, table, searchIndex):
+        self.title = title
+        self.model = model
+        self.filterModel = filterModel
+        self.table = table
+        self.searchIndex = searchIndex
+        self.hits = {}
+        # Every hit as row * columns + column, sorted, so find next is one binary search
+        self.positions = np.zeros(0, dtype=np.int64)
+
+    def setHits(self, hits):
+        self.hits = hits
+        columns = self.model.columnCount()
+        positions = [np.flatnonzero(mask) * columns + self.model.COLUMN_KEYS.index(key)
+                     for key, mask in hits.items()]
+        self.positions = np.sort(np.concatenate(positions)) if positions else np.zeros(0, dtype=np.int64)
+
+    def visibleIndex(self, position):
+        """View index of a hit, invalid when the filter hides its row."""
+        row, column = divmod(int(position), self.model.columnCount())
+        return self.filterModel.mapFromSource(self.model.index(row, column))
+
+
+class FindReplaceDialog(QDialog):
+    """Find/Replace over names, summaries, categories and receipt file names of every sheet.
+
+    Find Next walks the hits in sheet order, Highlight All paints every hit, Replace All rewrites the
+    hits in rows that are not committed yet, receipts are only searched.
+    """
+
+    def __init__(self, sheets, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Find/Replace")
+        self.sheets = sheets
+        self.current = (0, -1)  # (sheet, position) of the last hit shown
+
+        self.findEdit = QLineEdit()
+        self.replaceEdit = QLineEdit()
+        self.highlightCheck = QCheckBox("Highlight all")
+        self.statusLabel = QLabel("")
+        findNextButton = QPushButton("Find Next")
+        replaceAllButton = QPushButton("Replace All")
+        closeButton = QPushButton("Close")
+        findNextButton.setDefault(True)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SEARCH_DELAY_MS)
+        self.timer.timeout.connect(self.search)
+
+        self.findEdit.textChanged.connect(self.timer.start)
+        self.highlightCheck.toggled.connect(self.updateHighlights)
+        findNextButton.clicked.connect(self.findNext)
+        replaceAllButton.clicked.connect(self.replaceAll)
+        closeButton.clicked.connect(self.close)
+
+        for sheet in self.sheets:
+            # Hits move with the rows, search again after edits, sorts, deletes and loads
+            sheet.model.dataChanged.connect(self.sheetDataChanged)
+            for signal in [sheet.model.rowsInserted, sheet.model.rowsRemoved, sheet.model.layoutChanged,
+                           sheet.model.modelReset]:
+                signal.connect(self.timer.start)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(findNextButton)
+        buttons.addWidget(replaceAllButton)
+        buttons.addWidget(closeButton)
+
+        layout = QGridLayout()
+        layout.addWidget(QLabel("Find:"), 0, 0)
+        layout.addWidget(self.findEdit, 0, 1)
+        layout.addWidget(QLabel("Replace with:"), 1, 0)
+        layout.addWidget(self.replaceEdit, 1, 1)
+        layout.addWidget(self.highlightCheck, 2, 1)
+        layout.addLayout(buttons, 3, 1)
+        layout.addWidget(self.statusLabel, 4, 0, 1, 2)
+        self.setLayout(layout)
+
+    def sheetDataChanged(self, topLeft, bottomRight, roles=()):
+        # Our own highlight repaints are not edits
+        if list(roles) != [Qt.ItemDataRole.BackgroundRole]:
+            self.timer.start()
+
+    def search(self):
+        self.timer.stop()
+        start = time.perf_counter()
+        text = self.findEdit.text()
+        for sheet in self.sheets:
+            sheet.setHits(sheet.searchIndex.find(text))
+        rows = sum(len(sheet.model.ledger) for sheet in self.sheets)
+        recordTiming("search", rows, time.perf_counter() - start)
+
+        count = sum(len(sheet.positions) for sheet in self.sheets)
+        self.statusLabel.setText(f"{count} matches" if text.strip() else "")
+        self.updateHighlights()
+
+    def updateHighlights(self):
+        for sheet in self.sheets:
+            sheet.model.setHighlights(sheet.hits if self.highlightCheck.isChecked() else {})
+
+    def findNext(self):
+        if self.timer.isActive():
+            self.search()
+        sheetNumber, position = self.current
+        # Rest of the current sheet, then the other sheets, then wrap around to the start of this one
+        order = [(sheetNumber, position)] + [((sheetNumber + step) % len(self.sheets), -1)
+                                             for step in range(1, len(self.sheets) + 1)]
+        for number, after in order:
+            sheet = self.sheets[number]
+            for hit in sheet.positions[np.searchsorted(sheet.positions, after, side='right'):]:
+                index = sheet.visibleIndex(hit)
+                if index.isValid():
+                    self.current = (number, int(hit))
+                    sheet.table.setCurrentIndex(index)
+                    sheet.table.scrollTo(index)
+                    return True
+        self.statusLabel.setText("No visible matches")
+        return False
+
+    def replaceAll(self):
+        needle = self.findEdit.text().strip()
+        if not needle:
+            return
+        replacement = self.replaceEdit.text()
+        with self.sheets[0].model.undoMacro("Replace All"):
+            replaced = self.replaceInSheets(needle, replacement)
+        self.search()
+        self.statusLabel.setText(f"Replaced {replaced} cells, committed rows were left alone")
+
+    def replaceInSheets(self, needle, replacement):
+        pattern = re.compile(re.escape(needle), re.IGNORECASE)
+        replaced = 0
+        for sheet in self.sheets:
+            ledger = sheet.model.ledger
+            uncommitted = ~ledger.committedMask()
+            for key, mask in sheet.searchIndex.find(needle).items():
+                if key in sheet.model.BUTTON_KEYS:
+                    continue
+                rows = np.flatnonzero(mask & uncommitted)
+                if not len(rows):
+                    continue
+                # Each distinct text is rewritten once, the rows pick theirs up by id
+                table = ledger._table(key)
+                ids, inverse = np.unique(ledger.column(key)[rows], return_inverse=True)
+                texts = np.array([pattern.sub(lambda match: replacement, table.text(string_id))
+                                  for string_id in ids.tolist()], dtype=object)
+                sheet.model.setValues(rows, key, texts[inverse].tolist())
+                replaced += len(rows)
+        return replaced
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.updateHighlights()
+
+    def hideEvent(self, event):
+        for sheet in self.sheets:
+            sheet.model.setHighlights({})
+        super().hideEvent(event)
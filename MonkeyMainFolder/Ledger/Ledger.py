@@ -0,0 +1,379 @@
+import datetime
+
+import numpy as np
+
+# Column kinds, each kind decides how a column is stored
+MONEY = 'money'  # int64 amount in cents
+DATE = 'date'  # int32 day number, same numbering as QDate.toJulianDay()
+CATEGORY = 'category'  # int32 id into the ledger's category table, 0 means no category
+TEXT = 'text'  # int32 id into the ledger's interned string table, 0 means empty
+
+KIND_DTYPES = {
+    MONEY: np.int64,
+    DATE: np.int32,
+    CATEGORY: np.int32,
+    TEXT: np.int32,
+}
+
+# Bits of the per row flags column
+COMMITTED = 0x01
+
+EXPENSE_SCHEMA = [
+    ('type', CATEGORY),
+    ('name', TEXT),
+    ('summary', TEXT),
+    ('due', DATE),
+    ('audit', DATE),
+    ('receipt', TEXT),
+    ('total', MONEY),
+]
+
+INCOME_SCHEMA = [
+    ('method', CATEGORY),
+    ('name', TEXT),
+    ('received', DATE),
+    ('amount', MONEY),
+]
+
+# Julian day number of 0001-01-01, lets us go between datetime.date and QDate day numbers
+JULIAN_DAY_OFFSET = 1721425
+
+
+def dayFromDate(date):
+    return date.toordinal() + JULIAN_DAY_OFFSET
+
+
+def dateFromDay(day):
+    return datetime.date.fromordinal(int(day) - JULIAN_DAY_OFFSET)
+
+
+def today():
+    return dayFromDate(datetime.date.today())
+
+
+def centsFromText(text):
+    """Parse '$1,234.50' style text into integer cents."""
+    text = str(text).replace('$', '').replace(',', '').strip()
+    if not text:
+        return 0
+    return int(round(float(text) * 100))
+
+
+def textFromCents(cents):
+    sign = "-" if cents < 0 else ""
+    cents = abs(int(cents))
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+class StringTable:
+    """Interns strings so each distinct name, summary or path is stored once."""
+
+    def __init__(self):
+        self.strings = [""]
+        self.ids = {"": 0}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, text):
+        text = "" if text is None else str(text)
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self.ids[text] = string_id
+        return string_id
+
+    def internMany(self, texts):
+        return np.fromiter((self.intern(text) for text in texts), dtype=np.int32, count=len(texts))
+
+    def text(self, string_id):
+        return self.strings[string_id]
+
+    def rename(self, string_id, text):
+        """Change the text behind an id, everything storing the id shows the new text."""
+        old = self.strings[string_id]
+        if self.ids.get(old) == string_id:
+            del self.ids[old]
+        self.strings[string_id] = text
+        self.ids.setdefault(text, string_id)
+
+    def copy(self):
+        table = StringTable()
+        table.strings = list(self.strings)
+        table.ids = dict(self.ids)
+        return table
+
+
+class LedgerListener:
+    """Base for objects that keep derived state (totals, indexes) in step with a ledger.
+
+    Every hook is called after the ledger changed, except rowsRemoving which runs while the rows still exist.
+    """
+
+    def rowsAppended(self, ledger, first, count):
+        pass
+
+    def valueChanged(self, ledger, row, key, old, new):
+        pass
+
+    def valuesChanged(self, ledger, rows, key, old, new):
+        # One column changed on many rows at once (replace, paste), old and new are encoded arrays
+        for row, oldValue, newValue in zip(rows.tolist(), old.tolist(), new.tolist()):
+            self.valueChanged(ledger, row, key, oldValue, newValue)
+
+    def committedChanged(self, ledger, rows, committed):
+        pass
+
+    def rowsRemoving(self, ledger, rows):
+        pass
+
+    def rowsPermuted(self, ledger, order):
+        pass
+
+    def categoryRenamed(self, ledger, category_id, old, new):
+        pass
+
+    def cleared(self, ledger):
+        pass
+
+
+class Ledger:
+    """Array backed sheet, one numpy column per field plus a flags column for the committed bit.
+
+    Values go in and come out decoded (text as str, money as int cents, dates as int day numbers),
+    column() hands out the raw arrays so totals and file I/O can work on whole columns.
+    """
+
+    def __init__(self, schema, capacity=64):
+        self.schema = list(schema)
+        self.kinds = dict(self.schema)
+        self.keys = [key for key, _ in self.schema]
+        self.strings = StringTable()
+        self.categories = StringTable()
+        self._size = 0
+        self._columns = {key: np.zeros(capacity, dtype=KIND_DTYPES[kind]) for key, kind in self.schema}
+        self._flags = np.zeros(capacity, dtype=np.uint8)
+        self.listeners = []
+
+    def __len__(self):
+        return self._size
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    # Storage
+
+    def _reserve(self, size):
+        capacity = len(self._flags)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for key, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[key] = grown
+        grown = np.zeros(capacity, dtype=np.uint8)
+        grown[:self._size] = self._flags[:self._size]
+        self._flags = grown
+
+    def _table(self, key):
+        return self.categories if self.kinds[key] == CATEGORY else self.strings
+
+    def _encode(self, key, value):
+        kind = self.kinds[key]
+        if kind in [TEXT, CATEGORY]:
+            return self._table(key).intern(value)
+        if kind == MONEY and isinstance(value, str):
+            return centsFromText(value)
+        return int(value)
+
+    def _decode(self, key, raw):
+        kind = self.kinds[key]
+        if kind in [TEXT, CATEGORY]:
+            return self._table(key).text(raw)
+        return int(raw)
+
+    def defaultRow(self):
+        row = {}
+        for key, kind in self.schema:
+            row[key] = today() if kind == DATE else ("" if kind in [TEXT, CATEGORY] else 0)
+        row['committed'] = False
+        return row
+
+    # Reading
+
+    def column(self, key):
+        """Raw values of a column, a view that is only valid until the next append or delete."""
+        if key == 'flags':
+            return self._flags[:self._size]
+        return self._columns[key][:self._size]
+
+    def committedMask(self):
+        return (self._flags[:self._size] & COMMITTED) != 0
+
+    def get(self, row, key):
+        if key == 'committed':
+            return self.isCommitted(row)
+        return self._decode(key, self._columns[key][row])
+
+    def rowValues(self, row):
+        values = {key: self.get(row, key) for key in self.keys}
+        values['committed'] = self.isCommitted(row)
+        return values
+
+    def isCommitted(self, row):
+        return bool(self._flags[row] & COMMITTED)
+
+    def texts(self, key):
+        """Decoded strings of a text or category column, looked up once per distinct id."""
+        table = np.array(self._table(key).strings, dtype=object)
+        return table[self.column(key)]
+
+    def total(self, key, mask=None):
+        values = self.column(key)
+        if mask is not None:
+            values = values[mask]
+        return int(values.sum())
+
+    # Writing
+
+    def set(self, row, key, value):
+        if key == 'committed':
+            self.setCommitted([row], value)
+            return
+        old = int(self._columns[key][row])
+        new = self._encode(key, value)
+        if old == new:
+            return
+        self._columns[key][row] = new
+        for listener in self.listeners:
+            listener.valueChanged(self, row, key, old, new)
+
+    def setValues(self, rows, key, values):
+        """Set key on many rows in one go, listeners hear about the rows that really changed once."""
+        rows = np.asarray(rows, dtype=np.int64)
+        dtype = self._columns[key].dtype
+        self.setEncoded(rows, key, np.fromiter((self._encode(key, value) for value in values), dtype=dtype,
+                                               count=len(rows)))
+
+    def setEncoded(self, rows, key, new):
+        """setValues for values that are already encoded (ids, cents, day numbers), e.g. undo."""
+        rows = np.asarray(rows, dtype=np.int64)
+        column = self._columns[key]
+        new = np.asarray(new, dtype=column.dtype)
+        old = column[rows]
+        changed = old != new
+        rows, old, new = rows[changed], old[changed], new[changed]
+        if not len(rows):
+            return
+        column[rows] = new
+        for listener in self.listeners:
+            listener.valuesChanged(self, rows, key, old, new)
+
+    def setCommitted(self, rows, committed=True):
+        rows = np.asarray(rows, dtype=np.int64)
+        # Only rows whose bit actually flips are reported
+        rows = rows[((self._flags[rows] & COMMITTED) != 0) != committed]
+        if not len(rows):
+            return
+        if committed:
+            self._flags[rows] |= COMMITTED
+        else:
+            self._flags[rows] &= ~np.uint8(COMMITTED)
+        for listener in self.listeners:
+            listener.committedChanged(self, rows, committed)
+
+    def appendRows(self, rows):
+        """Append a batch of decoded row dicts, missing keys fall back to the default row."""
+        first = self._size
+        self._reserve(first + len(rows))
+        for offset, values in enumerate(rows):
+            row = self.defaultRow()
+            row.update(values)
+            for key in self.keys:
+                self._columns[key][first + offset] = self._encode(key, row[key])
+            self._flags[first + offset] = COMMITTED if row['committed'] else 0
+        self._size += len(rows)
+        for listener in self.listeners:
+            listener.rowsAppended(self, first, len(rows))
+        return first
+
+    def appendColumns(self, columns, count):
+        """Append already encoded column arrays, columns that are missing get their default value."""
+        first = self._size
+        self._reserve(first + count)
+        defaults = self.defaultRow()
+        for key in self.keys:
+            target = self._columns[key][first:first + count]
+            if key in columns:
+                target[:] = columns[key]
+            else:
+                target[:] = self._encode(key, defaults[key])
+        self._flags[first:first + count] = columns.get('flags', 0)
+        self._size += count
+        for listener in self.listeners:
+            listener.rowsAppended(self, first, count)
+        return first
+
+    def removeRows(self, rows):
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        for listener in self.listeners:
+            listener.rowsRemoving(self, rows)
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        remaining = int(keep.sum())
+        for key, column in self._columns.items():
+            column[:remaining] = column[:self._size][keep]
+        self._flags[:remaining] = self._flags[:self._size][keep]
+        self._size = remaining
+
+    def permute(self, order):
+        """Reorder the rows so row i becomes the old row order[i]."""
+        order = np.asarray(order, dtype=np.int64)
+        for column in self._columns.values():
+            column[:self._size] = column[:self._size][order]
+        self._flags[:self._size] = self._flags[:self._size][order]
+        for listener in self.listeners:
+            listener.rowsPermuted(self, order)
+
+    def renameCategory(self, old, new):
+        """Relabel a category, rows store its id so none of them is rewritten."""
+        category_id = self.categories.ids.get(old)
+        if category_id is None or not old or old == new:
+            return False
+        self.categories.rename(category_id, new)
+        for listener in self.listeners:
+            listener.categoryRenamed(self, category_id, old, new)
+        return True
+
+    def snapshot(self):
+        """Detached copy of the rows and string tables, safe to hand to another thread."""
+        copy = Ledger(self.schema, max(self._size, 1))
+        copy.strings = self.strings.copy()
+        copy.categories = self.categories.copy()
+        for key in self.keys:
+            copy._columns[key][:self._size] = self.column(key)
+        copy._flags[:self._size] = self.column('flags')
+        copy._size = self._size
+        return copy
+
+    def replaceWith(self, other):
+        """Take over the rows of another ledger (e.g. one loaded on a worker thread), listeners stay attached."""
+        self.clear()
+        self.strings = other.strings
+        self.categories = other.categories
+        columns = {key: other.column(key) for key in other.keys}
+        columns['flags'] = other.column('flags')
+        self.appendColumns(columns, len(other))
+
+    def clear(self):
+        self._size = 0
+        self.strings = StringTable()
+        self.categories = StringTable()
+        for listener in self.listeners:
+            listener.cleared(self)
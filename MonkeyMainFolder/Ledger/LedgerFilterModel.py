@@ -0,0 +1,218 @@
+import time
+
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractProxyModel, QModelIndex, QPersistentModelIndex
+
+from MonkeyMainFolder.Ledger.LedgerIndex import LedgerIndex
+from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import normalizeName
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+
+class LedgerFilter:
+    """What a sheet is filtered on, every filter left at None (or an empty name) is off."""
+
+    def __init__(self, dates=None, categories=None, amounts=None, name=""):
+        self.dates = dates  # (first day, last day) as day numbers, either side may be None
+        self.categories = categories  # category texts a row may have
+        self.amounts = amounts  # (low, high) in cents, either side may be None
+        self.name = name  # text the name has to contain, any case
+
+    def isActive(self):
+        return (self.dates is not None or self.categories is not None or self.amounts is not None
+                or bool(self.name))
+
+
+class LedgerFilterModel(QAbstractProxyModel):
+    """Shows the rows of a LedgerTableModel that pass a LedgerFilter, in sheet order.
+
+    The visible rows are one sorted array of source rows: date and amount ranges are answered by the
+    LedgerIndex sorted indexes, categories and names by one bit per distinct category / string id,
+    so refiltering is a few vectorized passes instead of a Python call per row.
+    Edited rows stay visible until the filter changes, rows added while filtering are checked on insert.
+    """
+
+    def __init__(self, sourceModel, dateKey, amountKey, categoryKey, nameKey='name', parent=None):
+        super().__init__(parent)
+        self.ledger = sourceModel.ledger
+        self.ledgerIndex = LedgerIndex(self.ledger)
+        self.dateKey = dateKey
+        self.amountKey = amountKey
+        self.categoryKey = categoryKey
+        self.nameKey = nameKey
+        self.filter = LedgerFilter()
+        self.rows = np.arange(len(self.ledger))
+        self.removing = None
+        self.persistentSources = []
+
+        self.setSourceModel(sourceModel)
+        sourceModel.rowsInserted.connect(self._sourceRowsInserted)
+        sourceModel.rowsAboutToBeRemoved.connect(self._sourceRowsAboutToBeRemoved)
+        sourceModel.rowsRemoved.connect(self._sourceRowsRemoved)
+        sourceModel.dataChanged.connect(self._sourceDataChanged)
+        sourceModel.layoutAboutToBeChanged.connect(self._sourceLayoutAboutToBeChanged)
+        sourceModel.layoutChanged.connect(self._sourceLayoutChanged)
+        sourceModel.modelAboutToBeReset.connect(self.beginResetModel)
+        sourceModel.modelReset.connect(self._sourceModelReset)
+
+    # Filtering
+
+    def setFilter(self, ledgerFilter):
+        start = time.perf_counter()
+        self.beginResetModel()
+        self.filter = ledgerFilter
+        self.rows = self.matchingRows()
+        self.endResetModel()
+        recordTiming("filter", len(self.ledger), time.perf_counter() - start)
+
+    def clearFilter(self):
+        self.setFilter(LedgerFilter())
+
+    def matchingRows(self):
+        if not self.filter.isActive():
+            return np.arange(len(self.ledger))
+        return np.flatnonzero(self._accepted())
+
+    def _accepted(self, rows=None):
+        """One bool per row passing the filter, for the whole sheet or just rows."""
+        size = len(self.ledger) if rows is None else len(rows)
+
+        def column(key):
+            values = self.ledger.column(key)
+            return values if rows is None else values[rows]
+
+        mask = np.ones(size, dtype=bool)
+        for key, bounds in [(self.dateKey, self.filter.dates), (self.amountKey, self.filter.amounts)]:
+            if bounds is None:
+                continue
+            low, high = bounds
+            if rows is None:
+                inRange = np.zeros(size, dtype=bool)
+                inRange[self.ledgerIndex.rowsBetween(key, low, high)] = True
+            else:
+                values = column(key)
+                inRange = np.ones(size, dtype=bool)
+                if low is not None:
+                    inRange &= values >= low
+                if high is not None:
+                    inRange &= values <= high
+            mask &= inRange
+
+        if self.filter.categories is not None:
+            wanted = {normalizeName(text) for text in self.filter.categories}
+            strings = self.ledger.categories.strings
+            allowed = np.fromiter((normalizeName(text) in wanted for text in strings), dtype=bool, count=len(strings))
+            mask &= allowed[column(self.categoryKey)]
+
+        if self.filter.name:
+            needle = self.filter.name.casefold()
+            strings = self.ledger.strings.strings
+            allowed = np.fromiter((needle in text.casefold() for text in strings), dtype=bool, count=len(strings))
+            mask &= allowed[column(self.nameKey)]
+        return mask
+
+    def _proxyRange(self, first, last):
+        """Proxy rows showing source rows first..last, empty when none of them is visible."""
+        return (int(np.searchsorted(self.rows, first, side='left')),
+                int(np.searchsorted(self.rows, last, side='right')) - 1)
+
+    # Source model signals
+
+    def _sourceRowsInserted(self, parent, first, last):
+        # Rows are only ever appended, so passing ones go to the end of the proxy too
+        added = np.arange(first, last + 1)
+        if self.filter.isActive():
+            added = added[self._accepted(added)]
+        if not len(added):
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(added) - 1)
+        self.rows = np.concatenate([self.rows, added])
+        self.endInsertRows()
+
+    def _sourceRowsAboutToBeRemoved(self, parent, first, last):
+        proxyFirst, proxyLast = self._proxyRange(first, last)
+        self.removing = (proxyFirst, proxyLast) if proxyFirst <= proxyLast else None
+        if self.removing is not None:
+            self.beginRemoveRows(QModelIndex(), proxyFirst, proxyLast)
+
+    def _sourceRowsRemoved(self, parent, first, last):
+        proxyFirst, proxyLast = self._proxyRange(first, last)
+        after = self.rows[proxyLast + 1:] - (last - first + 1)
+        self.rows = np.concatenate([self.rows[:proxyFirst], after])
+        if self.removing is not None:
+            self.removing = None
+            self.endRemoveRows()
+
+    def _sourceDataChanged(self, topLeft, bottomRight, roles=()):
+        proxyFirst, proxyLast = self._proxyRange(topLeft.row(), bottomRight.row())
+        if proxyFirst <= proxyLast:
+            self.dataChanged.emit(self.index(proxyFirst, topLeft.column()),
+                                  self.index(proxyLast, bottomRight.column()), roles)
+
+    def _sourceLayoutAboutToBeChanged(self, *args):
+        self.layoutAboutToBeChanged.emit()
+        self.persistentSources = [(index, QPersistentModelIndex(self.mapToSource(index)))
+                                  for index in self.persistentIndexList()]
+
+    def _sourceLayoutChanged(self, *args):
+        # The sheet was sorted, the same rows pass but their source numbers moved
+        self.rows = self.matchingRows()
+        for index, source in self.persistentSources:
+            sourceIndex = self.sourceModel().index(source.row(), source.column())
+            self.changePersistentIndex(index, self.mapFromSource(sourceIndex))
+        self.persistentSources = []
+        self.layoutChanged.emit()
+
+    def _sourceModelReset(self):
+        self.rows = self.matchingRows()
+        self.endResetModel()
+
+    # Qt proxy interface
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.rows)) or not (0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.sourceModel().columnCount()
+
+    def mapToSource(self, proxyIndex):
+        if not proxyIndex.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxyIndex.row()]), proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex):
+        if not sourceIndex.isValid():
+            return QModelIndex()
+        row = int(np.searchsorted(self.rows, sourceIndex.row()))
+        if row >= len(self.rows) or self.rows[row] != sourceIndex.row():
+            return QModelIndex()
+        return self.index(row, sourceIndex.column())
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def sourceRow(self, row):
+        """Ledger row shown at proxy row, for handlers that get view indexes."""
+        return int(self.rows[row])
+
+    def selectedSourceRows(self, selection, wholeRows=False):
+        """Ledger rows of every view row a QItemSelection touches, or only the rows with every column
+        selected (what selectedRows() gives, without its per row range scans). Read range by range."""
+        columns = np.zeros(len(self.rows), dtype=np.uint32)
+        for selectionRange in selection:
+            bits = (1 << (selectionRange.right() + 1)) - (1 << selectionRange.left())
+            columns[selectionRange.top():selectionRange.bottom() + 1] |= bits
+        if wholeRows:
+            return self.rows[columns == (1 << self.columnCount()) - 1]
+        return self.rows[columns != 0]
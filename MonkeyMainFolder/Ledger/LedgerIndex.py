@@ -0,0 +1,107 @@
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener
+
+# Appends up to this many rows are merged into a built index, bigger ones drop it until it is needed again
+MERGE_ROWS = 64
+
+
+class SortedIndex:
+    """Row numbers of one column ordered by value, a range query is two binary searches."""
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind='stable')
+        self.values = values[self.order]
+
+    def rowsBetween(self, low=None, high=None):
+        """Rows whose value is within [low, high], None leaves that side open."""
+        first = 0 if low is None else np.searchsorted(self.values, low, side='left')
+        last = len(self.values) if high is None else np.searchsorted(self.values, high, side='right')
+        return self.order[first:last]
+
+    def move(self, row, old, new):
+        first = np.searchsorted(self.values, old, side='left')
+        last = np.searchsorted(self.values, old, side='right')
+        position = first + int(np.flatnonzero(self.order[first:last] == row)[0])
+        self.order = np.delete(self.order, position)
+        self.values = np.delete(self.values, position)
+        position = np.searchsorted(self.values, new, side='right')
+        self.order = np.insert(self.order, position, row)
+        self.values = np.insert(self.values, position, new)
+
+    def insert(self, rows, values):
+        # A batch comes in row order, not value order, sort it first so positions stay in order too
+        batchOrder = np.argsort(values, kind='stable')
+        rows = np.asarray(rows)[batchOrder]
+        values = np.asarray(values)[batchOrder]
+        positions = np.searchsorted(self.values, values, side='right')
+        self.order = np.insert(self.order, positions, rows)
+        self.values = np.insert(self.values, positions, values)
+
+    def remove(self, rows, size):
+        """Drop rows (sorted) from an index over size rows and renumber the ones after them."""
+        removed = np.zeros(size, dtype=bool)
+        removed[rows] = True
+        keep = ~removed[self.order]
+        renumber = np.arange(size) - np.cumsum(removed)
+        self.order = renumber[self.order[keep]]
+        self.values = self.values[keep]
+
+    def permute(self, order):
+        # Row i is now the old row order[i], the values themselves did not move in sort order
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        self.order = inverse[self.order]
+
+
+class LedgerIndex(LedgerListener):
+    """Sorted indexes over the range filtered columns of a ledger (dates, money).
+
+    An index is built the first time a filter asks for it and then kept in step with every edit,
+    so filtering a sheet never has to sort it again.
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.indexes = {}
+        ledger.addListener(self)
+
+    def index(self, key):
+        if key not in self.indexes:
+            self.indexes[key] = SortedIndex(self.ledger.column(key))
+        return self.indexes[key]
+
+    def rowsBetween(self, key, low=None, high=None):
+        return self.index(key).rowsBetween(low, high)
+
+    def verify(self):
+        """Check every built index against its column, raises AssertionError if one went out of order."""
+        for key, index in self.indexes.items():
+            assert len(index.order) == len(self.ledger), f"{key} index covers {len(index.order)} rows"
+            assert np.all(index.values[:-1] <= index.values[1:]), f"{key} index is out of order"
+            assert np.array_equal(self.ledger.column(key)[index.order], index.values), f"{key} index drifted"
+
+    # LedgerListener hooks
+
+    def rowsAppended(self, ledger, first, count):
+        if count > MERGE_ROWS:
+            self.indexes = {}
+            return
+        rows = np.arange(first, first + count)
+        for key, index in self.indexes.items():
+            index.insert(rows, ledger.column(key)[first:first + count])
+
+    def valueChanged(self, ledger, row, key, old, new):
+        if key in self.indexes:
+            self.indexes[key].move(row, old, new)
+
+    def rowsRemoving(self, ledger, rows):
+        for index in self.indexes.values():
+            index.remove(rows, len(ledger))
+
+    def rowsPermuted(self, ledger, order):
+        for index in self.indexes.values():
+            index.permute(order)
+
+    def cleared(self, ledger):
+        self.indexes = {}
@@ -0,0 +1,366 @@
+import contextlib
+
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QDate
+from PyQt6.QtGui import QBrush, QColor
+
+from MonkeyMainFolder.Ledger.Ledger import CATEGORY, DATE, MONEY, centsFromText, textFromCents
+
+COMMITTED_BRUSH = QBrush(QColor("green"))
+HIGHLIGHT_BRUSH = QBrush(QColor("yellow"))
+
+# Sorting remembers this many columns, the latest one decides and the older ones break its ties
+MAX_SORT_KEYS = 3
+
+
+class LedgerTableModel(QAbstractTableModel):
+    """Qt view of a Ledger, cells are decoded from the ledger columns only when the view asks for them."""
+
+    # Filled in by the sheet models, one ledger key per column ('committed' is the commit button)
+    HEADERS = []
+    COLUMN_KEYS = []
+    # Columns painted as buttons and handled on click, never edited in place
+    BUTTON_KEYS = ['receipt', 'committed']
+
+    def __init__(self, ledger, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self.sortKeys = []  # [(column, order)], primary key first
+        self.highlights = {}  # ledger key -> bool per row, cells painted as search hits
+        self.undoStack = None  # set by UndoStack.watch()
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.ledger)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.HEADERS[section]
+            return str(section + 1)
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        key = self.COLUMN_KEYS[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if key == 'committed':
+                return "Committed" if self.ledger.isCommitted(row) else "Commit"
+            elif key == 'receipt':
+                return "Yes" if self.ledger.get(row, key) else "No"
+            kind = self.ledger.kinds[key]
+            if kind == DATE:
+                return QDate.fromJulianDay(self.ledger.get(row, key)).toString("dd/MM/yyyy")
+            elif kind == MONEY:
+                return textFromCents(self.ledger.get(row, key))
+            return self.ledger.get(row, key)
+
+        elif role == Qt.ItemDataRole.EditRole:
+            if key in self.BUTTON_KEYS:
+                return None
+            kind = self.ledger.kinds[key]
+            if kind == DATE:
+                return QDate.fromJulianDay(self.ledger.get(row, key))
+            elif kind == MONEY:
+                return textFromCents(self.ledger.get(row, key))
+            return self.ledger.get(row, key)
+
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if key in self.ledger.kinds and self.ledger.kinds[key] == MONEY:
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            if key == 'committed' and self.ledger.isCommitted(row):
+                return COMMITTED_BRUSH
+            if key == 'receipt' and self.ledger.get(row, key):
+                return COMMITTED_BRUSH
+            highlighted = self.highlights.get(key)
+            if highlighted is not None and row < len(highlighted) and highlighted[row]:
+                return HIGHLIGHT_BRUSH
+
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+
+        row = index.row()
+        key = self.COLUMN_KEYS[index.column()]
+
+        if self.ledger.isCommitted(row) or key in self.BUTTON_KEYS:
+            return False
+
+        kind = self.ledger.kinds[key]
+        if kind == DATE:
+            if isinstance(value, str):
+                value = QDate.fromString(value, "dd/MM/yyyy")
+            if not value.isValid():
+                return False
+            value = value.toJulianDay()
+        elif kind == MONEY:
+            try:
+                value = centsFromText(value)
+            except ValueError:
+                return False
+        else:
+            value = str(value)
+
+        self.ledger.set(row, key, value)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+
+        flags = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+        if self.COLUMN_KEYS[index.column()] in self.BUTTON_KEYS:
+            return flags
+        if self.ledger.isCommitted(index.row()):
+            return flags
+        return flags | Qt.ItemFlag.ItemIsEditable
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        # New rows always go to the end of the ledger
+        row = self.rowCount()
+        self.beginInsertRows(parent, row, row + count - 1)
+        self.ledger.appendRows([{} for _ in range(count)])
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row + count > self.rowCount():
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        self.ledger.removeRows(range(row, row + count))
+        self.endRemoveRows()
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Stable sort on column, rows it ties on stay in the order of the previous sorts."""
+        self.sortKeys = ([(column, order)] + [sortKey for sortKey in self.sortKeys if sortKey[0] != column])
+        self.sortKeys = self.sortKeys[:MAX_SORT_KEYS]
+        self.permuteRows(self.sortPermutation(self.sortKeys))
+
+    def permuteRows(self, ordering):
+        """Reorder the sheet so row i becomes the old row ordering[i], the view only relayouts."""
+        ordering = np.asarray(ordering, dtype=np.int64)
+        self.layoutAboutToBeChanged.emit()
+        self.ledger.permute(ordering)
+        # Row i is now the old row ordering[i], move selections and open editors along with their rows
+        newRows = np.empty_like(ordering)
+        newRows[ordering] = np.arange(len(ordering))
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(int(newRows[index.row()]), index.column())
+                                                    for index in persistent])
+        self.layoutChanged.emit()
+
+    def sortByColumn(self, column):
+        """Header double click: sort ascending, or descending when column is already sorted ascending."""
+        order = Qt.SortOrder.AscendingOrder
+        if self.sortKeys and self.sortKeys[0] == (column, Qt.SortOrder.AscendingOrder):
+            order = Qt.SortOrder.DescendingOrder
+        self.sort(column, order)
+        return order
+
+    def sortValues(self, key):
+        """Integer sort key of every row: day numbers, cents, or the alphabetical rank of a text/category id."""
+        if key == 'committed':
+            return self.ledger.committedMask().astype(np.int64)
+        kind = self.ledger.kinds[key]
+        if kind in [DATE, MONEY]:
+            return self.ledger.column(key).astype(np.int64)
+        # Only the distinct strings are compared, the rows are ranked through their ids.
+        # Texts differing in case or padding share a rank so they keep their previous order.
+        texts = [text.strip().casefold() for text in self.ledger._table(key).strings]
+        rankOf = {text: rank for rank, text in enumerate(sorted(set(texts)))}
+        ranks = np.fromiter((rankOf[text] for text in texts), dtype=np.int64, count=len(texts))
+        return ranks[self.ledger.column(key)]
+
+    def sortPermutation(self, sortKeys):
+        """Stable row order for [(column, order), ...], the first key is the primary one."""
+        keys = []
+        # lexsort treats its last key as the primary one
+        for column, order in reversed(sortKeys):
+            values = self.sortValues(self.COLUMN_KEYS[column])
+            keys.append(-values if order == Qt.SortOrder.DescendingOrder else values)
+        return np.lexsort(keys)
+
+    # Sheet helpers used by the panels and the menu functions
+
+    def appendRow(self, **values):
+        row = self.rowCount()
+        self.appendRows([values])
+        return row
+
+    def appendRows(self, rows):
+        """Append a batch of row dicts, missing keys fall back to the ledger's default row."""
+        if not rows:
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.ledger.appendRows(rows)
+        self.endInsertRows()
+
+    def appendColumns(self, columns, count):
+        """Append already encoded ledger columns as one batch, the view is told about it once."""
+        if count <= 0:
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self.ledger.appendColumns(columns, count)
+        self.endInsertRows()
+
+    def restoreRows(self, rows, columns):
+        """Put removed rows back at their old row numbers: append them, then move them into place."""
+        rows = np.asarray(rows, dtype=np.int64)
+        existing = self.rowCount()
+        self.appendColumns(columns, len(rows))
+        restored = np.zeros(existing + len(rows), dtype=bool)
+        restored[rows] = True
+        ordering = np.empty(existing + len(rows), dtype=np.int64)
+        ordering[restored] = np.arange(existing, existing + len(rows))
+        ordering[~restored] = np.arange(existing)
+        self.permuteRows(ordering)
+
+    def removeRowList(self, rows):
+        """Remove any set of rows with one ledger compaction.
+
+        One run of neighbouring rows is an ordinary row removal. Scattered rows are dropped together
+        and announced as one layout change, so the views, the filter and every ledger listener hear
+        about the whole selection once instead of once per run.
+        """
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[(rows >= 0) & (rows < self.rowCount())]
+        if not len(rows):
+            return
+        if rows[-1] - rows[0] + 1 == len(rows):
+            self.removeRows(int(rows[0]), len(rows))
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        kept = np.ones(self.rowCount(), dtype=bool)
+        kept[rows] = False
+        newRows = np.cumsum(kept) - 1
+        persistent = self.persistentIndexList()
+        self.ledger.removeRows(rows)
+        self.changePersistentIndexList(persistent, [
+            self.index(int(newRows[index.row()]), index.column()) if kept[index.row()] else QModelIndex()
+            for index in persistent])
+        self.layoutChanged.emit()
+
+    def clear(self):
+        self.beginResetModel()
+        self.sortKeys = []
+        with self.untracked():
+            self.ledger.clear()
+        self.endResetModel()
+
+    def replaceLedger(self, other):
+        """Swap in rows loaded elsewhere, the view is reset once."""
+        self.beginResetModel()
+        self.sortKeys = []
+        with self.untracked():
+            self.ledger.replaceWith(other)
+        self.endResetModel()
+
+    def undoMacro(self, text):
+        """Every change made inside the with block is undone and redone as one step."""
+        if self.undoStack is None:
+            return contextlib.nullcontext()
+        return self.undoStack.macro(text)
+
+    def untracked(self):
+        """Changes made inside the with block are not undoable (new file, open)."""
+        if self.undoStack is None:
+            return contextlib.nullcontext()
+        return self.undoStack.paused()
+
+    def renameCategory(self, old, new):
+        if not self.ledger.renameCategory(old, new):
+            return
+        for column, key in enumerate(self.COLUMN_KEYS):
+            if self.ledger.kinds.get(key) == CATEGORY:
+                self.dataChanged.emit(self.index(0, column), self.index(self.rowCount() - 1, column))
+
+    def rowValues(self, row):
+        return self.ledger.rowValues(row)
+
+    def value(self, row, key):
+        return self.ledger.get(row, key)
+
+    def setValue(self, row, key, value):
+        self.ledger.set(row, key, value)
+        index = self.index(row, self.COLUMN_KEYS.index(key))
+        self.dataChanged.emit(index, index)
+
+    def setValues(self, rows, key, values):
+        """Set one column of many rows as one change, the view is told once."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self.ledger.setValues(rows, key, values)
+        column = self.COLUMN_KEYS.index(key)
+        self.dataChanged.emit(self.index(int(rows.min()), column), self.index(int(rows.max()), column))
+
+    def setEncodedValues(self, rows, key, values):
+        """setValues with encoded values (ids, cents, day numbers), used by undo."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self.ledger.setEncoded(rows, key, values)
+        column = self.COLUMN_KEYS.index(key)
+        self.dataChanged.emit(self.index(int(rows.min()), column), self.index(int(rows.max()), column))
+
+    def setCommittedRows(self, rows, committed=True):
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        self.ledger.setCommitted(rows, committed)
+        self.dataChanged.emit(self.index(int(rows.min()), 0),
+                              self.index(int(rows.max()), self.columnCount() - 1))
+
+    def setHighlights(self, highlights):
+        """Paint the cells of {key: bool per row} as search hits, {} clears them."""
+        if not highlights and not self.highlights:
+            return
+        self.highlights = highlights
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1),
+                                  [Qt.ItemDataRole.BackgroundRole])
+
+    def isCommitted(self, row):
+        return self.ledger.isCommitted(row)
+
+    def commitRows(self, rows=None):
+        """Commit the rows (every row when None) that have a name and aren't committed yet.
+
+        One flip of the committed bits: one totals update, one undo step and one dataChanged range.
+        Returns the rows that were committed.
+        """
+        rows = np.arange(self.rowCount()) if rows is None else np.asarray(rows, dtype=np.int64)
+        strings = self.ledger.strings.strings
+        named = np.fromiter((bool(text.strip()) for text in strings), dtype=bool, count=len(strings))
+        rows = rows[~self.ledger.committedMask()[rows] & named[self.ledger.column('name')[rows]]]
+        self.setCommittedRows(rows)
+        return rows
+
+    def commitRow(self, row):
+        if self.ledger.isCommitted(row):
+            return False
+        self.ledger.setCommitted([row])
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
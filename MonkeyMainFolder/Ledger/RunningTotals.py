@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener
+
+# Set MONKEY_VERIFY_TOTALS=1 to recompute every total from scratch after each change and assert they agree
+VERIFY_TOTALS = os.environ.get('MONKEY_VERIFY_TOTALS', '') not in ['', '0']
+
+
+class RunningTotals(LedgerListener):
+    """Total, committed total and per category subtotals of a money column, kept up to date by deltas.
+
+    Every ledger change only adds or subtracts the cents it touched, so reading a total is O(1)
+    no matter how big the sheet is.
+    """
+
+    def __init__(self, ledger, amountKey, categoryKey, verify=None):
+        self.ledger = ledger
+        self.amountKey = amountKey
+        self.categoryKey = categoryKey
+        self.verifyEnabled = VERIFY_TOTALS if verify is None else verify
+        self.rebuild()
+        ledger.addListener(self)
+
+    def rebuild(self):
+        """Recompute every accumulator with one pass over the ledger columns."""
+        self.total, self.committedTotal, self.categoryTotals, self.categoryCommitted = self._scan()
+
+    def _scan(self):
+        amounts = self.ledger.column(self.amountKey)
+        categories = self.ledger.column(self.categoryKey)
+        committed = self.ledger.committedMask()
+
+        categoryTotals = self._sumByCategory(categories, amounts)
+        categoryCommitted = self._sumByCategory(categories[committed], amounts[committed])
+        return int(amounts.sum()), int(amounts[committed].sum()), categoryTotals, categoryCommitted
+
+    @staticmethod
+    def _sumByCategory(categories, amounts):
+        sums = {}
+        if len(categories):
+            # bincount works on floats, which is exact for cents far beyond any sheet total
+            for category, total in enumerate(np.bincount(categories, weights=amounts)):
+                if total:
+                    sums[category] = int(total)
+        return sums
+
+    def _apply(self, categories, amounts, committed, sign):
+        """Add (sign=1) or subtract (sign=-1) a batch of rows from every accumulator."""
+        if len(amounts) > 64:
+            # Big batches (file loads, pastes, bulk deletes) are summed as whole columns
+            self.total += sign * int(amounts.sum())
+            self.committedTotal += sign * int(amounts[committed].sum())
+            for category, amount in self._sumByCategory(categories, amounts).items():
+                self.categoryTotals[category] = self.categoryTotals.get(category, 0) + sign * amount
+            for category, amount in self._sumByCategory(categories[committed], amounts[committed]).items():
+                self.categoryCommitted[category] = self.categoryCommitted.get(category, 0) + sign * amount
+            return
+
+        for category, amount, isCommitted in zip(categories.tolist(), amounts.tolist(), committed.tolist()):
+            self.total += sign * amount
+            self.categoryTotals[category] = self.categoryTotals.get(category, 0) + sign * amount
+            if isCommitted:
+                self.committedTotal += sign * amount
+                self.categoryCommitted[category] = self.categoryCommitted.get(category, 0) + sign * amount
+
+    def verify(self):
+        """Compare the running totals with a full recompute, raises AssertionError if they drifted."""
+        total, committedTotal, categoryTotals, categoryCommitted = self._scan()
+        assert self.total == total, f"total {self.total} != {total}"
+        assert self.committedTotal == committedTotal, f"committed total {self.committedTotal} != {committedTotal}"
+
+        def nonZero(sums):
+            return {category: value for category, value in sums.items() if value}
+
+        assert nonZero(self.categoryTotals) == categoryTotals, "category totals drifted"
+        assert nonZero(self.categoryCommitted) == categoryCommitted, "committed category totals drifted"
+
+    def _checked(self):
+        if self.verifyEnabled:
+            self.verify()
+
+    # LedgerListener hooks
+
+    def rowsAppended(self, ledger, first, count):
+        rows = slice(first, first + count)
+        self._apply(ledger.column(self.categoryKey)[rows], ledger.column(self.amountKey)[rows],
+                    ledger.committedMask()[rows], 1)
+        self._checked()
+
+    def valueChanged(self, ledger, row, key, old, new):
+        if key == self.amountKey:
+            category = int(ledger.column(self.categoryKey)[row])
+            delta = new - old
+            self.total += delta
+            self.categoryTotals[category] = self.categoryTotals.get(category, 0) + delta
+            if ledger.isCommitted(row):
+                self.committedTotal += delta
+                self.categoryCommitted[category] = self.categoryCommitted.get(category, 0) + delta
+        elif key == self.categoryKey:
+            amount = int(ledger.column(self.amountKey)[row])
+            self.categoryTotals[old] = self.categoryTotals.get(old, 0) - amount
+            self.categoryTotals[new] = self.categoryTotals.get(new, 0) + amount
+            if ledger.isCommitted(row):
+                self.categoryCommitted[old] = self.categoryCommitted.get(old, 0) - amount
+                self.categoryCommitted[new] = self.categoryCommitted.get(new, 0) + amount
+        self._checked()
+
+    def committedChanged(self, ledger, rows, committed):
+        sign = 1 if committed else -1
+        amounts = ledger.column(self.amountKey)[rows]
+        categories = ledger.column(self.categoryKey)[rows]
+        self.committedTotal += sign * int(amounts.sum())
+        for category, amount in self._sumByCategory(categories, amounts).items():
+            self.categoryCommitted[category] = self.categoryCommitted.get(category, 0) + sign * amount
+        self._checked()
+
+    def rowsRemoving(self, ledger, rows):
+        self._apply(ledger.column(self.categoryKey)[rows], ledger.column(self.amountKey)[rows],
+                    ledger.committedMask()[rows], -1)
+        # The rows are still in the ledger here, verification runs on the next change
+
+    def cleared(self, ledger):
+        self.total = 0
+        self.committedTotal = 0
+        self.categoryTotals = {}
+        self.categoryCommitted = {}
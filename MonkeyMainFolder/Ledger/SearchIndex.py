@@ -0,0 +1,107 @@
+import bisect
+import os
+
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TableIndex:
+    """Inverted index over the distinct strings of one StringTable: trigram -> ids and word -> ids.
+
+    String tables only ever grow, so update() indexes just the strings added since the last search.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.indexed = 0
+        self.grams = {}
+        self.words = {}
+        self.sortedWords = []
+
+    def update(self):
+        strings = self.table.strings
+        if self.indexed == len(strings):
+            return
+        for string_id in range(self.indexed, len(strings)):
+            folded = strings[string_id].casefold()
+            for gram in trigrams(folded):
+                self.grams.setdefault(gram, []).append(string_id)
+            for word in set(folded.split()):
+                self.words.setdefault(word, []).append(string_id)
+        self.indexed = len(strings)
+        self.sortedWords = sorted(self.words)
+
+    def candidates(self, needle):
+        """Ids of the strings that may contain needle (already casefolded)."""
+        self.update()
+        if len(needle) >= 3:
+            postings = sorted((self.grams.get(gram, []) for gram in trigrams(needle)), key=len)
+            found = set(postings[0])
+            for posting in postings[1:]:
+                found.intersection_update(posting)
+            return found
+        # Too short for trigrams, match the words it starts
+        found = set()
+        first = bisect.bisect_left(self.sortedWords, needle)
+        for word in self.sortedWords[first:]:
+            if not word.startswith(needle):
+                break
+            found.update(self.words[word])
+        return found
+
+
+class SearchIndex(LedgerListener):
+    """Find over the text and category columns of a ledger.
+
+    Matching is done once per distinct string (through TableIndex) and turned into a per row mask with
+    one gather per column, so a search costs the same whether a name appears in one row or in a million.
+    Receipts are matched on their file name only.
+    """
+
+    def __init__(self, ledger, keys):
+        self.ledger = ledger
+        self.keys = list(keys)
+        self.indexes = {}
+        ledger.addListener(self)
+
+    def _index(self, table):
+        index = self.indexes.get(id(table))
+        if index is None or index.table is not table:
+            # The ledger swapped its tables (new file, open), start over for this one
+            index = TableIndex(table)
+            self.indexes[id(table)] = index
+        return index
+
+    @staticmethod
+    def searchText(key, text):
+        return os.path.basename(text).casefold() if key == 'receipt' else text.casefold()
+
+    def find(self, text, keys=None):
+        """{key: bool per row} for every searched column with at least one cell containing text, any case."""
+        needle = text.strip().casefold()
+        if not needle:
+            return {}
+        hits = {}
+        for key in keys or self.keys:
+            table = self.ledger._table(key)
+            allowed = np.zeros(len(table), dtype=bool)
+            for string_id in self._index(table).candidates(needle):
+                if needle in self.searchText(key, table.text(string_id)):
+                    allowed[string_id] = True
+            if allowed.any():
+                hits[key] = allowed[self.ledger.column(key)]
+        return hits
+
+    # LedgerListener hooks
+
+    def categoryRenamed(self, ledger, category_id, old, new):
+        # Renames are rare, the category table is small enough to index again
+        self.indexes.pop(id(ledger.categories), None)
+
+    def cleared(self, ledger):
+        self.indexes = {}
@@ -0,0 +1,295 @@
+import contextlib
+import os
+import time
+
+import numpy as np
+
+from MonkeyMainFolder.Ledger.Ledger import LedgerListener
+
+# Undo history is trimmed from the oldest step once its deltas take more than this many MB,
+# set MONKEY_UNDO_BUDGET_MB to change it
+UNDO_BUDGET_MB = float(os.environ.get('MONKEY_UNDO_BUDGET_MB', '64'))
+# Edits of the same cell closer together than this are undone as one step
+COALESCE_SECONDS = 1.0
+
+
+def _nbytes(columns):
+    return sum(values.nbytes for values in columns.values())
+
+
+class SetCommand:
+    """One column of some rows went from old to new (encoded values)."""
+
+    def __init__(self, model, rows, key, old, new):
+        self.model = model
+        self.rows = rows
+        self.key = key
+        self.old = old
+        self.new = new
+        self.time = time.monotonic()
+        self.text = "Edit"
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.old.nbytes + self.new.nbytes
+
+    def coalesce(self, other):
+        """Fold a later edit of the same single cell into this one, True if it was taken."""
+        if (not isinstance(other, SetCommand) or other.model is not self.model or other.key != self.key
+                or len(self.rows) != 1 or len(other.rows) != 1 or other.rows[0] != self.rows[0]
+                or other.time - self.time > COALESCE_SECONDS):
+            return False
+        self.new = other.new
+        self.time = other.time
+        return True
+
+    def undo(self):
+        self.model.setEncodedValues(self.rows, self.key, self.old)
+
+    def redo(self):
+        self.model.setEncodedValues(self.rows, self.key, self.new)
+
+
+class CommitCommand:
+    def __init__(self, model, rows, committed):
+        self.model = model
+        self.rows = rows
+        self.committed = committed
+        self.text = "Commit" if committed else "Uncommit"
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes
+
+    def undo(self):
+        self.model.setCommittedRows(self.rows, not self.committed)
+
+    def redo(self):
+        self.model.setCommittedRows(self.rows, self.committed)
+
+
+class AppendCommand:
+    """Rows added at the end, their encoded columns are kept so redo can add them again."""
+
+    def __init__(self, model, first, columns):
+        self.model = model
+        self.first = first
+        self.columns = columns
+        self.count = len(columns['flags'])
+        self.text = "Add Rows"
+
+    @property
+    def nbytes(self):
+        return _nbytes(self.columns)
+
+    def undo(self):
+        self.model.removeRows(self.first, self.count)
+
+    def redo(self):
+        self.model.appendColumns(self.columns, self.count)
+
+
+class RemoveCommand:
+    """Rows removed from anywhere, kept with their row numbers so undo puts them back in place."""
+
+    def __init__(self, model, rows, columns):
+        self.model = model
+        self.rows = rows
+        self.columns = columns
+        self.text = "Delete Rows"
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + _nbytes(self.columns)
+
+    def merge(self, other):
+        """Take in a removal made right after this one, so a selection deleted run by run is restored at once."""
+        if not isinstance(other, RemoveCommand) or other.model is not self.model:
+            return False
+        # other's row numbers count only the rows this removal left, turn them back into the old numbers
+        size = int(max(other.rows.max(), 0)) + len(self.rows) + 1
+        survivors = np.delete(np.arange(size), self.rows[self.rows < size])
+        rows = np.concatenate([self.rows, survivors[other.rows]])
+        order = np.argsort(rows, kind='stable')
+        self.rows = rows[order]
+        self.columns = {key: np.concatenate([values, other.columns[key]])[order]
+                        for key, values in self.columns.items()}
+        return True
+
+    def undo(self):
+        self.model.restoreRows(self.rows, self.columns)
+
+    def redo(self):
+        self.model.removeRowList(self.rows)
+
+
+class PermuteCommand:
+    def __init__(self, model, order):
+        self.model = model
+        self.order = order
+        self.text = "Sort"
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes
+
+    def undo(self):
+        inverse = np.empty_like(self.order)
+        inverse[self.order] = np.arange(len(self.order))
+        self.model.permuteRows(inverse)
+
+    def redo(self):
+        self.model.permuteRows(self.order)
+
+
+class MacroCommand:
+    """Several commands undone and redone as one step (paste, delete selection, commit all)."""
+
+    def __init__(self, text, commands):
+        self.text = text
+        self.commands = commands
+
+    @property
+    def nbytes(self):
+        return sum(command.nbytes for command in self.commands)
+
+    def undo(self):
+        for command in reversed(self.commands):
+            command.undo()
+
+    def redo(self):
+        for command in self.commands:
+            command.redo()
+
+
+class UndoStack(LedgerListener):
+    """Undo/redo for every sheet it watches, recorded from the ledger changes themselves.
+
+    Each step keeps only the delta of what changed (encoded old/new values, removed rows, a row order),
+    never a copy of the sheet, and steps go through the sheet model so the views update in place.
+    Opening or starting a new file clears the history.
+    """
+
+    def __init__(self, budgetMB=UNDO_BUDGET_MB):
+        self.budget = int(budgetMB * 1024 * 1024)
+        self.models = {}
+        self.undoCommands = []
+        self.redoCommands = []
+        self.used = 0  # bytes held by undoCommands
+        self.macroText = None
+        self.macroCommands = []
+        self.macroDepth = 0
+        self.applying = False
+
+    def watch(self, model):
+        model.undoStack = self
+        self.models[id(model.ledger)] = model
+        model.ledger.addListener(self)
+
+    def canUndo(self):
+        return bool(self.undoCommands)
+
+    def canRedo(self):
+        return bool(self.redoCommands)
+
+    def clearHistory(self):
+        self.undoCommands = []
+        self.redoCommands = []
+        self.used = 0
+
+    @contextlib.contextmanager
+    def macro(self, text):
+        self.macroDepth += 1
+        if self.macroDepth == 1:
+            self.macroText = text
+            self.macroCommands = []
+        try:
+            yield
+        finally:
+            self.macroDepth -= 1
+            if self.macroDepth == 0 and self.macroCommands:
+                commands = self.macroCommands
+                self.macroCommands = []
+                self._push(commands[0] if len(commands) == 1 else MacroCommand(self.macroText, commands))
+
+    @contextlib.contextmanager
+    def paused(self):
+        applying = self.applying
+        self.applying = True
+        try:
+            yield
+        finally:
+            self.applying = applying
+
+    def undo(self):
+        if not self.undoCommands:
+            return None
+        command = self.undoCommands.pop()
+        self.used -= command.nbytes
+        with self.paused():
+            command.undo()
+        self.redoCommands.append(command)
+        return command.text
+
+    def redo(self):
+        if not self.redoCommands:
+            return None
+        command = self.redoCommands.pop()
+        with self.paused():
+            command.redo()
+        self.undoCommands.append(command)
+        self.used += command.nbytes
+        return command.text
+
+    def _record(self, command):
+        if self.applying:
+            return
+        if self.macroDepth:
+            if isinstance(command, RemoveCommand) and self.macroCommands:
+                if isinstance(self.macroCommands[-1], RemoveCommand) and self.macroCommands[-1].merge(command):
+                    return
+            self.macroCommands.append(command)
+            return
+        self._push(command)
+
+    def _push(self, command):
+        self.redoCommands = []
+        if self.undoCommands and isinstance(command, SetCommand) and isinstance(self.undoCommands[-1], SetCommand):
+            last = self.undoCommands[-1]
+            before = last.nbytes
+            if last.coalesce(command):
+                self.used += last.nbytes - before
+                return
+        self.undoCommands.append(command)
+        self.used += command.nbytes
+        # Drop the oldest steps until the history fits the budget, the newest step always stays
+        while self.used > self.budget and len(self.undoCommands) > 1:
+            self.used -= self.undoCommands.pop(0).nbytes
+
+    # LedgerListener hooks
+
+    def valueChanged(self, ledger, row, key, old, new):
+        dtype = ledger.column(key).dtype
+        self._record(SetCommand(self.models[id(ledger)], np.array([row], dtype=np.int64), key,
+                                np.array([old], dtype=dtype), np.array([new], dtype=dtype)))
+
+    def valuesChanged(self, ledger, rows, key, old, new):
+        self._record(SetCommand(self.models[id(ledger)], rows.copy(), key, old.copy(), new.copy()))
+
+    def committedChanged(self, ledger, rows, committed):
+        self._record(CommitCommand(self.models[id(ledger)], rows.copy(), committed))
+
+    def rowsAppended(self, ledger, first, count):
+        columns = {key: ledger.column(key)[first:first + count].copy() for key in ledger.keys + ['flags']}
+        self._record(AppendCommand(self.models[id(ledger)], first, columns))
+
+    def rowsRemoving(self, ledger, rows):
+        columns = {key: ledger.column(key)[rows] for key in ledger.keys + ['flags']}
+        self._record(RemoveCommand(self.models[id(ledger)], rows.copy(), columns))
+
+    def rowsPermuted(self, ledger, order):
+        self._record(PermuteCommand(self.models[id(ledger)], order.copy()))
+
+    def cleared(self, ledger):
+        # Recorded ids point into the string tables that were just dropped
+        self.clearHistory()
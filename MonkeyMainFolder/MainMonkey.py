@@ -1,10 +1,15 @@
 import sys
+
+# First, so the startup trace (MONKEY_TRACE_STARTUP=1 or --trace-startup) times every other import
+from MonkeyMainFolder.Settings.StartupTrace import startupTrace
 from PyQt6.QtWidgets import QApplication
 
 from MonkeyMainFolder.MonkeyApplication import MyWindow
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    window = MyWindow()
+    with startupTrace.phase("MyWindow"):
+        window = MyWindow()
     window.show()
+    startupTrace.mark("window shown")
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,16 +1,22 @@
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QIcon, QPixmap, QBrush, QPalette
 from PyQt6.QtWidgets import QMenuBar, QMenu, QSplitter, QTabWidget, QLabel, QVBoxLayout, QWidget, \
     QMessageBox
 from qframelesswindow import FramelessWindow, StandardTitleBar, AcrylicWindow
+from MonkeyMainFolder.Budget.BudgetEngine import BudgetEngine
+from MonkeyMainFolder.Budget.Cashflow import CashflowSeries
+from MonkeyMainFolder.Budget.LazyBudgetPanel import LazyBudgetPanel, prewarmBudgetPanel
 from MonkeyMainFolder.Budget.ConditionalStatements import ConditionalStatements
 from MonkeyMainFolder.Expenses.ExpensePanel import ExpensePanel
 from MonkeyMainFolder.Income.IncomePanel import IncomePanel
 from MonkeyMainFolder.Settings.SignalBroker import SignalBroker
+from MonkeyMainFolder.Settings.StartupTrace import startupTrace
 from Settings.MainMonkeyMenuFunctions import MainMonkeyMenuFunctions
 from Settings.Shortcuts import Shortcuts
 from Settings.ProgramSettings import ProgramSettings
-from Budget.BudgetPanel import BudgetPanel
+
+# The charting stack starts importing in the background this long after the window first shows
+PREWARM_DELAY_MS = 500
 
 
 class CustomTitleBar(StandardTitleBar):
@@ -73,6 +79,7 @@ class CustomTitleBar(StandardTitleBar):
 
         # File Menu Actions
         openAction = QAction("Open", self)
+        importAction = QAction("Import Statements", self)
         newAction = QAction("New", self)
         saveAction = QAction("Save", self)
         saveAsAction = QAction("Save As", self)
@@ -82,6 +89,7 @@ class CustomTitleBar(StandardTitleBar):
 
         # Set shortcuts
         openAction.setShortcut(Shortcuts.OPEN)
+        importAction.setShortcut(Shortcuts.IMPORT)
         newAction.setShortcut(Shortcuts.NEW)
         saveAction.setShortcut(Shortcuts.SAVE)
         saveAsAction.setShortcut(Shortcuts.SAVE_AS)
@@ -90,6 +98,7 @@ class CustomTitleBar(StandardTitleBar):
 
         exitAction.triggered.connect(self.menuFunctions.onExitTriggered)
         openAction.triggered.connect(self.menuFunctions.openFile)
+        importAction.triggered.connect(self.menuFunctions.importBankStatements)
         saveAction.triggered.connect(self.menuFunctions.saveFile)
         saveAsAction.triggered.connect(self.menuFunctions.saveFileAs)
         newAction.triggered.connect(self.menuFunctions.newFile)
@@ -100,6 +109,7 @@ class CustomTitleBar(StandardTitleBar):
         fileMenu.addAction(newAction)
         fileMenu.addSeparator()
         fileMenu.addAction(openAction)
+        fileMenu.addAction(importAction)
         fileMenu.addSeparator()
         fileMenu.addAction(saveAction)
         fileMenu.addAction(saveAsAction)
@@ -126,7 +136,14 @@ class CustomTitleBar(StandardTitleBar):
         copyEdit.setShortcut(Shortcuts.COPY)
         pasteEdit.setShortcut(Shortcuts.PASTE)
         selectAllEdit.setShortcut(Shortcuts.SELECT_ALL)
-        # Must create a findExpense.setShortcut.
+        findExpense.setShortcut(Shortcuts.FIND)
+        findExpense.triggered.connect(self.menuFunctions.findReplace)
+        undoEdit.triggered.connect(self.menuFunctions.undo)
+        redoEdit.triggered.connect(self.menuFunctions.redo)
+        cutEdit.triggered.connect(self.menuFunctions.cut)
+        copyEdit.triggered.connect(self.menuFunctions.copy)
+        pasteEdit.triggered.connect(self.menuFunctions.paste)
+        selectAllEdit.triggered.connect(self.menuFunctions.selectAll)
 
         editMenu.addAction(undoEdit)
         editMenu.addAction(redoEdit)
@@ -200,8 +217,10 @@ class MyWindow(FramelessWindow):
         centralWidget = QWidget()  # Create a central widget
         centralWidget.setLayout(mainLayout)  # Set the layout to the central widget
 
-        self.expensePanel = ExpensePanel(None, self.broker)
-        self.incomePanel = IncomePanel()
+        with startupTrace.phase("ExpensePanel"):
+            self.expensePanel = ExpensePanel(None, self.broker)
+        with startupTrace.phase("IncomePanel"):
+            self.incomePanel = IncomePanel()
 
         splitter = CustomSplitter(Qt.Orientation.Vertical, self)
         splitter.addWidget(self.expensePanel)
@@ -216,8 +235,16 @@ class MyWindow(FramelessWindow):
         palette.setBrush(QPalette.ColorRole.Window, brush)
         splitter.setPalette(palette)
         tabWidget.addTab(splitter, "Expenses & Income")
-        self.budget = BudgetPanel()
-        self.Conditional = ConditionalStatements()
+        self.cashflow = CashflowSeries(self.incomePanel.cube, self.expensePanel.cube)
+        # The charts are built the first time the Budget tab is shown
+        self.budget = LazyBudgetPanel(self.cashflow)
+        # Budgets are evaluated live against the expense sheet
+        self.budgetEngine = BudgetEngine(self.expensePanel.cube)
+        with startupTrace.phase("ConditionalStatements"):
+            self.Conditional = ConditionalStatements(self.expensePanel.categoryManager, self.budgetEngine)
+        self.budget.panelCreated.connect(lambda panel: panel.conditionalStatementsBtn.clicked.connect(
+            self.Conditional.show))
+        self.prewarmed = False
         tabWidget.addTab(self.budget, "Budget")
 
         layout = QVBoxLayout(self)
@@ -226,6 +253,26 @@ class MyWindow(FramelessWindow):
         self.setGeometry(100, 100, 990, 700)
         self.titleBar.raise_()
 
+        # Recovers an unsaved session and starts the autosave journal, needs both panels
+        self.menuFunctions.startJournal()
+        self.menuFunctions.startUndo()
+
+    def closeEvent(self, event):
+        super().closeEvent(event)
+        if event.isAccepted():
+            self.menuFunctions.onWindowClosed()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Startup ends with the first paint, the trace (when enabled) writes its report here
+        startupTrace.finish()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.prewarmed:
+            self.prewarmed = True
+            QTimer.singleShot(PREWARM_DELAY_MS, prewarmBudgetPanel)
+
     def moveEvent(self, event):
         super().moveEvent(event)
         current_screen = self.screen()
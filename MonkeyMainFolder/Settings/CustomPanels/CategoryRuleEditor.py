@@ -0,0 +1,133 @@
+import re
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
+                             QComboBox, QHeaderView, QMessageBox, QLabel)
+
+from MonkeyMainFolder.FileIO.CategoryRules import CategoryRule, RuleManager, MATCH_KINDS, ANY_NAME
+from MonkeyMainFolder.Ledger.Ledger import centsFromText, textFromCents
+
+CATEGORY_COLUMN, MATCH_COLUMN, TEXT_COLUMN, LOW_COLUMN, HIGH_COLUMN = range(5)
+
+
+class CategoryRuleEditor(QWidget):
+    """Settings page for the expense categorization rules, the first rule that matches a row wins."""
+
+    def __init__(self, filepath, categoryManager, signal_broker=None):
+        super().__init__()
+        self.signal_broker = signal_broker
+        self.categoryManager = categoryManager
+        self.ruleManager = RuleManager()
+        self.ruleManager.initialize(filepath)
+
+        self.table = QTableWidget(0, 5, self)
+        self.table.setHorizontalHeaderLabels(["Category", "Match", "Text", "Min Amount", "Max Amount"])
+        self.table.horizontalHeader().setSectionResizeMode(TEXT_COLUMN, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+
+        addButton = QPushButton("Add Rule")
+        removeButton = QPushButton("Remove Rule")
+        upButton = QPushButton("Move Up")
+        downButton = QPushButton("Move Down")
+        saveButton = QPushButton("Save")
+        addButton.clicked.connect(lambda: self.addRuleRow(CategoryRule("")))
+        removeButton.clicked.connect(self.removeRuleRow)
+        upButton.clicked.connect(lambda: self.moveRuleRow(-1))
+        downButton.clicked.connect(lambda: self.moveRuleRow(1))
+        saveButton.clicked.connect(self.saveRules)
+
+        buttons = QHBoxLayout()
+        for button in [addButton, removeButton, upButton, downButton]:
+            buttons.addWidget(button)
+        buttons.addStretch(1)
+        buttons.addWidget(saveButton)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Rows opened, pasted or imported without a known type get the category of the "
+                                "first rule they match. Text is matched ignoring case, amounts are inclusive."))
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+        for rule in self.ruleManager.rules:
+            self.addRuleRow(rule)
+
+    def addRuleRow(self, rule):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        categoryBox = QComboBox()
+        categoryBox.addItems([""] + [text.strip() for text in self.categoryManager.dropdownLookup().values()])
+        if categoryBox.findText(rule.category) < 0:
+            # A category removed since the rule was made is still shown, the rule is skipped until it comes back
+            categoryBox.addItem(rule.category)
+        categoryBox.setCurrentText(rule.category)
+        matchBox = QComboBox()
+        matchBox.addItems(MATCH_KINDS)
+        matchBox.setCurrentText(rule.match)
+        self.table.setCellWidget(row, CATEGORY_COLUMN, categoryBox)
+        self.table.setCellWidget(row, MATCH_COLUMN, matchBox)
+        self.table.setItem(row, TEXT_COLUMN, QTableWidgetItem(rule.text))
+        for column, cents in [(LOW_COLUMN, rule.low), (HIGH_COLUMN, rule.high)]:
+            self.table.setItem(row, column, QTableWidgetItem("" if cents is None else textFromCents(cents)))
+
+    def removeRuleRow(self):
+        row = self.table.currentRow()
+        if row >= 0:
+            self.table.removeRow(row)
+
+    def moveRuleRow(self, step):
+        row = self.table.currentRow()
+        target = row + step
+        if row < 0 or not 0 <= target < self.table.rowCount():
+            return
+        rules = self.tableRules()
+        rules[row], rules[target] = rules[target], rules[row]
+        self.showRules(rules)
+        self.table.setCurrentCell(target, TEXT_COLUMN)
+
+    def showRules(self, rules):
+        self.table.setRowCount(0)
+        for rule in rules:
+            self.addRuleRow(rule)
+
+    def cellText(self, row, column):
+        item = self.table.item(row, column)
+        return item.text().strip() if item is not None else ""
+
+    def tableRules(self):
+        rules = []
+        for row in range(self.table.rowCount()):
+            amounts = [self.cellText(row, column) for column in [LOW_COLUMN, HIGH_COLUMN]]
+            low, high = [centsFromText(text) if text else None for text in amounts]
+            rules.append(CategoryRule(self.table.cellWidget(row, CATEGORY_COLUMN).currentText(),
+                                      self.table.cellWidget(row, MATCH_COLUMN).currentText(),
+                                      self.cellText(row, TEXT_COLUMN), low, high))
+        return rules
+
+    def ruleProblems(self, rules):
+        problems = []
+        for number, rule in enumerate(rules, start=1):
+            if not rule.category:
+                problems.append(f"Rule {number} has no category.")
+            if rule.match != ANY_NAME and not rule.text:
+                problems.append(f"Rule {number} has no text to match.")
+            if rule.match == ANY_NAME and not rule.hasAmount():
+                problems.append(f"Rule {number} would match every row, give it an amount range.")
+            try:
+                rule.namePattern()
+            except re.error as e:
+                problems.append(f"Rule {number}: {e}")
+        return problems
+
+    def saveRules(self):
+        try:
+            rules = self.tableRules()
+        except ValueError:
+            QMessageBox.warning(self, "Category Rules", "Amounts must be numbers like 12.50.")
+            return
+        problems = self.ruleProblems(rules)
+        if problems:
+            QMessageBox.warning(self, "Category Rules", '\n'.join(problems))
+            return
+        self.ruleManager.setRules(rules)
+        self.ruleManager.saveRules()
+        if self.signal_broker:
+            self.signal_broker.global_rules_saved.emit()
@@ -7,15 +7,43 @@ import os
 from PyQt6.QtCore import Qt, pyqtSignal, QObject
 
 
+# Id of "no category", real categories start at 1
+NO_CATEGORY = 0
+
+
+def normalizeName(name):
+    """Key categories are matched on, so "  Food " and "food" are the same category."""
+    return " ".join(str(name).split()).casefold()
+
+
 class CategoryManager(QObject):
     cats_saved = pyqtSignal()
+    category_renamed = pyqtSignal(int, str, str)  # id, old dropdown text, new dropdown text
 
     def __init__(self):
         super().__init__()
         self.filepath = None
-        self.categories = {}
         self.original_categories = {}
 
+        # Every category gets an integer id that is never reused, it survives reloads and renames.
+        # names/parents/children are indexed by id, parents holds NO_CATEGORY for top level categories.
+        self.names = [""]
+        self.parents = [NO_CATEGORY]
+        self.children = [[]]
+        self.topLevel = []
+        self.keys = {}  # (normalized name, parent id) -> id for every category seen so far
+        self.index = {}  # normalized name -> id for the categories currently in the tree
+        self._categories = {}
+
+    @property
+    def categories(self):
+        return self._categories
+
+    @categories.setter
+    def categories(self, categories):
+        self._categories = categories
+        self._reindex()
+
     def initialize(self, filepath):
         self.filepath = filepath
         if not os.path.exists(self.filepath):
@@ -37,15 +65,97 @@ class CategoryManager(QObject):
     def loadCats(self):
         try:
             with open(self.filepath, 'r') as f:
-                self.categories = json.load(f)
+                self.setCategories(json.load(f))
         except Exception as e:
             print(" ")
 
+    def setCategories(self, categories):
+        """Replace the whole tree, a category that only changed its name keeps its id.
+
+        A name that is new at the same place (same parent, same position) where a name disappeared is
+        taken as a rename: category_renamed is emitted and rows stored by id need no rewrite.
+        """
+        previous = {}
+        for position, parent_id in enumerate(self.topLevel):
+            previous[(position, None)] = parent_id
+            for child_position, child_id in enumerate(self.children[parent_id]):
+                previous[(position, child_position)] = child_id
+        kept = {normalizeName(category) for category in categories}
+        kept.update(normalizeName(sub) for subs in categories.values() for sub in subs)
+
+        renames = []
+        for position, (category, subcategories) in enumerate(categories.items()):
+            parent_id = self._renamed(category, NO_CATEGORY, previous.get((position, None)), kept, renames)
+            for child_position, subcategory in enumerate(subcategories):
+                self._renamed(subcategory, parent_id, previous.get((position, child_position)), kept, renames)
+
+        self.categories = categories
+        for category_id, old_text in renames:
+            self.category_renamed.emit(category_id, old_text, self.displayText(category_id))
+
+    def _renamed(self, name, parent_id, old_id, kept, renames):
+        """Id for name under parent_id, reusing old_id when name replaced it in place."""
+        key = (normalizeName(name), parent_id)
+        if key in self.keys or old_id is None or normalizeName(self.names[old_id]) in kept:
+            return self._intern(name, parent_id)
+        old_text = self.displayText(old_id)
+        del self.keys[(normalizeName(self.names[old_id]), self.parents[old_id])]
+        self.keys[key] = old_id
+        self.names[old_id] = name
+        renames.append((old_id, old_text))
+        return old_id
+
+    def _intern(self, name, parent_id):
+        key = (normalizeName(name), parent_id)
+        category_id = self.keys.get(key)
+        if category_id is None:
+            category_id = len(self.names)
+            self.names.append(name)
+            self.parents.append(parent_id)
+            self.children.append([])
+            self.keys[key] = category_id
+        else:
+            self.names[category_id] = name
+        return category_id
+
+    def _reindex(self):
+        self.children = [[] for _ in self.names]
+        self.topLevel = []
+        self.index = {}
+        for category, subcategories in self._categories.items():
+            parent_id = self._intern(category, NO_CATEGORY)
+            self.topLevel.append(parent_id)
+            self.index.setdefault(normalizeName(category), parent_id)
+            for subcategory in subcategories:
+                child_id = self._intern(subcategory, parent_id)
+                self.children[parent_id].append(child_id)
+                self.index.setdefault(normalizeName(subcategory), child_id)
+
+    def lookup(self, name):
+        """Id of the category called name (any case or spacing), None if it isn't in the tree. O(1)."""
+        return self.index.get(normalizeName(name))
+
+    def displayText(self, category_id):
+        """Text shown in the Type dropdowns and stored in the sheets, subcategories are indented."""
+        if self.parents[category_id] == NO_CATEGORY:
+            return self.names[category_id]
+        return f"  {self.names[category_id]}"
+
+    def isSelectable(self, category_id):
+        # A category with subcategories is only a heading in the dropdown
+        return self.parents[category_id] != NO_CATEGORY or not self.children[category_id]
+
+    def dropdownLookup(self):
+        """Normalized name -> dropdown text of every category a row can have, safe to hand to another thread."""
+        return {key: self.displayText(category_id) for key, category_id in self.index.items()
+                if self.isSelectable(category_id)}
+
     def backupCategories(self):
         self.original_categories = self.categories.copy()
 
     def addCategory(self, name, sub_categories=[]):
         self.categories[name] = sub_categories
+        self._reindex()
 
     def addCategories(self, categories):
         if isinstance(categories, list):
@@ -53,6 +163,7 @@ class CategoryManager(QObject):
             self.categories.update(new_categories)
         elif isinstance(categories, dict):
             self.categories.update(categories)
+        self._reindex()
         self.saveCats()
 
     def getCategories(self):
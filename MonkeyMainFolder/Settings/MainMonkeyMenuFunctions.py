@@ -1,11 +1,22 @@
+import contextlib
 import os
+import time
 
 import pandas as pd
-from PyQt6.QtCore import QDate, Qt
-from PyQt6.QtGui import QStandardItemModel, QStandardItem
-from PyQt6.QtWidgets import QMessageBox, QFileDialog, QComboBox, QDateEdit, QPushButton, QTableWidgetItem
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QMessageBox, QFileDialog, QProgressDialog
 
-from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import CategoryManager
+from MonkeyMainFolder.FileIO.BankImport import STATEMENT_FILE_FILTER, StatementCategorizer, importStatements
+from MonkeyMainFolder.FileIO.FileJobs import saveJob, loadJob, importJob, waitForFileJobs
+from MonkeyMainFolder.FileIO.Journal import Journal, findRecovery
+from MonkeyMainFolder.FileIO.MonkeyFormat import SHEET_SCHEMAS
+from MonkeyMainFolder.FileIO.SheetClipboard import copyText, pasteColumns
+from MonkeyMainFolder.Ledger.FindReplaceDialog import FindReplaceDialog, SearchSheet
+from MonkeyMainFolder.Ledger.UndoStack import UndoStack
+from MonkeyMainFolder.Settings.PerfLog import recordTiming
+
+# .monkey is the native format, xlsx and csv stay available for import and export
+SHEET_FILE_FILTER = "Monkey Files (*.monkey);;Excel Files (*.xlsx);;CSV Files (*.csv);;All Files (*)"
 
 
 class MainMonkeyMenuFunctions:
@@ -17,12 +28,153 @@ class MainMonkeyMenuFunctions:
         self.main_window = window
         self.current_file_path = None
         self.is_dirty = False
+        self.journal = None
+        self.findDialog = None
+        self.undoStack = UndoStack()
+
+        # Running or queued file jobs -> (progress dialog, called with the result on the GUI thread)
+        self.jobs = {}
+        self.broker = window.broker
+        self.broker.file_job_progress.connect(self._onJobProgress)
+        self.broker.file_job_finished.connect(self._onJobFinished)
+        self.broker.file_job_failed.connect(self._onJobFailed)
+        self.broker.file_job_cancelled.connect(self._onJobCancelled)
 
     def markDirty(self):
         self.is_dirty = True
 
+    def startUndo(self):
+        """Record every sheet change from here on for Edit > Undo/Redo (needs the panels)."""
+        self.undoStack.watch(self.main_window.expensePanel.expenseModel)
+        self.undoStack.watch(self.main_window.incomePanel.incomeModel)
+
+    def undo(self):
+        self.undoStack.undo()
+
+    def redo(self):
+        self.undoStack.redo()
+
+    def focusedTable(self):
+        """The sheet table the Edit menu acts on, the income table only when it has the focus."""
+        incomeTable = self.main_window.incomePanel.incomeTable
+        if incomeTable.hasFocus() or incomeTable.isAncestorOf(incomeTable.focusWidget()):
+            return incomeTable
+        return self.main_window.expensePanel.expenseTable
+
+    def selectAll(self):
+        self.focusedTable().selectAll()
+
+    def focusedSheetName(self):
+        return 'income' if self.focusedTable() is self.main_window.incomePanel.incomeTable else 'expenses'
+
+    def copy(self):
+        """Edit > Copy, the selected cells of the focused sheet as tab separated rows."""
+        table = self.focusedTable()
+        indexes = table.selectionModel().selectedIndexes()
+        if not indexes:
+            return
+        filterModel = table.model()
+        model = filterModel.sourceModel()
+        # The selection's bounding box in view order, the filter keeps rows in sheet order
+        rows = filterModel.rows[sorted({index.row() for index in indexes})]
+        keys = [model.COLUMN_KEYS[column] for column in sorted({index.column() for index in indexes})]
+        QApplication.clipboard().setText(copyText(model.ledger, rows, keys))
+
+    def cut(self):
+        """Edit > Cut, copy the selected cells, then delete their rows as one undo step.
+        Committed expenses go through the same dialog as Delete."""
+        table = self.focusedTable()
+        filterModel = table.model()
+        rows = filterModel.selectedSourceRows(table.selectionModel().selection())
+        if not len(rows):
+            return
+        self.copy()
+        expensePanel = self.main_window.expensePanel
+        panel = expensePanel if table is expensePanel.expenseTable else self.main_window.incomePanel
+        with filterModel.sourceModel().undoMacro("Cut"):
+            panel.deleteRows(rows)
+        panel.updateTotalLabels()
+
+    def paste(self):
+        """Edit > Paste, rows copied from a spreadsheet (tab separated) or CSV text.
+
+        Every pasted row is added in one batch: one insert for the views, one totals update and
+        one undo step. A single value is pasted into the current cell instead.
+        """
+        text = QApplication.clipboard().text()
+        if not text.strip():
+            return
+        table = self.focusedTable()
+        filterModel = table.model()
+        model = filterModel.sourceModel()
+
+        value = text.strip("\r\n")
+        current = table.currentIndex()
+        if current.isValid() and "\t" not in value and "\n" not in value:
+            if filterModel.flags(current) & Qt.ItemFlag.ItemIsEditable:
+                filterModel.setData(current, value)
+            return
+
+        start = time.perf_counter()
+        expensePanel = self.main_window.expensePanel
+        columns, count, non_matching, problems = pasteColumns(text, self.focusedSheetName(), model.ledger,
+                                                              expensePanel.categoryManager.dropdownLookup(),
+                                                              expensePanel.categoryRules())
+        if count:
+            with model.undoMacro("Paste"):
+                model.appendColumns(columns, count)
+            table.scrollToBottom()
+        recordTiming("paste", count, time.perf_counter() - start)
+
+        if problems:
+            QMessageBox.warning(self.main_window, "Paste Warnings", '\n'.join(problems))
+        self._offerNonMatching(non_matching)
+
+    def findReplace(self):
+        """Edit > Find/Replace, one dialog for both sheets that stays open next to them."""
+        if self.findDialog is None:
+            expensePanel = self.main_window.expensePanel
+            incomePanel = self.main_window.incomePanel
+            sheets = [SearchSheet("Expenses", expensePanel.expenseModel, expensePanel.expenseFilter,
+                                  expensePanel.expenseTable, expensePanel.searchIndex),
+                      SearchSheet("Income", incomePanel.incomeModel, incomePanel.incomeFilter,
+                                  incomePanel.incomeTable, incomePanel.searchIndex)]
+            self.findDialog = FindReplaceDialog(sheets, self.main_window)
+        self.findDialog.show()
+        self.findDialog.raise_()
+        self.findDialog.findEdit.setFocus()
+
+    def sheetLedgers(self):
+        """Every sheet that is saved and loaded together, by its name in the file."""
+        return {'expenses': self.main_window.expensePanel.ledger, 'income': self.main_window.incomePanel.ledger}
+
+    def startJournal(self):
+        """Offer to recover an unsaved session, then journal every change from here on (needs the panels)."""
+        expensePanel = self.main_window.expensePanel
+        incomePanel = self.main_window.incomePanel
+
+        try:
+            recovered = findRecovery(SHEET_SCHEMAS)
+        except Exception as e:
+            print("Could not read the autosave: ", e)
+            recovered = None
+
+        if recovered is not None:
+            reply = QMessageBox().question(None, 'Recover Unsaved Changes?',
+                                           "TheMonkeyTracker closed with unsaved changes. Do you wish to recover them?",
+                                           QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.Yes:
+                sheets, self.current_file_path = recovered
+                expensePanel.expenseModel.replaceLedger(sheets['expenses'])
+                incomePanel.incomeModel.replaceLedger(sheets['income'])
+                self.is_dirty = True
+
+        self.journal = Journal(self.broker, self.sheetLedgers(), onChange=self.markDirty)
+        self.journal.markSaved(self.current_file_path, saved=not self.is_dirty)
+
     def newFile(self):
-        row_count = self.main_window.expensePanel.expenseTable.rowCount()
+        row_count = (self.main_window.expensePanel.expenseModel.rowCount() +
+                     self.main_window.incomePanel.incomeModel.rowCount())
 
         if row_count > 0 and self.current_file_path and self.current_file_path != "New File":
             file_name_with_extension = os.path.basename(self.current_file_path)
@@ -49,8 +201,12 @@ class MainMonkeyMenuFunctions:
             elif reply == QMessageBox.StandardButton.Yes:
                 self.saveFileAs()
 
-        self.main_window.expensePanel.expenseTable.setRowCount(0)
+        self.main_window.expensePanel.expenseModel.clear()
+        self.main_window.incomePanel.incomeModel.clear()
         self.current_file_path = None
+        self.is_dirty = False
+        if self.journal is not None:
+            self.journal.discard()
 
     def openFile(self):
         if self.current_file_path == "New File":
@@ -77,117 +233,71 @@ class MainMonkeyMenuFunctions:
                 self.saveFile()
 
         options = QFileDialog.Option.ReadOnly
-        filePath, _ = QFileDialog.getOpenFileName(self.main_window, "Open Excel File", "",
-                                                  "Excel Files (*.xlsx);;All Files (*)", options=options)
+        filePath, _ = QFileDialog.getOpenFileName(self.main_window, "Open File", "",
+                                                  SHEET_FILE_FILTER, options=options)
         if filePath:
-            try:
-                df = pd.read_excel(filePath, engine='openpyxl')
-                # Populate the data into your UI components
-                self._populate_table_from_df(df)
-                self.current_file_path = filePath
-            except Exception as e:
-                QMessageBox.critical(self.main_window, "Error", str(e))
-
-    def _populate_table_from_df(self, df):
-        # Instantiate CategoryManager
-        categoryManager = CategoryManager()
-        categoryManager.initialize(
-            "C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings/JSONS/expensesEditor.json")
-
-        # Create an empty list to hold non-matching expenses
-        non_matching_expenses = []
-
-        table = self.main_window.expensePanel.expenseTable
-        table.setRowCount(0)
-
-        categories = categoryManager.getCategories()  # fetch categories from the JSON file
-        table = self.main_window.expensePanel.expenseTable
-        table.setRowCount(0)
-
-        for index, row in df.iterrows():
-            table.insertRow(index)
-            for col, value in enumerate(row):
-                # Category comparison logic
-
-                if col == 0:
-                    store_value = value
-
-                    # Create a QComboBox and populate it with hierarchical categories
-                    combo = QComboBox()
-                    model = QStandardItemModel()
-
-                    # Used to find the index of the matching item later
-                    index_to_select = -1
-                    current_index = 0
-
-                    for category, subcategories in categories.items():
-                        category_item = QStandardItem(category)
-                        if subcategories:  # If there are subcategories
-                            category_item.setSelectable(False)
-                            category_item.setEnabled(False)
-                        else:  # If there are no subcategories
-                            category_item.setSelectable(True)
-                            category_item.setEnabled(True)
-                        model.appendRow(category_item)
-                        current_index += 1
-
-                        for subcategory in subcategories:
-                            subcategory_item = QStandardItem(f"  {subcategory}")
-                            model.appendRow(subcategory_item)
-
-                            # Check if the store_value matches this subcategory
-                            if store_value.strip() == subcategory.strip():
-                                index_to_select = current_index
-
-                            current_index += 1
-                    combo.setMaxVisibleItems(30)
-                    combo.setModel(model)
-
-                    if index_to_select >= 0:
-                        combo.setCurrentIndex(index_to_select)
-                    else:
-                        non_matching_expenses.append(store_value)
-
-                    table.setCellWidget(index, col, combo)
-
-                elif col in [3, 4]:  # Assuming these are the Due Date and Audit Date columns
-                    date_edit = QDateEdit()
-                    date = QDate.fromString(value, "yyyy-MM-dd")
-                    date_edit.setDate(date)
-                    table.setCellWidget(index, col, date_edit)
-                elif col == 5:  # Assuming this is the Receipt column
-                    button = QPushButton("Yes" if value != " " else "No", table)
-                    if value != " ":
-                        button.receipt_path = value
-                        button.setStyleSheet("background-color: green;")
-                        button.clicked.connect(
-                            lambda _, b=button: self.main_window.expensePanel.receiptButtonClicked(b))
-                    else:
-                        button.clicked.connect(lambda _, b=button: self.main_window.expensePanel.receiptButtonClicked(
-                            b))  # This connects the button to the same function when there's no receipt, but you can
-                        # adjust as needed
-                    table.setCellWidget(index, col, button)
-                elif col == 6:  # Assuming this is the "Total" column
-                    item = QTableWidgetItem()
-                    item.setText(f"{value:.2f}")
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight)
-                    table.setItem(index, col, item)
-                elif col == 7:  # Assuming this is the Commit column
-                    button = QPushButton(value, table)
-                    if value == "Committed":
-                        button.setStyleSheet("background-color: green;")
-                        button.setEnabled(False)
-                    else:  # If not committed, connect the button to the commit function
-                        button.clicked.connect(lambda _, b=button: self.main_window.expensePanel.commitButtonClicked(b))
-                    table.setCellWidget(index, col, button)
-                else:
-                    table.setItem(index, col, QTableWidgetItem(str(value)))
-
-            commit_button = table.cellWidget(index, 7)
-            if commit_button and commit_button.text() == "Committed":
-                self._disable_row_editing(table, index)
-
-        # Check if there are any non-matching expenses
+            expensePanel = self.main_window.expensePanel
+            job = loadJob(self.broker, filePath, expensePanel.categoryManager.dropdownLookup(),
+                          expensePanel.categoryRules())
+            self._startJob(job, lambda result: self._populate_table_from_loaded(filePath, result))
+
+    def _populate_table_from_loaded(self, filePath, result):
+        sheets, non_matching_expenses, problems = result
+        expensePanel = self.main_window.expensePanel
+        incomePanel = self.main_window.incomePanel
+
+        # The sheets were converted on the worker thread, swapping each in is one model reset.
+        # The journal skips the loaded rows, markSaved below takes them as its new base
+        with self.journal.paused() if self.journal is not None else contextlib.nullcontext():
+            for table, model, name in [(expensePanel.expenseTable, expensePanel.expenseModel, 'expenses'),
+                                       (incomePanel.incomeTable, incomePanel.incomeModel, 'income')]:
+                table.setUpdatesEnabled(False)
+                try:
+                    model.replaceLedger(sheets[name])
+                finally:
+                    table.setUpdatesEnabled(True)
+        self.current_file_path = filePath
+        self.is_dirty = False
+        if self.journal is not None:
+            self.journal.markSaved(filePath)
+
+        if problems:
+            QMessageBox.warning(self.main_window, "Import Warnings", '\n'.join(problems))
+
+        self._offerNonMatching(non_matching_expenses)
+
+    def importBankStatements(self):
+        """File > Import Statements, adds the transactions of CSV, OFX and QIF bank statements to the sheets."""
+        filePaths, _ = QFileDialog.getOpenFileNames(self.main_window, "Import Bank Statements", "",
+                                                    STATEMENT_FILE_FILTER)
+        if filePaths:
+            self._startJob(importJob(self.broker, filePaths), self._addImported)
+
+    def _addImported(self, result):
+        statements, problems = result
+        expensePanel = self.main_window.expensePanel
+        incomePanel = self.main_window.incomePanel
+        sheets = self.sheetLedgers()
+        categorizer = StatementCategorizer(expensePanel.categoryManager.dropdownLookup(), sheets['expenses'],
+                                           expensePanel.categoryRules())
+        imported, skipped = importStatements(statements, sheets, categorizer)
+
+        # Both sheets take their rows in one batch each, undone as one step
+        with expensePanel.expenseModel.undoMacro("Import Statements"):
+            for model, name in [(expensePanel.expenseModel, 'expenses'), (incomePanel.incomeModel, 'income')]:
+                model.appendColumns(*imported[name])
+
+        expenses, income = imported['expenses'][1], imported['income'][1]
+        message = f"Imported {expenses} expenses and {income} incomes."
+        if skipped:
+            message += f"\n{skipped} transactions were already in the sheets and were skipped."
+        if problems:
+            message += "\n\n" + '\n'.join(problems)
+        QMessageBox.information(self.main_window, "Import Statements", message)
+
+    def _offerNonMatching(self, non_matching_expenses):
+        """Show expense types that matched no category and offer to add them."""
+        expensePanel = self.main_window.expensePanel
         if non_matching_expenses:
             # Create a dialog to show non-matching expenses
             msg = QMessageBox()
@@ -201,21 +311,7 @@ class MainMonkeyMenuFunctions:
 
             if retval == QMessageBox.StandardButton.Apply:
                 # Add non-matching expenses to JSON
-                categoryManager.addCategories(non_matching_expenses)
-
-    def _disable_row_editing(self, table, row):
-        """Disable editing for all cells in a specific row, except the Receipt column."""
-        for col in range(table.columnCount()):
-            if col == 5:  # Skip the Receipt column
-                continue
-
-            item = table.item(row, col)
-            if item:
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-            widget = table.cellWidget(row, col)
-            if widget:
-                widget.setEnabled(False)
+                expensePanel.categoryManager.addCategories(non_matching_expenses)
 
     def saveFile(self):
         # If the current file path exists, save directly to it.
@@ -224,125 +320,97 @@ class MainMonkeyMenuFunctions:
         else:
             # If the current file path doesn't exist, open a Save As dialog.
             self.saveFileAs()
-        self.is_dirty = False
 
     def saveFileAs(self):
-        filePath, _ = QFileDialog.getSaveFileName(self.main_window, "Save Excel File", "",
-                                                  "Excel Files (*.xlsx);;All Files (*)")
+        filePath, _ = QFileDialog.getSaveFileName(self.main_window, "Save File", "", SHEET_FILE_FILTER)
         if filePath:
+            if not os.path.splitext(filePath)[1]:
+                filePath += ".monkey"
             self._saveToFile(filePath)
             self.current_file_path = filePath  # Update the current file path
 
     def _saveToFile(self, filePath):
         if not filePath:
-            filePath, _ = QFileDialog.getSaveFileName(self.main_window, "Save Excel File", "",
-                                                      "Excel Files (*.xlsx);;All Files (*)")
+            filePath, _ = QFileDialog.getSaveFileName(self.main_window, "Save File", "",
+                                                      SHEET_FILE_FILTER)
         if filePath:
-            try:
-                expense_table = self.main_window.expensePanel.expenseTable
-
-                rows = expense_table.rowCount()
-                columns = expense_table.columnCount()
-
-                data = []
-
-                for row in range(rows):
-                    row_data = []
-                    for column in range(columns):
-
-                        # Transaction Type
-                        if column == 0:
-                            widget = expense_table.cellWidget(row, column)
-                            if isinstance(widget, QComboBox):
-                                row_data.append(widget.currentText())
-                            else:
-                                row_data.append(" ")
-
-                        # Name, Summary
-                        elif column in [1, 2]:
-                            item = expense_table.item(row, column)
-                            row_data.append(item.text() if item else " ")
-
-                        # Due Date, Audit Date
-                        elif column in [3, 4]:
-                            date_widget = expense_table.cellWidget(row, column)
-                            if isinstance(date_widget, QDateEdit):
-                                row_data.append(date_widget.date().toString("yyyy-MM-dd"))
-                            else:
-                                row_data.append(" ")
-
-                        # Receipts
-                        elif column == 5:
-                            button = expense_table.cellWidget(row, column)
-                            if button and button.text() == "Yes" and hasattr(button, 'receipt_path'):
-                                receipt_path = button.receipt_path
-                                print(receipt_path)  # Printing the path for verification
-                                row_data.append(receipt_path)
-                            else:
-                                row_data.append(" ")
-                        elif column == 7:
-                            button = expense_table.cellWidget(row, column)
-                            if button:
-                                row_data.append(button.text())
-                            else:
-                                row_data.append(" ")
-                        # Total, Commit
-                        else:
-                            item = expense_table.item(row, column)
-                            row_data.append(item.text() if item else " ")
-
-                    data.append(row_data)
-
-                df = pd.DataFrame(data,
-                                  columns=["Transaction Type", "Name", "Summary", "Due Date", "Audit Date", "Receipt",
-                                           "Total", "Commit"])
-                df.to_excel(filePath, engine='openpyxl', index=False)
-
-            except Exception as e:
-                QMessageBox.critical(self.main_window, "Error", str(e))
+            # The ledger is snapshotted here, the rows are streamed to disk on the file worker thread.
+            # Edits made while it runs mark the sheet dirty again.
+            job = saveJob(self.broker, self.sheetLedgers(), filePath)
+            self.is_dirty = False
+            self._startJob(job, lambda written: self._onSaved(filePath))
+
+    def _onSaved(self, filePath):
+        if self.journal is not None and filePath == self.current_file_path:
+            self.journal.markSaved(filePath, saved=not self.is_dirty)
+
+    # File jobs
+
+    def _startJob(self, job, onFinished):
+        progress = QProgressDialog(job.description, "Cancel", 0, 0, self.main_window)
+        progress.setWindowTitle("TheMonkeyTracker")
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(job.cancel)
+        self.jobs[job] = (progress, onFinished)
+        job.start()
+
+    def _endJob(self, job):
+        progress, onFinished = self.jobs.pop(job, (None, None))
+        if progress is not None:
+            progress.canceled.disconnect(job.cancel)
+            progress.close()
+            progress.deleteLater()
+        return onFinished
+
+    def _onJobProgress(self, job, done, total):
+        if job in self.jobs:
+            progress, _ = self.jobs[job]
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+    def _onJobFinished(self, job, result):
+        onFinished = self._endJob(job)
+        if onFinished is not None:
+            onFinished(result)
+
+    def _onJobFailed(self, job, message):
+        if self._endJob(job) is not None:
+            # Whatever this job was saving is still only in memory and the journal
+            self.is_dirty = True
+            QMessageBox.critical(self.main_window, "Error", message)
+        else:
+            print(f"{job.description} failed: {message}")
+
+    def _onJobCancelled(self, job):
+        if self._endJob(job) is not None:
+            # _saveToFile marks the sheets clean when it starts, a cancelled save left them only in memory
+            self.is_dirty = True
+        print(f"{job.description} was cancelled")
 
     def _create_df_from_table(self):
-        # Extract data from ExpensePanel table to create a pandas DataFrame
-        table = self.main_window.expensePanel.expenseTable
-        column_labels = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount())]
+        # Extract data from the ExpensePanel model to create a pandas DataFrame
+        model = self.main_window.expensePanel.expenseModel
+        column_labels = [model.headerData(i, Qt.Orientation.Horizontal) for i in range(model.columnCount())]
         data = []
-        for row in range(table.rowCount()):
+        for row in range(model.rowCount()):
             row_data = []
-            for col in range(table.columnCount()):
-                item = self._get_data_from_cell(table, row, col)
-                row_data.append(item)
+            for col in range(model.columnCount()):
+                row_data.append(model.index(row, col).data())
             data.append(row_data)
         return pd.DataFrame(data, columns=column_labels)
 
-    def _get_data_from_cell(self, table, row, col):
-        """Retrieve data from a cell in a QTableWidget."""
-        item = table.item(row, col)
-
-        # If the cell contains a QComboBox (Transaction Type)
-        if type(table.cellWidget(row, col)) == QComboBox:
-            return table.cellWidget(row, col).currentText()
-
-        # If the cell contains a QDateEdit (Date)
-        elif type(table.cellWidget(row, col)) == QDateEdit:
-            date = table.cellWidget(row, col).date()
-            return date.toString("yyyy-MM-dd")
-
-        # If the cell is for the Receipts column (based on your column index)
-        elif col == 6:  # Change the index if it's different
-            button = table.cellWidget(row, col)
-            if button and button.text() == "Yes" and hasattr(button, 'receipt_path'):
-                return button.receipt_path
-            else:
-                return ""
-
-        # Any other cell
-        elif item:
-            return item.text()
-        else:
-            return ""
-
     def openSettings(self):
         print("Open Settings")
 
     def onExitTriggered(self):
         print("Exit Trigger Event")
+
+    def onWindowClosed(self):
+        """The main window is going away, stop journaling so no closed journal stays attached to the sheets."""
+        # Let a save that is still running reach its rename before the process goes away
+        waitForFileJobs()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
@@ -0,0 +1,21 @@
+import json
+import time
+
+from MonkeyMainFolder.Settings import ROOT_PATH
+
+# Every timing is appended here so import/save speed can be compared between versions
+PERF_LOG_PATH = ROOT_PATH / "perf_log.jsonl"
+
+
+def recordTiming(label, rows, seconds):
+    """Print a rows/sec figure for an operation and append it to the perf log."""
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"{label}: {rows} rows in {seconds:.3f}s ({rate:,.0f} rows/s)")
+    entry = {"label": label, "rows": rows, "seconds": round(seconds, 6), "rows_per_sec": round(rate, 1),
+             "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    try:
+        with open(PERF_LOG_PATH, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print("Could not write the perf log: ", e)
+    return entry
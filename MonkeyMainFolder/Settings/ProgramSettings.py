@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
                              QLineEdit, QLabel, QStackedWidget, QPushButton,
                              QTreeWidget, QTreeWidgetItem, QFrame)
 
+from MonkeyMainFolder.Settings.CustomPanels.CategoryRuleEditor import CategoryRuleEditor
 from MonkeyMainFolder.Settings.CustomPanels.CustomBlockEditor import CustomBlockEditor
 from MonkeyMainFolder.Settings.CustomPanels.Customlabel import ClickableLabel
 from MonkeyMainFolder.Settings.CustomPanels.CustomShortCutEditor import CustomShortCutEditor
@@ -22,6 +23,8 @@ class ProgramSettings(QWidget):
                                               "/incomeEditor.json",None)
         self.budgetEditor = CustomBlockEditor("C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings/JSONS"
                                               "/budgetEditor.json")
+        self.ruleEditor = CategoryRuleEditor("C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings/JSONS"
+                                             "/categoryRules.json", self.expensesEditor.categoryManager, self.broker)
         self.shortcutEditor = CustomShortCutEditor("C:/Dev/PythonProjects/TheMonkeyTracker/MonkeyMainFolder/Settings"
                                                    "/JSONS/shorts.json")
         # Main Layout
@@ -109,6 +112,7 @@ class ProgramSettings(QWidget):
         categoriesItem.addChild(QTreeWidgetItem(["Expenses Editor"]))
         categoriesItem.addChild(QTreeWidgetItem(["Income Editor"]))
         categoriesItem.addChild(QTreeWidgetItem(["Budget Editor"]))
+        categoriesItem.addChild(QTreeWidgetItem(["Category Rules"]))
         # Budgeting
         budgetItem = QTreeWidgetItem(["Budgeting"])
         budgetItem.addChild(QTreeWidgetItem(["Budget Setup"]))
@@ -186,7 +190,8 @@ class ProgramSettings(QWidget):
             labels = [
                 ClickableLabel("Expenses Editor", self),
                 ClickableLabel("Income Editor", self),
-                ClickableLabel("Budget Editor", self)
+                ClickableLabel("Budget Editor", self),
+                ClickableLabel("Category Rules", self)
 
             ]
         elif currentText == "Expenses Editor":
@@ -204,6 +209,11 @@ class ProgramSettings(QWidget):
             layout.addWidget(self.budgetEditor)
             layout.setStretchFactor(self.budgetEditor, 1)
             runLabels = False
+        elif currentText == "Category Rules":
+            layout.addWidget(titleLabel)
+            layout.addWidget(self.ruleEditor)
+            layout.setStretchFactor(self.ruleEditor, 1)
+            runLabels = False
         elif currentText == "Budgeting":
             labels = [
                 ClickableLabel("Budget Setup", self),
@@ -1,5 +1,6 @@
 class Shortcuts:
     OPEN = "Ctrl+O"
+    IMPORT = "Ctrl+I"
     SAVE = "Ctrl+S"
     SAVE_AS = "Ctrl+Shift+S"
     EXIT = "Ctrl+Q"
@@ -13,6 +14,7 @@ class Shortcuts:
     COPY = "Ctrl+C"
     PASTE = "Ctrl+V"
     SELECT_ALL = "Ctrl+Shift+A"
+    FIND = "Ctrl+F"
     DELETE = "DELETE"
     ADD_ROW = "Ctrl+A"
     DELETE_ROW = "Ctrl+D"
@@ -3,6 +3,13 @@ from PyQt6.QtCore import QObject, pyqtSignal
 
 class SignalBroker(QObject):
     global_cats_saved = pyqtSignal()
+    global_rules_saved = pyqtSignal()
+
+    # Background file jobs, emitted from the worker thread and delivered queued on the GUI thread
+    file_job_progress = pyqtSignal(object, int, int)  # job, done, total
+    file_job_finished = pyqtSignal(object, object)  # job, result
+    file_job_failed = pyqtSignal(object, str)  # job, error message
+    file_job_cancelled = pyqtSignal(object)  # job
 
 
 broker = SignalBroker()
@@ -0,0 +1,115 @@
+import builtins
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from MonkeyMainFolder.Settings import ROOT_PATH
+
+# Run with MONKEY_TRACE_STARTUP=1 or this flag to trace startup
+TRACE_FLAG = "--trace-startup"
+TRACE_ENABLED = os.environ.get('MONKEY_TRACE_STARTUP', '') not in ['', '0'] or TRACE_FLAG in sys.argv
+# Written when the window first paints, sorted so two runs (or two releases) diff line by line
+STARTUP_TRACE_PATH = ROOT_PATH / "startup_trace.json"
+# Imports faster than this are left out of the report
+MIN_IMPORT_SECONDS = 0.001
+# How many of the slowest imports are printed
+PRINTED_IMPORTS = 15
+
+
+class StartupTrace:
+    """Times every import, each named construction phase and the first paint from the moment it is created.
+
+    Imports are timed by wrapping builtins.__import__: each module gets its total time and its own time
+    (total minus the imports it started). Import timing stops and the report is written at finish(),
+    phases that come later (the Budget tab is built on demand) are added to the report as they end.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.finished = False
+        self.start = time.perf_counter()
+        self.imports = {}  # module -> [total seconds, own seconds]
+        self.phases = {}  # label -> seconds
+        self.marks = {}  # label -> seconds since the trace started
+        self.local = threading.local()
+        self.originalImport = builtins.__import__
+        if enabled:
+            builtins.__import__ = self._import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules:
+            return self.originalImport(name, globals, locals, fromlist, level)
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.originalImport(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            if elapsed >= MIN_IMPORT_SECONDS:
+                if level:
+                    package = (globals or {}).get('__package__') or ""
+                    name = f"{package}.{name}" if name else package
+                times = self.imports.setdefault(name, [0.0, 0.0])
+                times[0] += elapsed
+                times[1] += elapsed - children
+
+    @contextlib.contextmanager
+    def phase(self, label):
+        """Time a block, e.g. building a panel."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[label] = self.phases.get(label, 0.0) + time.perf_counter() - start
+            if self.finished:
+                self.writeReport()
+
+    def mark(self, label):
+        if self.enabled and not self.finished and label not in self.marks:
+            self.marks[label] = time.perf_counter() - self.start
+
+    def finish(self, label="first paint"):
+        """Mark the end of startup, stop timing imports, write the report and print the slowest parts."""
+        if not self.enabled or self.finished:
+            return None
+        self.mark(label)
+        self.finished = True
+        if builtins.__import__ == self._import:
+            builtins.__import__ = self.originalImport
+        report = self.writeReport()
+
+        for label, seconds in sorted(report["marks"].items(), key=lambda item: item[1]):
+            print(f"startup {label}: {seconds:.3f}s")
+        for label, seconds in report["phases"].items():
+            print(f"startup phase {label}: {seconds:.3f}s")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:PRINTED_IMPORTS]
+        for name, (total, own) in slowest:
+            print(f"startup import {name}: {own:.3f}s own, {total:.3f}s total")
+        return report
+
+    def writeReport(self):
+        report = {
+            "marks": {label: round(seconds, 4) for label, seconds in sorted(self.marks.items())},
+            "phases": {label: round(seconds, 4) for label, seconds in sorted(self.phases.items())},
+            "imports": {name: {"total": round(total, 4), "own": round(own, 4)}
+                        for name, (total, own) in sorted(self.imports.items())},
+        }
+        try:
+            with open(STARTUP_TRACE_PATH, 'w') as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            print("Could not write the startup trace: ", e)
+        return report
+
+
+startupTrace = StartupTrace(TRACE_ENABLED)